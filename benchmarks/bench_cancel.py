@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import LocalMediaServer, synthetic_bytes
+from core.engine import DownloadTask, FORMAT_MP3, FORMAT_MP4
+from core.progress import STAGE_EXTRACTING, STAGE_DOWNLOADING, STAGE_ENCODING
+from core.service import DownloadService
+from core.transcode import EncodePool, find_ffmpeg
+
+
+# Cancel-to-idle latency per stage: a job is started, cancelled once it
+# has spent a moment in the given stage, and timed until run() returns.
+# Files left in the download folder afterwards are listed as leftovers.
+# The "scheduled" and "closed" stages cancel a DownloadService job right
+# after add_job(), by cancelling it or by closing the service, before
+# its download has started. Every stage must end "Cancelled", leave no
+# files behind and stop within --max-cancel-ms; otherwise the script
+# exits with 1.
+
+DEFAULT_MAX_CANCEL_MS = 2000
+
+
+def long_audio(ffmpeg, seconds):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "tone.m4a")
+        subprocess.run(
+            [
+                ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+                "-i", f"sine=frequency=440:duration={seconds}",
+                "-codec:a", "aac", "-b:a", "64k", path,
+            ],
+            check=True,
+        )
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def cancel_in_stage(url, format_type, stage, after, **options):
+    reached = threading.Event()
+    seen = []
+
+    def on_progress(progress):
+        seen.append(progress.stage)
+        if progress.stage == stage:
+            reached.set()
+
+    with tempfile.TemporaryDirectory() as folder:
+        task = DownloadTask(url, folder, format_type, on_progress=on_progress, **options)
+        thread = threading.Thread(target=task.run)
+        thread.start()
+
+        if not reached.wait(60):
+            raise RuntimeError(f"{url} never reached {stage}, saw {seen}")
+        time.sleep(after)
+
+        cancelled_at = time.perf_counter()
+        task.cancel()
+        thread.join()
+        latency = time.perf_counter() - cancelled_at
+
+        leftovers = sorted(
+            os.path.relpath(os.path.join(root, name), folder)
+            for root, _, names in os.walk(folder) for name in names
+        )
+
+    return {
+        "stage": stage,
+        "cancel_ms": round(latency * 1000, 1),
+        "status": task.result,
+        "leftovers": leftovers,
+    }
+
+
+def problems(result, max_cancel_ms):
+    found = []
+    if result["status"] != "Cancelled":
+        found.append(f"ended {result['status']!r}")
+    if result["leftovers"]:
+        found.append(f"left {', '.join(result['leftovers'])}")
+    if result["cancel_ms"] > max_cancel_ms:
+        found.append(f"took {result['cancel_ms']} ms to stop")
+    return found
+
+
+def cancel_scheduled(url, stage):
+    async def run(folder):
+        async with DownloadService(1) as service:
+            cancelled_at = time.perf_counter()
+            job = service.add_job(url, folder, FORMAT_MP4)
+            if stage == "scheduled":
+                job.cancel()
+                await job.wait()
+        return job, time.perf_counter() - cancelled_at
+
+    with tempfile.TemporaryDirectory() as folder:
+        job, latency = asyncio.run(run(folder))
+        leftovers = sorted(
+            os.path.relpath(os.path.join(root, name), folder)
+            for root, _, names in os.walk(folder) for name in names
+        )
+
+    return {
+        "stage": stage,
+        "cancel_ms": round(latency * 1000, 1),
+        "status": job.status,
+        "leftovers": leftovers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=40)
+    parser.add_argument("--size", type=int, default=32 * 1024 * 1024)
+    parser.add_argument("--rate", type=int, default=1024 * 1024)
+    parser.add_argument("--audio-seconds", type=int, default=1200)
+    parser.add_argument("--max-cancel-ms", type=float, default=DEFAULT_MAX_CANCEL_MS)
+    args = parser.parse_args()
+
+    results = []
+
+    with LocalMediaServer() as server:
+        # Every entry answers slowly, so the playlist stays in extraction
+        body = synthetic_bytes(256 * 1024)
+        entries = [
+            server.add_file(f"/entry{i}.mp4", body, delay=0.3)
+            for i in range(args.entries)
+        ]
+        feed = server.add_feed("/feed.xml", "Cancel Feed", entries)
+        results.append(cancel_in_stage(
+            feed, FORMAT_MP4, STAGE_EXTRACTING, 1.0, playlist_workers=2
+        ))
+
+        slow = server.add_file("/slow.mp4", synthetic_bytes(args.size), rate=args.rate)
+        results.append(cancel_in_stage(slow, FORMAT_MP4, STAGE_DOWNLOADING, 0.5))
+        results.append(cancel_scheduled(slow, "scheduled"))
+        results.append(cancel_scheduled(slow, "closed"))
+
+        ffmpeg = find_ffmpeg()
+        if ffmpeg:
+            audio = server.add_file(
+                "/tone.m4a", long_audio(ffmpeg, args.audio_seconds), "audio/mp4"
+            )
+            pool = EncodePool(1)
+            results.append(cancel_in_stage(
+                audio, FORMAT_MP3, STAGE_ENCODING, 0.5, encode_pool=pool
+            ))
+            pool.shutdown()
+        else:
+            print("ffmpeg not found, encoding stage skipped", file=sys.stderr)
+
+    print(json.dumps(results, indent=2))
+
+    failed = False
+    for result in results:
+        for problem in problems(result, args.max_cancel_ms):
+            print(f"FAIL {result['stage']}: {problem}", file=sys.stderr)
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
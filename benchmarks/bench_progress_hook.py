@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import PySide6
+from PySide6.QtCore import QEventLoop, QObject, Signal, Slot
+from PySide6.QtWidgets import QApplication, QProgressBar
+
+from core.progress import ProgressAggregator, DEFAULT_PROGRESS_INTERVAL
+
+
+# Feeds synthetic yt-dlp progress dicts through the old string-parsing
+# hook and through ProgressAggregator on a download thread. Both emit
+# through a queued signal into the GUI thread, where a slot updates a
+# progress bar like the dashboard does. Reports the hook's cost per
+# call and the GUI thread's CPU time spent on the deliveries, which is
+# what the aggregation saves.
+
+TOTAL_BYTES = 500 * 1024 * 1024
+CHUNK = 1024
+
+
+def make_events(count, duration):
+    events = []
+    for i in range(count):
+        downloaded = min(TOTAL_BYTES, (i + 1) * CHUNK)
+        events.append((duration * i / count, {
+            "status": "downloading",
+            "filename": "video.mp4",
+            "downloaded_bytes": downloaded,
+            "total_bytes": TOTAL_BYTES,
+            "speed": 50 * 1024 * 1024,
+            "eta": 10,
+            "_percent_str": f"{downloaded * 100 / TOTAL_BYTES:5.1f}%",
+        }))
+    return events
+
+
+def legacy_hook(events, emit):
+    def hook(d):
+        if d["status"] == "downloading":
+            percent = d.get("_percent_str", "0%").replace("%", "").strip()
+            try:
+                emit(int(float(percent)))
+            except:
+                pass
+
+    start = time.perf_counter()
+    for _, d in events:
+        hook(d)
+    return time.perf_counter() - start
+
+
+def aggregated_hook(events, emit, interval):
+    # The clock follows the synthetic timeline so rate limiting behaves
+    # as it would during a real transfer of the same length
+    now = [0.0]
+    tracker = ProgressAggregator(emit, interval=interval, clock=lambda: now[0])
+
+    start = time.perf_counter()
+    for at, d in events:
+        now[0] = at
+        tracker.hook(0, d)
+    return time.perf_counter() - start
+
+
+class Emitter(QObject):
+    # The old downloader's percent signal, and the snapshots of the
+    # aggregator
+    percent = Signal(int)
+    progress = Signal(object)
+    done = Signal()
+
+
+def signals_corrupt_refcounts():
+    # PySide6 builds made for Python 3.12's immortal True and None (6.12
+    # on an older Python) give back references to them they never took,
+    # one per emit() and slot call; a few thousand signals later the
+    # interpreter aborts. The window would crash the same way, so no
+    # number measured on such a setup means anything.
+    emitter = Emitter()
+    before = sys.getrefcount(True)
+    for _ in range(10):
+        emitter.done.emit()
+    return sys.getrefcount(True) < before
+
+
+class Receiver(QObject):
+    # Lives in the GUI thread, so signals from the download thread are
+    # queued to it
+    def __init__(self, loop):
+        super().__init__()
+        self.loop = loop
+        self.bar = QProgressBar()
+        self.delivered = 0
+
+    @Slot(int)
+    def on_percent(self, value):
+        self.delivered += 1
+        self.bar.setValue(value)
+
+    @Slot(object)
+    def on_progress(self, progress):
+        self.delivered += 1
+        self.bar.setValue(progress.percent)
+
+    @Slot()
+    def on_done(self):
+        # Queued behind every progress signal
+        self.loop.quit()
+
+
+def run_through_signal(run):
+    # Runs run(emit) on a thread of its own while the GUI thread's event
+    # loop delivers what it emits
+    loop = QEventLoop()
+    receiver = Receiver(loop)
+    emitter = Emitter()
+    emitter.percent.connect(receiver.on_percent)
+    emitter.progress.connect(receiver.on_progress)
+    emitter.done.connect(receiver.on_done)
+
+    emitted = [0]
+    elapsed = [0.0]
+
+    def emit(value):
+        emitted[0] += 1
+        if isinstance(value, int):
+            emitter.percent.emit(value)
+        else:
+            emitter.progress.emit(value)
+
+    def produce():
+        elapsed[0] = run(emit)
+        emitter.done.emit()
+
+    started = time.perf_counter()
+    gui_started = time.thread_time()
+    thread = threading.Thread(target=produce)
+    thread.start()
+    loop.exec()
+    gui_seconds = time.thread_time() - gui_started
+    wall = time.perf_counter() - started
+    thread.join()
+
+    return elapsed[0], emitted[0], receiver.delivered, gui_seconds, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="simulated transfer length in seconds")
+    parser.add_argument("--interval", type=float, default=DEFAULT_PROGRESS_INTERVAL)
+    args = parser.parse_args()
+
+    events = make_events(args.calls, args.duration)
+    results = {}
+    # Kept alive for the event loops below
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    if signals_corrupt_refcounts():
+        print(
+            f"PySide6 {PySide6.__version__} does not match Python "
+            f"{sys.version.split()[0]}: its signals corrupt reference counts "
+            "and crash the interpreter. Install a PySide6 build made for this "
+            "Python version.",
+            file=sys.stderr
+        )
+        return 2
+
+    for name, run in [
+        ("legacy", lambda emit: legacy_hook(events, emit)),
+        ("aggregated", lambda emit: aggregated_hook(events, emit, args.interval)),
+    ]:
+        elapsed, emitted, delivered, gui_seconds, wall = run_through_signal(run)
+        results[name] = {
+            "calls": args.calls,
+            "hook_seconds": round(elapsed, 4),
+            "us_per_call": round(elapsed * 1e6 / args.calls, 3),
+            "emissions": emitted,
+            "emissions_per_second": round(emitted / args.duration, 1),
+            "delivered": delivered,
+            "gui_cpu_seconds": round(gui_seconds, 4),
+            "gui_us_per_delivery": round(gui_seconds * 1e6 / max(1, delivered), 2),
+            "wall_seconds": round(wall, 4),
+        }
+
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
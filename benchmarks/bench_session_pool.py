@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_server import LocalMediaServer, synthetic_bytes
+from core.engine import DownloadTask, FORMAT_MP4
+from core.session import SessionPool
+
+
+# Per-URL latency for many short downloads, with a fresh YoutubeDL per
+# job (the old behaviour) and with pooled sessions.
+
+
+def run(urls, sessions):
+    latencies = []
+    with tempfile.TemporaryDirectory() as folder:
+        for url in urls:
+            start = time.perf_counter()
+            result = DownloadTask(url, folder, FORMAT_MP4, sessions=sessions).run()
+            latencies.append(time.perf_counter() - start)
+            if result != "Completed":
+                raise RuntimeError(f"{url}: {result}")
+
+    return {
+        "urls": len(urls),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 1),
+        "median_ms": round(statistics.median(latencies) * 1000, 1),
+        "p95_ms": round(sorted(latencies)[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "total_s": round(sum(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--urls", type=int, default=30)
+    parser.add_argument("--size", type=int, default=256 * 1024)
+    args = parser.parse_args()
+
+    with LocalMediaServer() as server:
+        body = synthetic_bytes(args.size)
+        urls = [server.add_file(f"/clip{i}.mp4", body) for i in range(args.urls)]
+
+        # Warm the import and extractor caches so both runs start equal
+        run(urls[:1], None)
+
+        results = {"without_pool": run(urls, None)}
+
+        pool = SessionPool()
+        results["with_pool"] = run(urls, pool)
+        results["with_pool"]["sessions"] = pool.stats()
+        pool.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Launches the GUI with --startup-report several times and prints the
+# median milliseconds to each startup milestone (see core.startup).
+# With --max-first-paint the exit code fails when that budget is blown.
+
+
+def launch():
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    output = subprocess.run(
+        [sys.executable, os.path.join(ROOT, "main.py"), "--startup-report"],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120, check=True
+    ).stdout
+
+    for line in output.splitlines():
+        if line.startswith("{"):
+            return json.loads(line)
+    raise RuntimeError(f"No startup report in output: {output!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-first-paint", type=float, metavar="MS")
+    args = parser.parse_args()
+
+    # The first launch fills the bytecode and font caches
+    launch()
+    reports = [launch() for _ in range(args.runs)]
+
+    results = {
+        name: round(statistics.median(report[name] for report in reports), 1)
+        for name in reports[0]
+    }
+    results["runs"] = args.runs
+    print(json.dumps(results, indent=2))
+
+    if args.max_first_paint and results["first_paint"] > args.max_first_paint:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
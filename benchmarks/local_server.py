@@ -0,0 +1,193 @@
+import json
+import os
+import re
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Small HTTP server for benchmarks. Files live in memory and support
+# HEAD and single Range requests, which is all yt-dlp's generic
+# extractor and HTTP downloader need for direct media URLs. A file can
+# be given a response delay and a byte rate to simulate slow servers.
+# With max_active, requests beyond that many at once are answered with
+# HTTP 429 like a site that throttles parallel clients.
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def synthetic_bytes(size, seed=0):
+    block = os.urandom(64 * 1024) if seed is None else bytes(
+        (i * 31 + seed) & 0xFF for i in range(64 * 1024)
+    )
+    repeats, rest = divmod(size, len(block))
+    return block * repeats + block[:rest]
+
+
+class LocalMediaServer:
+    def __init__(self, host="127.0.0.1", port=0, max_active=0):
+        self.files = {}
+        self.max_active = max_active
+        self.throttled = 0
+        self._active = 0
+        self._active_lock = threading.Lock()
+        # GET and HEAD requests per path
+        self.hits = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._send(head=True)
+
+            def do_GET(self):
+                with server._active_lock:
+                    throttled = server.max_active and server._active >= server.max_active
+                    if throttled:
+                        server.throttled += 1
+                    else:
+                        server._active += 1
+
+                if throttled:
+                    self.send_error(429)
+                    return
+
+                try:
+                    self._send(head=False)
+                finally:
+                    with server._active_lock:
+                        server._active -= 1
+
+            def _send(self, head):
+                path = self.path.split("?")[0]
+                server.hits[path] = server.hits.get(path, 0) + 1
+                entry = server.files.get(path)
+                if entry is None:
+                    self.send_error(404)
+                    return
+
+                body, content_type, delay, rate = entry
+                if delay:
+                    time.sleep(delay)
+
+                start, end = 0, len(body) - 1
+
+                match = _RANGE.fullmatch(self.headers.get("Range", ""))
+                if match and (match.group(1) or match.group(2)):
+                    if match.group(1):
+                        start = int(match.group(1))
+                        end = int(match.group(2)) if match.group(2) else end
+                    else:
+                        start = max(0, len(body) - int(match.group(2)))
+                    end = min(end, len(body) - 1)
+                    self.send_response(206)
+                    self.send_header("Content-Range", f"bytes {start}-{end}/{len(body)}")
+                else:
+                    self.send_response(200)
+
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(end - start + 1))
+                self.send_header("Accept-Ranges", "bytes")
+                self.end_headers()
+
+                if head:
+                    return
+
+                # Ten writes per second at the requested rate
+                data = memoryview(body)[start:end + 1]
+                step = max(1, rate // 10 if rate else len(data))
+                try:
+                    for offset in range(0, len(data), step):
+                        self.wfile.write(data[offset:offset + step])
+                        if rate:
+                            time.sleep(0.1)
+                except (BrokenPipeError, ConnectionResetError):
+                    # Clients that cancel simply hang up
+                    pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def add_file(self, path, body, content_type="video/mp4", delay=0, rate=0):
+        self.files[path] = (body, content_type, delay, rate)
+        return self.base_url + path
+
+    def add_feed(self, path, title, urls):
+        # RSS feeds are turned into playlists by the generic extractor
+        items = "".join(
+            f"<item><title>Entry {i}</title><guid>{i}</guid>"
+            f"<link>{url}</link>"
+            f"<enclosure url=\"{url}\" type=\"video/mp4\"/></item>"
+            for i, url in enumerate(urls, start=1)
+        )
+        body = (
+            "<?xml version=\"1.0\"?><rss version=\"2.0\"><channel>"
+            f"<title>{title}</title><link>{self.base_url}/</link>"
+            f"<description>{title}</description>{items}</channel></rss>"
+        ).encode("utf-8")
+        return self.add_file(path, body, "application/rss+xml")
+
+    def add_video(self, video_id, body, title=None, ext="mp4", **media):
+        # Page for the zenbench test extractor in benchmarks/plugins
+        media_url = self.add_file(f"/media/{video_id}.{ext}", body, **media)
+        page = json.dumps({
+            "id": video_id,
+            "title": title or video_id,
+            "url": media_url,
+            "ext": ext,
+            "filesize": len(body),
+        }).encode("utf-8")
+        return self.add_file(f"/bench/video/{video_id}", page, "application/json")
+
+    def add_formats(self, video_id, formats, title=None):
+        # Like add_video with several formats. Each one is a dict of
+        # yt-dlp format fields plus "body"; format_id and ext are needed.
+        listed = []
+        for fmt in formats:
+            fields = {k: v for k, v in fmt.items() if k != "body"}
+            fields["url"] = self.add_file(
+                f"/media/{video_id}-{fmt['format_id']}.{fmt['ext']}", fmt["body"]
+            )
+            fields["filesize"] = len(fmt["body"])
+            listed.append(fields)
+
+        page = json.dumps({
+            "id": video_id, "title": title or video_id, "formats": listed,
+        }).encode("utf-8")
+        return self.add_file(f"/bench/video/{video_id}", page, "application/json")
+
+    def add_playlist(self, playlist_id, video_urls, title=None, page_size=0, page_delay=0):
+        # With a page_size, entries are served in pages of that many at
+        # /bench/playlist/<id>/<page>, each one page_delay seconds late
+        entries = [
+            {"id": url.rsplit("/", 1)[1], "title": url.rsplit("/", 1)[1], "url": url}
+            for url in video_urls
+        ]
+        meta = {"id": playlist_id, "title": title or playlist_id}
+        if page_size:
+            meta["page_size"] = page_size
+            for page, start in enumerate(range(0, len(entries), page_size)):
+                body = json.dumps(entries[start:start + page_size]).encode("utf-8")
+                self.add_file(
+                    f"/bench/playlist/{playlist_id}/{page}", body, "application/json",
+                    delay=page_delay
+                )
+        else:
+            meta["entries"] = entries
+
+        page = json.dumps(meta).encode("utf-8")
+        return self.add_file(f"/bench/playlist/{playlist_id}", page, "application/json")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+        self.httpd.server_close()
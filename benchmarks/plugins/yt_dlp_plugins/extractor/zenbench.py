@@ -0,0 +1,64 @@
+import functools
+
+from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.utils import OnDemandPagedList
+
+
+# Test extractor for benchmarks.local_server. Video pages and playlists
+# are small JSON documents, media is served from /media/<id>.mp4. Loaded
+# as a yt-dlp plugin once benchmarks/plugins is on sys.path.
+
+_BASE = r"https?://(?:127\.0\.0\.1|localhost):\d+/bench"
+
+
+class ZenBenchIE(InfoExtractor):
+    IE_NAME = "zenbench"
+    _VALID_URL = _BASE + r"/video/(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        meta = self._download_json(url, video_id)
+
+        # Pages list several formats or describe a single one themselves
+        return {
+            "id": video_id,
+            "title": meta["title"],
+            "formats": [{
+                "format_id": fmt.get("format_id", fmt.get("ext", "mp4")),
+                "url": fmt["url"],
+                "ext": fmt.get("ext", "mp4"),
+                "filesize": fmt["filesize"],
+                "vcodec": fmt.get("vcodec", "h264"),
+                "acodec": fmt.get("acodec", "aac"),
+                "abr": fmt.get("abr"),
+                "tbr": fmt.get("tbr"),
+                "height": fmt.get("height"),
+            } for fmt in meta.get("formats") or [meta]],
+        }
+
+
+class ZenBenchPlaylistIE(InfoExtractor):
+    IE_NAME = "zenbench:playlist"
+    _VALID_URL = _BASE + r"/playlist/(?P<id>[\w-]+)"
+
+    def _real_extract(self, url):
+        playlist_id = self._match_id(url)
+        meta = self._download_json(url, playlist_id)
+
+        # Paged playlists are listed on demand, like channels on real sites
+        if "page_size" in meta:
+            entries = OnDemandPagedList(
+                functools.partial(self._fetch_page, url, playlist_id), meta["page_size"]
+            )
+        else:
+            entries = [self._entry(entry) for entry in meta["entries"]]
+        return self.playlist_result(entries, playlist_id, meta["title"])
+
+    def _fetch_page(self, url, playlist_id, page):
+        entries = self._download_json(
+            f"{url}/{page}", playlist_id, f"Downloading page {page + 1}", fatal=False
+        )
+        yield from map(self._entry, entries or [])
+
+    def _entry(self, entry):
+        return self.url_result(entry["url"], ZenBenchIE, entry["id"], entry["title"])
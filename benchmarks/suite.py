@@ -0,0 +1,390 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# The zenbench test extractor is a yt-dlp plugin living in here
+PLUGIN_DIR = os.path.join(ROOT, "benchmarks", "plugins")
+sys.path.insert(0, PLUGIN_DIR)
+
+from benchmarks.local_server import LocalMediaServer, synthetic_bytes
+from core.archive import DownloadArchive
+from core.connections import ConnectionTuner
+from core.engine import DownloadTask, FORMAT_AUDIO, FORMAT_MP3, FORMAT_MP4
+from core.metrics import COUNTER_BYTES, STAGE_ENCODE
+from core.session import SessionPool
+from core.transcode import EncodePool, find_ffmpeg
+
+
+# Offline benchmark suite. Every benchmark runs in its own process
+# against benchmarks.local_server, so peak memory is per benchmark and
+# no network is needed. Results are printed (or written) as one JSON
+# document; --compare prints the change against an earlier one.
+#
+#   python benchmarks/suite.py -o before.json
+#   python benchmarks/suite.py --compare before.json
+
+MB = 1024 * 1024
+
+
+class TimedTask(DownloadTask):
+    # Measures the time spent inside the progress hook, which runs on
+    # the download thread between two reads
+    hook_calls = 0
+    hook_seconds = 0.0
+
+    def _progress_hook(self, key, d):
+        start = time.perf_counter()
+        try:
+            super()._progress_hook(key, d)
+        finally:
+            self.hook_calls += 1
+            self.hook_seconds += time.perf_counter() - start
+
+
+def run_task(url, folder, format_type=FORMAT_MP4, **options):
+    emissions = []
+    task = TimedTask(url, folder, format_type, on_progress=emissions.append, **options)
+
+    start = time.perf_counter()
+    result = task.run()
+    elapsed = time.perf_counter() - start
+
+    if not result.startswith("Completed"):
+        raise RuntimeError(f"{url}: {result}")
+    return task, elapsed, len(emissions)
+
+
+def bench_single_file(args):
+    with LocalMediaServer() as server, tempfile.TemporaryDirectory() as folder:
+        size = args.size * MB
+        url = server.add_video("single", synthetic_bytes(size))
+        task, elapsed, emissions = run_task(url, folder)
+
+    return {
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(size / MB / elapsed, 1),
+        "hook_calls": task.hook_calls,
+        "hook_us_per_call": round(task.hook_seconds * 1e6 / max(1, task.hook_calls), 2),
+        "hook_share": round(task.hook_seconds / elapsed, 4),
+        "progress_emissions": emissions,
+    }
+
+
+def bench_playlist(args):
+    results = {}
+
+    with LocalMediaServer() as server:
+        body = synthetic_bytes(args.entry_size * MB)
+        videos = [server.add_video(f"entry{i}", body) for i in range(args.entries)]
+        url = server.add_playlist("bench", videos, "Bench Playlist")
+
+        for workers in args.workers:
+            sessions = SessionPool(max_idle=workers)
+            with tempfile.TemporaryDirectory() as folder:
+                task, elapsed, emissions = run_task(
+                    url, folder, playlist_workers=workers, sessions=sessions
+                )
+            sessions.close()
+
+            results[f"workers_{workers}"] = {
+                "entries": args.entries,
+                "seconds": round(elapsed, 3),
+                "mb_per_s": round(args.entries * args.entry_size / elapsed, 1),
+                "progress_emissions": emissions,
+            }
+
+    return results
+
+
+def bench_playlist_streaming(args):
+    # A paged listing with a delay per page, like a large channel. The
+    # first file should land long before the last page is listed; the
+    # re-sync after new uploads should only list the first pages.
+    results = {}
+    pages = -(-args.channel_entries // args.page_size)
+
+    with LocalMediaServer() as server, tempfile.TemporaryDirectory() as folder:
+        body = synthetic_bytes(args.entry_size * MB)
+        videos = [server.add_video(f"entry{i}", body) for i in range(args.channel_entries)]
+        url = server.add_playlist(
+            "channel", videos, "Bench Channel", args.page_size, args.page_delay
+        )
+        archive = DownloadArchive(os.path.join(folder, "archive.db"))
+        sessions = SessionPool()
+
+        for run, sync_stop in (("initial", 0), ("resync", args.page_size)):
+            server.hits.clear()
+            first_file = []
+            started = time.perf_counter()
+
+            def on_log(message, level):
+                if message.startswith("Finished") and not first_file:
+                    first_file.append(time.perf_counter() - started)
+
+            task, elapsed, emissions = run_task(
+                url, folder, archive=archive, sessions=sessions, sync_stop=sync_stop,
+                on_log=on_log,
+            )
+            results[run] = {
+                "entries": task.tracker.entry_count,
+                "seconds": round(elapsed, 3),
+                "first_file_seconds": round(first_file[0], 3) if first_file else None,
+                "pages_listed": sum(
+                    hits for path, hits in server.hits.items()
+                    if path.startswith("/bench/playlist/channel/")
+                ),
+            }
+
+            # New uploads show up at the top of the channel
+            new = [server.add_video(f"new{i}", body) for i in range(2)]
+            videos = new + videos
+            url = server.add_playlist(
+                "channel", videos, "Bench Channel", args.page_size, args.page_delay
+            )
+
+        sessions.close()
+
+    results["listing_seconds"] = round(pages * args.page_delay, 3)
+    return results
+
+
+def bench_segmented(args):
+    # The server caps every connection, like origins that throttle per
+    # connection; 0 is the auto-tuned count
+    results = {}
+
+    with LocalMediaServer() as server:
+        size = args.segmented_size * MB
+        url = server.add_video("segmented", synthetic_bytes(size), rate=args.connection_rate * MB)
+
+        for connections in [1, 4, 0]:
+            tuner = ConnectionTuner(connections)
+            with tempfile.TemporaryDirectory() as folder:
+                task, elapsed, emissions = run_task(url, folder, connections=tuner)
+
+            results[f"connections_{connections or 'auto'}"] = {
+                "seconds": round(elapsed, 3),
+                "mb_per_s": round(size / MB / elapsed, 1),
+                "tuned": tuner.stats(),
+            }
+
+    return results
+
+
+def tone(ffmpeg, seconds, codec, bitrate, ext):
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, f"tone.{ext}")
+        subprocess.run(
+            [
+                ffmpeg, "-y", "-loglevel", "error", "-f", "lavfi",
+                "-i", f"sine=frequency=440:duration={seconds}",
+                "-codec:a", codec, "-b:a", f"{bitrate}k", path,
+            ],
+            check=True,
+        )
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def bench_audio_formats(args):
+    # Bytes fetched and encode time per audio job when the page offers
+    # a muxed video, an AAC stream and (in the first case) an MP3 stream
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        return {"skipped": "ffmpeg not found"}
+
+    muxed = {
+        "format_id": "muxed", "ext": "mp4", "vcodec": "h264", "acodec": "aac",
+        "tbr": 4000, "body": synthetic_bytes(args.entry_size * MB),
+    }
+    aac = {
+        "format_id": "aac", "ext": "m4a", "vcodec": "none", "acodec": "mp4a.40.2",
+        "abr": 128, "body": tone(ffmpeg, args.audio_seconds, "aac", 128, "m4a"),
+    }
+    mp3 = {
+        "format_id": "mp3", "ext": "mp3", "vcodec": "none", "acodec": "mp3",
+        "abr": 192, "body": tone(ffmpeg, args.audio_seconds, "libmp3lame", 192, "mp3"),
+    }
+    cases = {
+        "mp3_with_mp3_stream": (FORMAT_MP3, [muxed, aac, mp3]),
+        "mp3_from_aac": (FORMAT_MP3, [muxed, aac]),
+        "original": (FORMAT_AUDIO, [muxed, aac]),
+    }
+
+    results = {}
+    pool = EncodePool(1)
+    with LocalMediaServer() as server:
+        for name, (format_type, formats) in cases.items():
+            url = server.add_formats(name, formats)
+            with tempfile.TemporaryDirectory() as folder:
+                task, elapsed, emissions = run_task(
+                    url, folder, format_type, encode_pool=pool
+                )
+                files = [name for _, _, names in os.walk(folder) for name in names]
+
+            results[name] = {
+                "seconds": round(elapsed, 3),
+                "bytes": task.metrics.snapshot()["counters"][COUNTER_BYTES],
+                "encode_seconds": round(task.timings.get(STAGE_ENCODE, 0.0), 3),
+                "files": files,
+            }
+
+    pool.shutdown()
+    return results
+
+
+def bench_transcode(args):
+    ffmpeg = find_ffmpeg()
+    if ffmpeg is None:
+        return {"skipped": "ffmpeg not found"}
+
+    from benchmarks.bench_cancel import long_audio
+
+    audio = long_audio(ffmpeg, args.audio_seconds)
+    pool = EncodePool(1)
+
+    with tempfile.TemporaryDirectory() as folder:
+        source = os.path.join(folder, "tone.m4a")
+        with open(source, "wb") as f:
+            f.write(audio)
+
+        start = time.perf_counter()
+        pool.submit(source, os.path.join(folder, "tone.mp3")).result()
+        elapsed = time.perf_counter() - start
+
+    pool.shutdown()
+    return {
+        "audio_seconds": args.audio_seconds,
+        "seconds": round(elapsed, 3),
+        "realtime_factor": round(args.audio_seconds / elapsed, 1),
+    }
+
+
+BENCHMARKS = {
+    "single_file": bench_single_file,
+    "playlist": bench_playlist,
+    "playlist_streaming": bench_playlist_streaming,
+    "segmented": bench_segmented,
+    "audio_formats": bench_audio_formats,
+    "transcode": bench_transcode,
+}
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (MB if sys.platform == "darwin" else 1024), 1)
+
+
+def run_isolated(name, argv):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--only", name, *argv],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output)
+
+
+def compare(old, new):
+    changes = {}
+    for name, results in new["results"].items():
+        stack = [(name, results, old["results"].get(name, {}))]
+        while stack:
+            prefix, current, previous = stack.pop()
+            for key, value in current.items():
+                before = previous.get(key) if isinstance(previous, dict) else None
+                if isinstance(value, dict):
+                    stack.append((f"{prefix}.{key}", value, before))
+                elif isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                    changes[f"{prefix}.{key}"] = {
+                        "before": before,
+                        "after": value,
+                        "change_percent": round((value - before) * 100 / before, 1),
+                    }
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--only", choices=sorted(BENCHMARKS), help=argparse.SUPPRESS)
+    parser.add_argument("--skip", action="append", default=[], choices=sorted(BENCHMARKS))
+    parser.add_argument("--size", type=int, default=64, help="single file size in MB")
+    parser.add_argument("--entries", type=int, default=8)
+    parser.add_argument("--entry-size", type=int, default=8, help="playlist entry size in MB")
+    parser.add_argument(
+        "--workers", type=lambda text: [int(x) for x in text.split(",")],
+        default=[1, 2, 4, 8], help="comma separated playlist worker counts"
+    )
+    parser.add_argument("--channel-entries", type=int, default=40)
+    parser.add_argument("--page-size", type=int, default=10, help="channel entries per page")
+    parser.add_argument(
+        "--page-delay", type=float, default=1.0, help="seconds per channel page"
+    )
+    parser.add_argument(
+        "--segmented-size", type=int, default=64, help="segmented download size in MB"
+    )
+    parser.add_argument(
+        "--connection-rate", type=int, default=8, help="server limit per connection in MB/s"
+    )
+    parser.add_argument("--audio-seconds", type=int, default=300)
+    parser.add_argument("-o", "--output", help="write the results to this file")
+    parser.add_argument("--compare", metavar="JSON", help="earlier results to compare with")
+    args = parser.parse_args()
+
+    if args.only:
+        results = BENCHMARKS[args.only](args)
+        results["peak_rss_mb"] = peak_rss_mb()
+        print(json.dumps(results))
+        return 0
+
+    # Everything except the suite's own options goes to the children
+    argv = []
+    for option in ["size", "entries", "entry_size", "channel_entries", "page_size",
+                   "page_delay", "segmented_size", "connection_rate", "audio_seconds"]:
+        argv += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+    argv += ["--workers", ",".join(map(str, args.workers))]
+
+    import yt_dlp
+
+    report = {
+        "time": round(time.time()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "yt_dlp": yt_dlp.version.__version__,
+        "cpus": os.cpu_count(),
+        "ffmpeg": shutil.which("ffmpeg") or find_ffmpeg(),
+        "results": {
+            name: run_isolated(name, argv)
+            for name in BENCHMARKS if name not in args.skip
+        },
+    }
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["compared_to"] = args.compare
+            report["changes"] = compare(json.load(f), report)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
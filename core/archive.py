@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+
+from core.paths import data_dir
+
+
+def default_archive_path():
+    return os.path.join(data_dir(), "archive.sqlite3")
+
+
+class DownloadArchive:
+    # SQLite index of finished downloads keyed by (extractor, video id,
+    # format). Entries whose file has disappeared are treated as missing.
+    def __init__(self, path=None):
+        self.path = path or default_archive_path()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS downloads ("
+                " extractor TEXT NOT NULL,"
+                " video_id TEXT NOT NULL,"
+                " format TEXT NOT NULL,"
+                " path TEXT,"
+                " size INTEGER,"
+                " completed_at REAL NOT NULL,"
+                " PRIMARY KEY (extractor, video_id, format))"
+            )
+
+    def contains(self, extractor, video_id, format_type):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT path FROM downloads"
+                " WHERE extractor = ? AND video_id = ? AND format = ?",
+                (extractor.lower(), video_id, format_type)
+            ).fetchone()
+
+        if row is None:
+            return False
+
+        if row["path"] and not os.path.exists(row["path"]):
+            self.remove(extractor, video_id, format_type)
+            return False
+
+        return True
+
+    def record(self, extractor, video_id, format_type, path=None, size=None):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO downloads"
+                " (extractor, video_id, format, path, size, completed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (extractor.lower(), video_id, format_type, path, size, time.time())
+            )
+
+    def remove(self, extractor, video_id, format_type):
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM downloads"
+                " WHERE extractor = ? AND video_id = ? AND format = ?",
+                (extractor.lower(), video_id, format_type)
+            )
+
+    def entries(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM downloads ORDER BY completed_at DESC"
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM downloads").fetchone()[0]
+
+    def verify(self):
+        # Drop entries whose file no longer exists, returns how many
+        missing = [
+            entry for entry in self.entries()
+            if entry["path"] and not os.path.exists(entry["path"])
+        ]
+        for entry in missing:
+            self.remove(entry["extractor"], entry["video_id"], entry["format"])
+        return len(missing)
+
+    def prune(self, older_than):
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM downloads WHERE completed_at < ?", (older_than,)
+            )
+        return cursor.rowcount
+
+    def clear(self):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM downloads")
+
+    def for_format(self, format_type):
+        return ArchiveView(self, [format_type])
+
+    def for_formats(self, formats, read_only=False):
+        return ArchiveView(self, formats, read_only)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class ArchiveView:
+    # Set-like view that yt-dlp accepts as its "download_archive". It is
+    # checked with "<extractor> <id>" strings before anything is fetched.
+    # With several formats a video counts once all of them are archived.
+    # A read-only view leaves recording to the caller.
+    def __init__(self, archive, formats, read_only=False):
+        self.archive = archive
+        self.formats = formats
+        self.read_only = read_only
+
+    def __bool__(self):
+        return True
+
+    def __contains__(self, archive_id):
+        extractor, _, video_id = archive_id.partition(" ")
+        return all(
+            self.archive.contains(extractor, video_id, format_type)
+            for format_type in self.formats
+        )
+
+    def add(self, archive_id):
+        # Normally ArchiveRecorder has stored the full entry already
+        if self.read_only:
+            return
+
+        extractor, _, video_id = archive_id.partition(" ")
+        for format_type in self.formats:
+            if not self.archive.contains(extractor, video_id, format_type):
+                self.archive.record(extractor, video_id, format_type)
@@ -0,0 +1,137 @@
+import threading
+import time
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BULK = "bulk"
+
+# Share of the total limit left to bulk jobs while an interactive
+# download is running
+DEFAULT_BULK_SHARE = 0.2
+
+# Longest single sleep, so cancellation is still noticed quickly
+MAX_SLEEP = 0.1
+
+
+class TokenBucket:
+    # rate in bytes per second, 0 means unlimited. Reservations may go
+    # into debt; the caller sleeps until the debt is paid back.
+    def __init__(self, rate=0, burst_seconds=0.5, clock=time.monotonic):
+        self.clock = clock
+        self.burst_seconds = burst_seconds
+        self.rate = 0
+        self._tokens = 0.0
+        self._stamp = clock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        self._refill()
+        self.rate = max(0, int(rate))
+        self._tokens = min(self._tokens, self.capacity)
+
+    @property
+    def capacity(self):
+        return self.rate * self.burst_seconds
+
+    def _refill(self):
+        now = self.clock()
+        if self.rate:
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._stamp) * self.rate
+            )
+        self._stamp = now
+
+    def reserve(self, amount):
+        # Returns how long the caller has to wait for this amount
+        if not self.rate:
+            return 0.0
+        self._refill()
+        self._tokens -= amount
+        return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+
+class JobThrottle:
+    def __init__(self, scheduler, priority):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.bucket = TokenBucket(scheduler.job_rate)
+        self._seen = {}
+
+    def set_priority(self, priority):
+        self.scheduler._set_priority(self, priority)
+
+    def consume_progress(self, key, d, cancelled=None):
+        # Turns the cumulative downloaded_bytes of a progress hook call
+        # into a delta and blocks the download thread until it fits
+        downloaded = d.get("downloaded_bytes") or 0
+        file_key = (key, d.get("filename"))
+        previous = self._seen.get(file_key, 0)
+        self._seen[file_key] = downloaded
+
+        if downloaded > previous:
+            self.scheduler.consume(self, downloaded - previous, cancelled)
+
+
+class BandwidthScheduler:
+    # Global byte-rate cap shared by all active downloads, optional
+    # per-job caps, and a bulk bucket that shrinks to bulk_share of
+    # the total while interactive jobs are active. Limits can change
+    # at any time and apply to the next chunk.
+    def __init__(self, total_rate=0, job_rate=0, bulk_share=DEFAULT_BULK_SHARE):
+        self.total_rate = total_rate
+        self.job_rate = job_rate
+        self.bulk_share = bulk_share
+        self._total = TokenBucket(total_rate)
+        self._bulk = TokenBucket(total_rate)
+        self._throttles = set()
+        self._lock = threading.Lock()
+
+    def register(self, priority=PRIORITY_INTERACTIVE):
+        throttle = JobThrottle(self, priority)
+        with self._lock:
+            self._throttles.add(throttle)
+            self._update_bulk_rate()
+        return throttle
+
+    def unregister(self, throttle):
+        with self._lock:
+            self._throttles.discard(throttle)
+            self._update_bulk_rate()
+
+    def set_limits(self, total_rate, job_rate):
+        with self._lock:
+            self.total_rate = total_rate
+            self.job_rate = job_rate
+            self._total.set_rate(total_rate)
+            for throttle in self._throttles:
+                throttle.bucket.set_rate(job_rate)
+            self._update_bulk_rate()
+
+    def _set_priority(self, throttle, priority):
+        with self._lock:
+            throttle.priority = priority
+            self._update_bulk_rate()
+
+    def _update_bulk_rate(self):
+        interactive = any(
+            t.priority == PRIORITY_INTERACTIVE for t in self._throttles
+        )
+        if interactive and self.total_rate:
+            self._bulk.set_rate(max(1, int(self.total_rate * self.bulk_share)))
+        else:
+            self._bulk.set_rate(self.total_rate)
+
+    def consume(self, throttle, amount, cancelled=None):
+        with self._lock:
+            delay = max(
+                self._total.reserve(amount),
+                throttle.bucket.reserve(amount),
+                self._bulk.reserve(amount) if throttle.priority == PRIORITY_BULK else 0.0,
+            )
+
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancelled is not None and cancelled()):
+                return
+            time.sleep(min(remaining, MAX_SLEEP))
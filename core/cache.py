@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from core.paths import data_dir
+
+
+DEFAULT_CACHE_TTL = 30 * 60
+DEFAULT_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    return os.path.join(data_dir(), "cache", "metadata")
+
+
+class MetadataCache:
+    # On-disk cache of extraction results (playlist listings and video
+    # info with formats), one JSON file per (URL, options) key. Reads
+    # touch the file's mtime, so eviction drops the least recently used
+    # entries first once the total size goes over max_bytes.
+    # The TTL stays short because format URLs are signed and expire.
+    def __init__(self, path=None, ttl=DEFAULT_CACHE_TTL,
+                 max_bytes=DEFAULT_CACHE_MAX_BYTES):
+        self.path = path or default_cache_dir()
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, url, options):
+        key = json.dumps([url, options], sort_keys=True, default=str)
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, digest + ".json")
+
+    def get(self, url, options=None):
+        path = self._file(url, options)
+
+        with self._lock:
+            try:
+                if time.time() - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+                    raise FileNotFoundError(path)
+
+                with open(path, encoding="utf-8") as f:
+                    info = json.load(f)
+                os.utime(path)
+
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return info
+
+    def put(self, url, options, info):
+        path = self._file(url, options)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with self._lock:
+            try:
+                with open(temp, "w", encoding="utf-8") as f:
+                    json.dump(info, f)
+                os.replace(temp, path)
+            except (OSError, TypeError, ValueError):
+                if os.path.exists(temp):
+                    os.remove(temp)
+                return
+
+            self._evict()
+
+    def _evict(self):
+        # Worker processes share the folder, so any file can disappear
+        # between the listing and its stat() or remove()
+        files = []
+        total = 0
+        now = time.time()
+
+        for entry in os.scandir(self.path):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                stat = entry.stat()
+                if now - stat.st_mtime > self.ttl:
+                    os.remove(entry.path)
+                    continue
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        files.sort()
+        while files and total > self.max_bytes:
+            _, size, path = files.pop(0)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            entries = 0
+            size = 0
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        size += entry.stat().st_size
+                    except OSError:
+                        continue
+                    entries += 1
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def clear(self):
+        with self._lock:
+            for entry in os.scandir(self.path):
+                if entry.name.endswith(".json"):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
@@ -0,0 +1,423 @@
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from core.archive import DownloadArchive
+from core.bandwidth import BandwidthScheduler
+from core.cache import MetadataCache, DEFAULT_CACHE_TTL
+from core.connections import ConnectionTuner, AUTO_CONNECTIONS, DEFAULT_SEGMENT_SIZE
+from core.disk import DiskSpace, DEFAULT_MIN_FREE
+from core.journal import JobJournal
+from core.media_cache import MediaCache, DEFAULT_MEDIA_CACHE_MAX_BYTES
+from core.metrics import Metrics, GAUGE_PENDING, GAUGE_RUNNING
+from core.transcode import EncodePool
+from core.session import SessionPool
+from core.throttling import HostLimiter, MAX_HOST_LIMIT
+from core.engine import (
+    DownloadTask, DEFAULT_PLAYLIST_WORKERS, DEFAULT_SYNC_STOP, FORMAT_MP3, FORMAT_MP4,
+    FORMAT_AUDIO, OUTPUT_THUMBNAIL, join_outputs
+)
+from core.progress import DEFAULT_PROGRESS_INTERVAL
+
+
+# Headless entry point. Nothing in here (or in core.engine) may import
+# PySide6, so it runs on machines without a display or Qt installed.
+
+FORMATS = {
+    "mp3": FORMAT_MP3,
+    "mp4": FORMAT_MP4,
+    "audio": FORMAT_AUDIO,
+    "thumbnail": OUTPUT_THUMBNAIL,
+}
+
+
+def parse_formats(value):
+    # "mp4,mp3" makes both from one download
+    names = [name.strip() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in FORMATS]
+    if unknown or not names:
+        raise argparse.ArgumentTypeError(
+            f"unknown format {', '.join(unknown) or value!r}, "
+            f"choose from {', '.join(sorted(FORMATS))}"
+        )
+    return join_outputs(FORMATS[name] for name in names)
+
+
+class JsonLinesReporter:
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self._lock = threading.Lock()
+
+    def emit(self, event, **fields):
+        line = json.dumps({"event": event, "time": round(time.time(), 3), **fields})
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def read_urls(args):
+    urls = list(args.urls)
+
+    sources = []
+    if args.input == "-":
+        sources.append(sys.stdin)
+    elif args.input:
+        sources.append(open(args.input, encoding="utf-8"))
+    elif not urls and not sys.stdin.isatty():
+        sources.append(sys.stdin)
+
+    for source in sources:
+        with source:
+            for line in source:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+
+    return urls
+
+
+def read_jobs(args, urls):
+    # (url, folder, format) of every job; --resume adds the unfinished
+    # ones of earlier runs, the others take theirs over by themselves
+    jobs = [(url, args.output, args.format) for url in urls]
+
+    if args.resume and args.journal_db is not None:
+        for record in args.journal_db.incomplete():
+            job = (record["url"], record["download_path"], record["format"])
+            if job not in jobs:
+                jobs.append(job)
+
+    return jobs
+
+
+def journal_job(args, job):
+    # All jobs are recorded up front, those that never started are
+    # resumed as well
+    if args.journal_db is None:
+        return None
+
+    return args.journal_db.add_job(*job, {
+        "playlist_workers": args.playlist_workers,
+        "sync_stop": args.sync_stop,
+    })
+
+
+def run_job(job_id, job, journal, args, reporter, tasks):
+    def on_progress(progress):
+        reporter.emit("progress", job=job_id, **dataclasses.asdict(progress))
+
+    url, output, format_type = job
+    task = DownloadTask(
+        url, output, format_type, args.playlist_workers,
+        progress_interval=args.progress_interval,
+        archive=args.archive_db,
+        cache=args.cache_db,
+        encode_pool=args.encode_pool,
+        sessions=args.sessions,
+        bandwidth=args.bandwidth,
+        metrics=args.metrics,
+        connections=args.connection_tuner,
+        sync_stop=args.sync_stop,
+        limiter=args.limiter,
+        media_cache=args.media_cache,
+        disk=args.disk,
+        journal=journal,
+        on_progress=on_progress,
+        on_status=lambda text: reporter.emit("status", job=job_id, status=text),
+        on_log=lambda message, level: reporter.emit(
+            "log", job=job_id, level=level, message=message
+        ),
+    )
+    tasks[job_id] = task
+
+    args.metrics.add_gauge(GAUGE_PENDING, -1)
+    args.metrics.add_gauge(GAUGE_RUNNING, 1)
+
+    started = time.monotonic()
+    reporter.emit("start", job=job_id, url=url)
+    try:
+        result = task.run()
+    finally:
+        args.metrics.add_gauge(GAUGE_RUNNING, -1)
+
+    # Interrupted jobs stay unfinished for --resume
+    if journal is not None and not task.interrupted:
+        journal.finish(result)
+
+    reporter.emit(
+        "result", job=job_id, url=url, status=result,
+        elapsed=round(time.monotonic() - started, 3),
+        timings={stage: round(seconds, 3) for stage, seconds in task.timings.items()},
+    )
+    return result
+
+
+def export_metrics(args, stop):
+    # Rewrites the metrics file until stop is set, then once more
+    while not stop.wait(args.metrics_interval):
+        args.metrics.write(args.metrics_file)
+    args.metrics.write(args.metrics_file)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py --headless",
+        description="Download URLs without the GUI and print JSON lines."
+    )
+    parser.add_argument("urls", nargs="*", help="URLs to download")
+    parser.add_argument(
+        "-i", "--input",
+        help="file with one URL per line, '-' for stdin"
+    )
+    parser.add_argument("-o", "--output", default=os.getcwd(), help="download folder")
+    parser.add_argument(
+        "-f", "--format", type=parse_formats, default="mp4",
+        help=f"one of {', '.join(sorted(FORMATS))}, or several separated by commas, "
+             "all made from one download"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=2,
+        help="number of URLs downloaded at the same time"
+    )
+    parser.add_argument(
+        "--playlist-workers", type=int, default=DEFAULT_PLAYLIST_WORKERS,
+        help="parallel entries per playlist"
+    )
+    parser.add_argument(
+        "--sync-stop", type=int, default=DEFAULT_SYNC_STOP, metavar="N",
+        help="stop listing a playlist after N entries in a row that are already "
+             "in the archive, 0 lists everything"
+    )
+    parser.add_argument(
+        "--host-limit", type=int, default=MAX_HOST_LIMIT, metavar="N",
+        help="most videos of one host at a time; lowered automatically while it throttles"
+    )
+    parser.add_argument(
+        "--progress-interval", type=float, default=DEFAULT_PROGRESS_INTERVAL,
+        help="minimum seconds between progress events per job"
+    )
+    parser.add_argument(
+        "--limit-rate", type=float, default=0, metavar="KBPS",
+        help="total download limit in KB/s shared by all jobs, 0 for none"
+    )
+    parser.add_argument(
+        "--job-limit-rate", type=float, default=0, metavar="KBPS",
+        help="download limit in KB/s for each job, 0 for none"
+    )
+    parser.add_argument(
+        "--connections", type=int, default=AUTO_CONNECTIONS,
+        help="parallel range requests per large file, 0 tunes it per host, 1 uses one"
+    )
+    parser.add_argument(
+        "--segment-size", type=float, default=DEFAULT_SEGMENT_SIZE / 1024 / 1024,
+        metavar="MB", help="size of each range request"
+    )
+    parser.add_argument(
+        "--staging-dir", metavar="PATH",
+        help="write partial files and merges to this fast local folder first and "
+             "move finished files to the output folder"
+    )
+    parser.add_argument(
+        "--min-free", type=float, default=DEFAULT_MIN_FREE / 1024 / 1024, metavar="MB",
+        help="disk space to leave free; videos that would not fit fail before downloading"
+    )
+    parser.add_argument(
+        "--metrics-file", metavar="PATH",
+        help="write stage timings and counters here, Prometheus text for .prom, else JSON"
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=10.0,
+        help="seconds between metrics file updates"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="also run the jobs an earlier run left unfinished"
+    )
+    parser.add_argument("--journal", help="job journal database path")
+    parser.add_argument(
+        "--no-journal", action="store_true",
+        help="do not record jobs, so they cannot be resumed"
+    )
+    parser.add_argument("--archive", help="download archive database path")
+    parser.add_argument(
+        "--no-archive", action="store_true",
+        help="download everything, even videos already in the archive"
+    )
+
+    parser.add_argument(
+        "--encoders", type=int, default=os.cpu_count(),
+        help="parallel MP3 encoders, 0 encodes inline after each download"
+    )
+    parser.add_argument(
+        "--no-session-pool", action="store_true",
+        help="build a fresh YoutubeDL for every URL"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="always extract metadata again"
+    )
+    parser.add_argument(
+        "--cache-ttl", type=float, default=DEFAULT_CACHE_TTL,
+        help="seconds a cached extraction result stays valid"
+    )
+    parser.add_argument(
+        "--media-cache-size", type=float,
+        default=DEFAULT_MEDIA_CACHE_MAX_BYTES / 1024 / 1024, metavar="MB",
+        help="disk space for downloads kept to make other formats without fetching again"
+    )
+    parser.add_argument(
+        "--no-media-cache", action="store_true",
+        help="neither keep downloads nor reuse kept ones"
+    )
+
+    archive = parser.add_argument_group("archive maintenance")
+    archive.add_argument(
+        "--archive-list", action="store_true", help="print archive entries and exit"
+    )
+    archive.add_argument(
+        "--archive-verify", action="store_true",
+        help="drop entries whose file is missing and exit"
+    )
+    archive.add_argument(
+        "--archive-prune", type=float, metavar="DAYS",
+        help="drop entries older than DAYS and exit"
+    )
+    return parser
+
+
+def run_archive_command(args, reporter):
+    archive = args.archive_db
+
+    if args.archive_prune is not None:
+        cutoff = time.time() - args.archive_prune * 86400
+        reporter.emit("archive_prune", removed=archive.prune(cutoff))
+
+    if args.archive_verify:
+        reporter.emit("archive_verify", removed=archive.verify())
+
+    if args.archive_list:
+        for entry in archive.entries():
+            reporter.emit("archive_entry", **entry)
+        reporter.emit("archive_summary", entries=archive.count())
+
+    return 0
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    reporter = JsonLinesReporter()
+
+    maintenance = args.archive_list or args.archive_verify \
+        or args.archive_prune is not None
+
+    args.archive_db = None
+    if not args.no_archive or maintenance:
+        args.archive_db = DownloadArchive(args.archive)
+
+    if maintenance:
+        return run_archive_command(args, reporter)
+
+    args.journal_db = None
+    if not args.no_journal:
+        args.journal_db = JobJournal(args.journal)
+        args.journal_db.prune()
+
+    # --resume reads the journal, nothing else is opened before this
+    jobs = read_jobs(args, read_urls(args))
+    if not jobs:
+        if args.journal_db is not None:
+            args.journal_db.close()
+        if args.archive_db is not None:
+            args.archive_db.close()
+        reporter.emit("error", message="No URLs given")
+        return 2
+
+    args.cache_db = None if args.no_cache else MetadataCache(ttl=args.cache_ttl)
+    args.media_cache = None if args.no_media_cache else MediaCache(
+        max_bytes=int(args.media_cache_size * 1024 * 1024)
+    )
+    args.encode_pool = EncodePool(args.encoders) if args.encoders > 0 else None
+    args.sessions = None if args.no_session_pool else SessionPool(
+        max_idle=max(1, args.jobs * args.playlist_workers)
+    )
+
+    args.bandwidth = None
+    if args.limit_rate > 0 or args.job_limit_rate > 0:
+        args.bandwidth = BandwidthScheduler(
+            int(args.limit_rate * 1024), int(args.job_limit_rate * 1024)
+        )
+
+    args.connection_tuner = ConnectionTuner(
+        args.connections, int(args.segment_size * 1024 * 1024)
+    )
+
+    args.limiter = HostLimiter(max(1, args.host_limit))
+    args.disk = DiskSpace(args.staging_dir, int(args.min_free * 1024 * 1024))
+
+    args.metrics = Metrics()
+    args.metrics.set_gauge(GAUGE_PENDING, len(jobs))
+    args.metrics.set_gauge(GAUGE_RUNNING, 0)
+
+    os.makedirs(args.output, exist_ok=True)
+
+    tasks = {}
+    results = []
+
+    stop_export = threading.Event()
+    exporter = None
+    if args.metrics_file:
+        exporter = threading.Thread(
+            target=export_metrics, args=(args, stop_export), daemon=True
+        )
+        exporter.start()
+
+    pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
+    try:
+        journals = [journal_job(args, job) for job in jobs]
+        futures = [
+            pool.submit(run_job, job_id, job, journal, args, reporter, tasks)
+            for job_id, (job, journal) in enumerate(zip(jobs, journals), start=1)
+        ]
+        for future in futures:
+            results.append(future.result())
+
+    except KeyboardInterrupt:
+        pool.shutdown(wait=False, cancel_futures=True)
+        for task in list(tasks.values()):
+            task.interrupt()
+        reporter.emit("cancelled", message="Interrupted, --resume continues")
+        return 130
+
+    finally:
+        pool.shutdown(wait=True)
+        # The exporter writes the final snapshot on its way out
+        stop_export.set()
+        if exporter is not None:
+            exporter.join()
+        if args.journal_db is not None:
+            args.journal_db.close()
+
+    # Videos skipped as already downloaded count as success, so a cron
+    # job rerunning the same list does not fail
+    completed = sum(1 for result in results if result == "Completed")
+    skipped = sum(1 for result in results if result == "Already downloaded")
+    summary = {"total": len(jobs), "completed": completed, "skipped": skipped}
+    snapshot = args.metrics.snapshot()
+    summary["stages"] = {
+        stage: values for stage, values in snapshot["stages"].items() if values["count"]
+    }
+    summary["counters"] = snapshot["counters"]
+    summary["hosts"] = args.limiter.stats()
+    if args.cache_db is not None:
+        summary["cache"] = args.cache_db.stats()
+    if args.media_cache is not None:
+        summary["media_cache"] = args.media_cache.stats()
+    if args.sessions is not None:
+        summary["sessions"] = args.sessions.stats()
+        args.sessions.close()
+    reporter.emit("summary", **summary)
+    return 0 if completed + skipped == len(jobs) else 1
@@ -0,0 +1,115 @@
+import threading
+import time
+
+
+# Connection count 0 means auto, 1 turns segmented transfers off
+AUTO_CONNECTIONS = 0
+MAX_CONNECTIONS = 16
+DEFAULT_SEGMENT_SIZE = 4 * 1024 * 1024
+
+# Files smaller than this many segments keep a single connection
+MIN_SEGMENTS = 2
+
+# Auto mode starts here for hosts it has not seen yet
+START_CONNECTIONS = 2
+
+# Each connection count is measured for at least this long (and at
+# least one segment per connection) and only kept if it is TUNE_GAIN
+# times faster than the best count so far
+TUNE_INTERVAL = 1.0
+TUNE_GAIN = 1.15
+
+
+class TransferTuning:
+    # Connection count of one transfer. In auto mode it doubles while
+    # the measured throughput keeps improving, then falls back to the
+    # best count and stays there.
+    def __init__(self, tuner, host, connections, probing):
+        self.tuner = tuner
+        self.host = host
+        self.connections = connections
+        self.probing = probing
+        self._best = (connections, 0.0)
+        self._window_start = tuner.clock()
+        self._window_bytes = 0
+        self._window_segments = 0
+
+    def segment_done(self, size):
+        if not self.probing:
+            return
+
+        self._window_bytes += size
+        self._window_segments += 1
+        elapsed = self.tuner.clock() - self._window_start
+        if elapsed < self.tuner.interval or self._window_segments < self.connections:
+            return
+
+        rate = self._window_bytes / elapsed
+        best_connections, best_rate = self._best
+        if rate >= best_rate * self.tuner.gain:
+            self._best = (self.connections, rate)
+            if self.connections >= self.tuner.max_connections:
+                self._settle()
+            else:
+                self.connections = min(self.tuner.max_connections, self.connections * 2)
+        else:
+            self.connections = best_connections
+            self._settle()
+
+        self._window_start = self.tuner.clock()
+        self._window_bytes = 0
+        self._window_segments = 0
+
+    def finish(self):
+        if self.probing:
+            self._settle()
+
+    def _settle(self):
+        self.probing = False
+        self.tuner.remember(self.host, self._best[0])
+
+
+class ConnectionTuner:
+    # Shared by all jobs: how many parallel range requests a large file
+    # gets and how big each range is. Auto mode remembers the best count
+    # per host, so the next file starts there. Limits can change at any
+    # time and apply to the next transfer.
+    def __init__(self, connections=AUTO_CONNECTIONS, segment_size=DEFAULT_SEGMENT_SIZE,
+                 max_connections=MAX_CONNECTIONS, interval=TUNE_INTERVAL,
+                 gain=TUNE_GAIN, clock=time.monotonic):
+        self.max_connections = max_connections
+        self.interval = interval
+        self.gain = gain
+        self.clock = clock
+        self.connections = AUTO_CONNECTIONS
+        self.segment_size = DEFAULT_SEGMENT_SIZE
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.set_limits(connections, segment_size)
+
+    @property
+    def enabled(self):
+        return self.connections != 1
+
+    def set_limits(self, connections, segment_size):
+        with self._lock:
+            self.connections = max(0, min(self.max_connections, int(connections)))
+            self.segment_size = max(64 * 1024, int(segment_size))
+
+    def start(self, host):
+        with self._lock:
+            if self.connections != AUTO_CONNECTIONS:
+                return TransferTuning(self, host, self.connections, probing=False)
+            connections = self._hosts.get(host, START_CONNECTIONS)
+
+        return TransferTuning(
+            self, host, connections, probing=connections < self.max_connections
+        )
+
+    def remember(self, host, connections):
+        with self._lock:
+            self._hosts[host] = connections
+
+    def stats(self):
+        with self._lock:
+            return dict(self._hosts)
@@ -0,0 +1,227 @@
+import ctypes
+import errno
+import hashlib
+import os
+import shutil
+import sys
+import threading
+import time
+
+from core.metrics import COUNTER_BYTES_WRITTEN, STAGE_FSYNC
+
+
+# Kept free on every drive on top of what running downloads reserve
+DEFAULT_MIN_FREE = 512 * 1024 * 1024
+
+# Block size of the copy out of the staging folder; network shares
+# write best in large sequential blocks
+WRITE_BUFFER = 8 * 1024 * 1024
+
+# fallocate() mode that allocates blocks without changing the file size
+FALLOC_FL_KEEP_SIZE = 1
+
+_fallocate = None
+_fallocate_loaded = False
+
+
+class DiskFull(Exception):
+    pass
+
+
+def existing_folder(path):
+    # The nearest folder of path that exists already
+    path = os.path.abspath(path)
+    while not os.path.isdir(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            break
+        path = parent
+    return path
+
+
+def estimate_size(info):
+    # Bytes the selected formats will take, from their size or bitrate;
+    # None when a format has neither
+    duration = info.get("duration")
+    total = 0
+    for fmt in info.get("requested_formats") or [info]:
+        size = fmt.get("filesize") or fmt.get("filesize_approx")
+        if not size and fmt.get("tbr") and duration:
+            size = fmt["tbr"] * 1000 / 8 * duration
+        if not size:
+            return None
+        total += size
+    return int(total)
+
+
+def format_bytes(value):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+def _load_fallocate():
+    global _fallocate, _fallocate_loaded
+    if _fallocate_loaded:
+        return _fallocate
+    _fallocate_loaded = True
+
+    if sys.platform.startswith("linux"):
+        try:
+            func = ctypes.CDLL(None, use_errno=True).fallocate64
+        except (OSError, AttributeError):
+            return None
+        func.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int64, ctypes.c_int64]
+        func.restype = ctypes.c_int
+        _fallocate = func
+    return _fallocate
+
+
+def preallocate(f, size, keep_size=True):
+    # Reserves the blocks of a file about to be written sequentially, so
+    # the filesystem can keep it in one piece. keep_size leaves the file
+    # size alone, for .part files that must only hold what was
+    # downloaded. Returns False where the platform or filesystem (most
+    # network shares, FAT) cannot do it.
+    if size <= 0:
+        return False
+
+    f.flush()
+    fallocate = _load_fallocate()
+    if fallocate is not None:
+        mode = FALLOC_FL_KEEP_SIZE if keep_size else 0
+        return fallocate(f.fileno(), mode, 0, size) == 0
+
+    # NTFS allocates on SetEndOfFile
+    if sys.platform == "win32" and not keep_size:
+        try:
+            f.truncate(size)
+            return True
+        except OSError:
+            return False
+    return False
+
+
+def move_file(source, target, metrics=None, buffer_size=WRITE_BUFFER):
+    # Same drive: a rename. Otherwise the file is copied in large blocks
+    # to a temporary name next to target, synced and renamed, so the
+    # final name only ever holds a complete file. Returns the bytes
+    # written to target's drive.
+    try:
+        os.replace(source, target)
+        return 0
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    temp = target + ".moving"
+    written = 0
+    try:
+        with open(source, "rb") as src, open(temp, "wb", buffering=buffer_size) as dst:
+            preallocate(dst, os.fstat(src.fileno()).st_size, keep_size=False)
+            while True:
+                chunk = src.read(buffer_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                written += len(chunk)
+
+            dst.flush()
+            started = time.perf_counter()
+            os.fsync(dst.fileno())
+            if metrics is not None:
+                metrics.observe(STAGE_FSYNC, time.perf_counter() - started)
+
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+    os.remove(source)
+    if metrics is not None:
+        metrics.inc(COUNTER_BYTES_WRITTEN, written)
+    return written
+
+
+class Reservation:
+    # Space one download holds on one drive. The download's own bytes
+    # use up the free space as they are written, so only the rest
+    # counts against other downloads.
+    def __init__(self, device, size):
+        self.device = device
+        self.size = size
+        self._written = {}
+
+    def update(self, filename, downloaded):
+        self._written[filename] = downloaded
+
+    @property
+    def remaining(self):
+        return max(0, self.size - sum(self._written.values()))
+
+
+class DiskSpace:
+    # Shared by all jobs: admits a download only if its estimated size
+    # fits on every drive it will be written to, next to what running
+    # downloads still need and min_free. Also knows the staging folder,
+    # a fast local drive that downloads, fragments and merges use
+    # before the result is moved to the download folder.
+    def __init__(self, staging=None, min_free=DEFAULT_MIN_FREE, usage=shutil.disk_usage):
+        self.staging = staging or None
+        self.min_free = min_free
+        self.usage = usage
+        self._reservations = {}
+        self._lock = threading.Lock()
+
+    def set_staging(self, path):
+        self.staging = path or None
+
+    def staging_for(self, download_path):
+        # One folder per download folder, so equal names in different
+        # folders do not meet, and a resumed job finds its partial files
+        if self.staging is None:
+            return None
+        digest = hashlib.sha1(os.path.abspath(download_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.staging, digest[:12])
+
+    def reserve(self, folders, size):
+        # Reserves size on the drive of every folder, all or none. The
+        # first reservation belongs to folders[0]. Raises DiskFull.
+        drives = []
+        for folder in folders:
+            folder = existing_folder(folder)
+            device = os.stat(folder).st_dev
+            if device not in [d for _, d in drives]:
+                drives.append((folder, device))
+
+        with self._lock:
+            for folder, device in drives:
+                try:
+                    free = self.usage(folder).free
+                except OSError:
+                    continue
+
+                held = sum(r.remaining for r in self._reservations.get(device, []))
+                available = free - held - self.min_free
+                if size > available:
+                    raise DiskFull(
+                        f"Not enough disk space in {folder}: needs about "
+                        f"{format_bytes(size)}, {format_bytes(max(0, available))} available"
+                    )
+
+            reservations = []
+            for _, device in drives:
+                reservation = Reservation(device, size)
+                self._reservations.setdefault(device, []).append(reservation)
+                reservations.append(reservation)
+            return reservations
+
+    def release(self, reservations):
+        with self._lock:
+            for reservation in reservations:
+                held = self._reservations.get(reservation.device, [])
+                if reservation in held:
+                    held.remove(reservation)
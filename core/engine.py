@@ -0,0 +1,1061 @@
+import glob
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+from core.bandwidth import PRIORITY_INTERACTIVE, PRIORITY_BULK
+from core.disk import DiskFull, estimate_size, move_file
+from core.formats import AudioFormatSelector
+from core.logs import LOG_INFO, LOG_WARNING, LOG_ERROR
+from core.metrics import (
+    Metrics, POSTPROCESSOR_STAGES, STAGE_EXTRACT, STAGE_FORMAT_SELECTION,
+    STAGE_TRANSFER, STAGE_POSTPROCESS, STAGE_ENCODE,
+    COUNTER_BYTES, COUNTER_RETRIES, COUNTER_ERRORS, COUNTER_THROTTLED,
+    COUNTER_BACKOFFS, GAUGE_ENCODES
+)
+from core.paths import resource_path
+from core.progress import (
+    ProgressAggregator, DEFAULT_PROGRESS_INTERVAL,
+    STAGE_EXTRACTING, STAGE_POSTPROCESSING, STAGE_ENCODING, STAGE_FINISHED
+)
+from core.throttling import (
+    ErrorLog, MAX_ATTEMPTS, RETRY_SLEEP_MAX, OUTCOME_OK, OUTCOME_THROTTLED,
+    OUTCOME_ERROR, backoff_delay, classify, host_of
+)
+from core.transcode import (
+    EncodeCancelled, EncodePool, DEFAULT_MP3_QUALITY, find_ffmpeg, mp3_options
+)
+
+
+DEFAULT_PLAYLIST_WORKERS = 3
+MAX_PLAYLIST_WORKERS = 16
+
+# Re-syncs stop listing a playlist after this many entries in a row that
+# are already in the archive; 0 always lists everything
+DEFAULT_SYNC_STOP = 0
+
+# URL results followed before a listing is used as it is
+MAX_REDIRECTS = 5
+
+FORMAT_MP3 = "MP3 (Audio Only)"
+FORMAT_MP4 = "MP4 (Video)"
+FORMAT_AUDIO = "Audio (Original)"
+OUTPUT_THUMBNAIL = "Thumbnail"
+
+# A job with several outputs carries them in one format string, e.g.
+# "MP4 (Video) + MP3 (Audio Only)"; they are all made from one download
+OUTPUT_SEPARATOR = " + "
+
+# Extension for audio copied out of a video as it is, by codec
+AUDIO_CODEC_EXTENSIONS = {
+    "mp4a": "m4a",
+    "aac": "m4a",
+    "mp3": "mp3",
+    "opus": "opus",
+    "vorbis": "ogg",
+    "flac": "flac",
+}
+
+# Thumbnails are taken this far into the video
+THUMBNAIL_POSITION = 0.1
+
+# Audio jobs rank the available streams instead of taking
+# "bestaudio/best": MP3 prefers a stream that already is MP3 at the
+# target bitrate, Original keeps the codec of the best ranked stream
+AUDIO_SELECTORS = {
+    FORMAT_MP3: AudioFormatSelector("mp3", int(DEFAULT_MP3_QUALITY)),
+    FORMAT_AUDIO: AudioFormatSelector(None, int(DEFAULT_MP3_QUALITY)),
+}
+
+EXTRACTOR_ARGS = {
+    "youtube": {
+        "player_client": ["android"]
+    }
+}
+
+
+# yt-dlp takes a few hundred milliseconds to import, so it is only
+# imported where it is used. warm_up() pays that cost ahead of time.
+
+
+def warm_up():
+    # Loads yt-dlp and the extractor list so the first job starts at
+    # full speed; safe to call from any thread
+    import yt_dlp
+    import core.postprocessors
+
+    extractors = list(yt_dlp.extractor.gen_extractor_classes())
+    return len(extractors)
+
+
+def split_outputs(format_type):
+    return format_type.split(OUTPUT_SEPARATOR)
+
+
+def join_outputs(outputs):
+    return OUTPUT_SEPARATOR.join(dict.fromkeys(outputs))
+
+
+def is_playlist(info):
+    return bool(info) and info.get("_type") == "playlist"
+
+
+def download_failed(ydl):
+    # With ignoreerrors, yt-dlp only reports failures through the
+    # return code that download() would have returned
+    return bool(ydl._download_retcode)
+
+
+class DownloadTask:
+    # Runs one job (single video or playlist) on the calling thread and
+    # reports through plain callbacks, so it works with or without Qt.
+    # on_progress receives core.progress.Progress snapshots and on_log
+    # receives (message, level) with a level from core.logs.
+    def __init__(self, url, download_path, format_type,
+                 playlist_workers=DEFAULT_PLAYLIST_WORKERS,
+                 on_progress=None, on_status=None, on_log=None,
+                 progress_interval=DEFAULT_PROGRESS_INTERVAL, archive=None,
+                 cache=None, encode_pool=None, sessions=None, bandwidth=None,
+                 metrics=None, connections=None, sync_stop=DEFAULT_SYNC_STOP,
+                 limiter=None, journal=None, media_cache=None, disk=None):
+        self.url = url
+        self.download_path = download_path
+        self.format_type = format_type
+        self.outputs = split_outputs(format_type)
+        # Several outputs (or a thumbnail) are made from one download
+        self.derived = len(self.outputs) > 1 or OUTPUT_THUMBNAIL in self.outputs
+        self.media_cache = media_cache
+        # A core.disk.DiskSpace; reservations are held per entry
+        self.disk = disk
+        self._reservations = {}
+        self.playlist_workers = max(1, min(MAX_PLAYLIST_WORKERS, playlist_workers))
+        self._cancel_requested = False
+        self.result = None
+        self.progress_interval = progress_interval
+        self.tracker = None
+        self.archive = archive
+        self.cache = cache
+        self.encode_pool = encode_pool
+        self.sessions = sessions
+        self.bandwidth = bandwidth
+        self.throttle = None
+        self.connections = connections
+        self.sync_stop = max(0, sync_stop)
+        self.limiter = limiter
+        # A core.journal.JournalJob; entries are recorded by their URL
+        self.journal = journal
+        self.interrupted = False
+        self._entry_urls = {}
+        self._encodes = {}
+        self._encode_failures = 0
+        self._encode_lock = threading.Lock()
+        self._encode_idle = threading.Condition(self._encode_lock)
+        self._encode_callbacks = 0
+        self._partials = set()
+
+        # Stage timings of this job; the shared registry gets them too
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.timings = {}
+        self._marks = {}
+        self._timings_lock = threading.Lock()
+
+        self.on_progress = on_progress or (lambda value: None)
+        self.on_status = on_status or (lambda text: None)
+        self.on_log = on_log or (lambda message, level: None)
+
+    def build_options(self, key, output_template, logger=None):
+        ffmpeg_dir = resource_path("assets/ffmpeg")
+        ffmpeg_exe = os.path.join(ffmpeg_dir, "ffmpeg.exe")
+        ffprobe_exe = os.path.join(ffmpeg_dir, "ffprobe.exe")
+
+        ffmpeg_path = (
+            ffmpeg_dir
+            if os.path.exists(ffmpeg_exe) and os.path.exists(ffprobe_exe)
+            else None
+        )
+
+        ydl_opts = {
+            "format": self.source_format(),
+            "progress_hooks": [lambda d: self._progress_hook(key, d)],
+            "postprocessor_hooks": [lambda d: self._postprocessor_hook(key, d)],
+            "match_filter": lambda info, incomplete=False: self._match_filter(
+                info, incomplete, key
+            ),
+            "retry_sleep_functions": self.retry_sleep_functions(),
+            "outtmpl": output_template,
+            "paths": self.output_paths(),
+            "continuedl": True,
+            "quiet": True,
+            "noprogress": True,
+            "noplaylist": False,
+            "ignoreerrors": True,
+            "extractor_args": EXTRACTOR_ARGS,
+            "no_warnings": True,
+        }
+
+        if ffmpeg_path:
+            ydl_opts["ffmpeg_location"] = ffmpeg_path
+
+        if logger is not None:
+            ydl_opts["logger"] = logger
+
+        if self.format_type == FORMAT_MP3 and not self.pipelined():
+            ydl_opts["postprocessors"] = [{
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "mp3",
+                "preferredquality": DEFAULT_MP3_QUALITY,
+            }]
+
+        # Copies the audio out of other containers; files that already
+        # are in a common audio format never reach ffmpeg
+        if self.format_type == FORMAT_AUDIO and find_ffmpeg():
+            ydl_opts["postprocessors"] = [{
+                "key": "FFmpegExtractAudio",
+                "preferredcodec": "best",
+            }]
+
+        if self.archive is not None:
+            # Outputs made after the download are recorded once written;
+            # yt-dlp's own record would come before a pipelined encode
+            ydl_opts["download_archive"] = self.archive.for_formats(
+                self.outputs, read_only=self.derived or self.pipelined()
+            )
+
+        return ydl_opts
+
+    def output_paths(self):
+        # Output templates are relative to the download folder; with a
+        # staging folder yt-dlp writes partial files, fragments and
+        # merges there and the result is moved over by StagedMove
+        paths = {"home": self.download_path}
+        staging = self.disk.staging_for(self.download_path) if self.disk is not None else None
+        if staging is not None:
+            paths["temp"] = staging
+        return paths
+
+    def source_format(self):
+        if not self.derived:
+            return AUDIO_SELECTORS.get(self.format_type, "best")
+
+        # A video source serves every output, audio only ones get the
+        # best ranked audio stream
+        if FORMAT_MP4 in self.outputs or OUTPUT_THUMBNAIL in self.outputs:
+            return "best"
+        return AUDIO_SELECTORS[FORMAT_AUDIO]
+
+    def open_ydl(self, key, output_template, logger=None):
+        from core.postprocessors import (
+            ArchiveRecorder, DeriveOutputs, DiskAdmission, EncodeHandoff,
+            MediaCacheLookup, SegmentedTransfer, StagedMove
+        )
+
+        postprocessors = []
+        if self.media_cache is not None:
+            postprocessors.append(
+                (MediaCacheLookup(self.media_cache, self._on_media_cache_hit), "before_dl")
+            )
+        if self.disk is not None:
+            postprocessors.append(
+                (DiskAdmission(lambda info: self._admit(key, info)), "before_dl")
+            )
+            if self.disk.staging_for(self.download_path) is not None:
+                postprocessors.append((StagedMove(self._move_staged), "post_process"))
+        if self.connections is not None and self.connections.enabled:
+            postprocessors.append((SegmentedTransfer(self.connections), "before_dl"))
+        if self.derived:
+            postprocessors.append(
+                (DeriveOutputs(lambda info: self._derive_outputs(key, info)), "after_move")
+            )
+        else:
+            if self.format_type == FORMAT_MP3 and self.pipelined():
+                postprocessors.append((
+                    EncodeHandoff(lambda *args: self._submit_encode(key, *args)),
+                    "after_move"
+                ))
+            if self.archive is not None:
+                postprocessors.append(
+                    (ArchiveRecorder(self.archive, self.format_type), "after_move")
+                )
+
+        return self.session(self.build_options(key, output_template, logger), postprocessors)
+
+    @contextmanager
+    def session(self, ydl_opts, postprocessors=()):
+        # Pooled sessions keep extractors and connections between jobs
+        if self.sessions is not None:
+            with self.sessions.session(ydl_opts, postprocessors) as ydl:
+                yield ydl
+            return
+
+        import yt_dlp
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            for pp, when in postprocessors:
+                ydl.add_post_processor(pp, when=when)
+            yield ydl
+
+    # =====================================================
+    # DISK
+    # =====================================================
+    def _admit(self, key, info):
+        # Reserves the estimated size on the staging and download
+        # drives; videos without an estimate are let through
+        if info.get("_media_cache_blob") or os.path.exists(info["_filename"]):
+            return
+
+        size = estimate_size(info)
+        if not size:
+            return
+
+        folders = [os.path.dirname(os.path.abspath(info["_filename"]))]
+        staging = self.disk.staging_for(self.download_path)
+        if staging is not None:
+            folders.insert(0, staging)
+
+        self._release_disk(key)
+        self._reservations[key] = self.disk.reserve(folders, size)
+
+    def _release_disk(self, key):
+        reservations = self._reservations.pop(key, None)
+        if reservations:
+            self.disk.release(reservations)
+
+    def _move_staged(self, source, target):
+        move_file(source, target, self.metrics)
+
+    # =====================================================
+    # ENCODE PIPELINE
+    # =====================================================
+    def pipelined(self):
+        return self.encode_pool is not None and self.encode_pool.available
+
+    def _submit_encode(self, key, info, source, target):
+        # Blocks while the encode queue is full, unless cancelled
+        try:
+            future = self.encode_pool.submit(
+                source, target, cancelled=lambda: self._cancel_requested,
+                interrupted=lambda: self.interrupted
+            )
+        except EncodeCancelled:
+            from yt_dlp.utils import DownloadCancelled
+            if not self.interrupted:
+                os.remove(source)
+            raise DownloadCancelled()
+
+        self._track_encode(key, future, info, target, FORMAT_MP3, source)
+
+    def _track_encode(self, key, future, info, target, format_type, source=None,
+                      on_done=None):
+        # source is removed if the encode is cancelled before it starts.
+        # yt-dlp rewrites the info dict once the postprocessors returned,
+        # so the archive ids are kept aside.
+        info = {
+            "extractor_key": info.get("extractor_key") or info.get("ie_key"),
+            "id": info.get("id"),
+        }
+        self.tracker.encode_queued()
+        self.metrics.add_gauge(GAUGE_ENCODES, 1)
+        started = time.perf_counter()
+        with self._encode_lock:
+            self._encodes[future] = source
+            self._encode_callbacks += 1
+        entry = self._entry_urls.get(key)
+        future.add_done_callback(
+            lambda f: self._encode_done(f, entry, info, target, format_type, started, on_done)
+        )
+
+    def _encode_done(self, future, entry, info, target, format_type, started, on_done=None):
+        try:
+            self._handle_encode(future, entry, info, target, format_type, started)
+        finally:
+            if on_done is not None:
+                on_done()
+            with self._encode_idle:
+                self._encode_callbacks -= 1
+                self._encode_idle.notify_all()
+
+    def _handle_encode(self, future, entry, info, target, format_type, started):
+        self.metrics.add_gauge(GAUGE_ENCODES, -1)
+        if future.cancelled() or isinstance(future.exception(), EncodeCancelled):
+            # The download is kept, a resumed job encodes it again
+            if self.interrupted and self.journal is not None and entry is not None:
+                self.journal.entry_finished(entry, False)
+            return
+
+        # Includes the time spent waiting for a free encoder
+        self._record(STAGE_ENCODE, time.perf_counter() - started)
+
+        error = future.exception()
+        if error is not None:
+            with self._encode_lock:
+                self._encode_failures += 1
+            self.metrics.inc(COUNTER_ERRORS)
+            self._log(f"Encoding failed: {os.path.basename(target)}: {error}", LOG_ERROR)
+        else:
+            self._log(f"Encoded: {os.path.basename(target)}")
+            self._record_archive(info, format_type, target)
+
+        self.tracker.encode_finished()
+
+    def _record_archive(self, info, format_type, path):
+        extractor = info.get("extractor_key") or info.get("ie_key")
+        if self.archive is not None and extractor and info.get("id"):
+            self.archive.record(
+                extractor, info["id"], format_type, path, os.path.getsize(path)
+            )
+
+    def wait_for_encodes(self):
+        with self._encode_lock:
+            pending = dict(self._encodes)
+
+        # Running encodes stop by themselves, queued ones never started
+        # and leave their source behind, which an interrupted job keeps
+        if self._cancel_requested:
+            for future, source in pending.items():
+                if future.cancel() and source and os.path.exists(source) \
+                        and not self.interrupted:
+                    os.remove(source)
+
+        if any(not future.done() for future in pending):
+            self.tracker.set_stage(STAGE_ENCODING)
+        wait(pending)
+
+        # Futures count as done before their callbacks have run, and
+        # those still report through this job
+        with self._encode_idle:
+            self._encode_idle.wait_for(lambda: self._encode_callbacks == 0)
+
+        return self._encode_failures
+
+    # =====================================================
+    # MULTIPLE OUTPUTS
+    # =====================================================
+    def derive_plan(self, info, source):
+        # (output, target, ffmpeg input options, output options) of every
+        # output; a target equal to the source needs no work
+        base = os.path.splitext(source)[0]
+        plan = []
+
+        for output in self.outputs:
+            if output == FORMAT_MP4:
+                plan.append((output, source, (), ()))
+            elif output == FORMAT_MP3:
+                plan.append((output, base + ".mp3", (), mp3_options()))
+            elif output == FORMAT_AUDIO:
+                codec = (info.get("acodec") or "").split(".")[0]
+                ext = AUDIO_CODEC_EXTENSIONS.get(codec, "mka")
+                plan.append((output, f"{base}.{ext}", (), ["-vn", "-codec:a", "copy"]))
+            elif output == OUTPUT_THUMBNAIL:
+                position = (info.get("duration") or 0) * THUMBNAIL_POSITION
+                plan.append((
+                    output, base + ".jpg", ["-ss", f"{position:.2f}"],
+                    ["-an", "-frames:v", "1", "-q:v", "2"]
+                ))
+
+        return plan
+
+    def _derive_outputs(self, key, info):
+        # Runs once the download is in place. The outputs are written
+        # from it in parallel on the encode pool while the media cache
+        # takes a copy; the source goes once nothing needs it anymore,
+        # unless it is an output itself.
+        from yt_dlp.utils import DownloadCancelled
+
+        source = info["filepath"]
+        plan = self.derive_plan(info, source)
+        steps = [step for step in plan if step[1] != source]
+        keep = len(steps) < len(plan)
+
+        for output, target, _, _ in plan:
+            if target == source:
+                self._record_archive(info, output, source)
+
+        # An inline pool without --encoders, so the outputs still run
+        # side by side
+        pool = self.encode_pool if self.pipelined() else EncodePool(max(1, len(steps)))
+
+        users = [len(steps) + 1]
+        users_lock = threading.Lock()
+
+        def release(count=1):
+            with users_lock:
+                users[0] -= count
+                unused = users[0] == 0
+            if unused and not keep and not self.interrupted and os.path.exists(source):
+                os.remove(source)
+
+        try:
+            for submitted, (output, target, input_options, options) in enumerate(steps):
+                if not pool.available:
+                    release(len(steps) - submitted)
+                    with self._encode_lock:
+                        self._encode_failures += len(steps) - submitted
+                    self._log("FFmpeg is needed for: " + ", ".join(
+                        step[0] for step in steps[submitted:]
+                    ), LOG_ERROR)
+                    break
+
+                try:
+                    future = pool.derive(
+                        source, target, options, input_options,
+                        cancelled=lambda: self._cancel_requested
+                    )
+                except EncodeCancelled:
+                    release(len(steps) - submitted)
+                    raise DownloadCancelled()
+
+                self._track_encode(key, future, info, target, output, on_done=release)
+
+            extractor = info.get("extractor_key") or info.get("ie_key")
+            if self.media_cache is not None and not info.get("_media_cache_blob") \
+                    and extractor and info.get("format_id"):
+                self.media_cache.put(
+                    extractor, info["id"], info["format_id"], source, link=not keep
+                )
+
+        finally:
+            release()
+            if pool is not self.encode_pool:
+                pool.shutdown(wait=True)
+
+    def _on_media_cache_hit(self, info):
+        self._log(f"Reusing cached download: {info.get('title') or info['id']}")
+
+    # =====================================================
+    # HOOKS
+    # =====================================================
+    def _progress_hook(self, key, d):
+        if self._cancel_requested:
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled()
+
+        if d.get("tmpfilename"):
+            if d["status"] == "downloading":
+                if d["tmpfilename"] not in self._partials:
+                    self._partials.add(d["tmpfilename"])
+                    if self.journal is not None:
+                        self.journal.entry_partial(self._entry_urls.get(key), d["tmpfilename"])
+            else:
+                self._partials.discard(d["tmpfilename"])
+
+        self.tracker.hook(key, d)
+
+        reservations = self._reservations.get(key)
+        if reservations and d["status"] == "downloading":
+            reservations[0].update(d.get("filename"), d.get("downloaded_bytes") or 0)
+
+        # Sleeping here holds back the next read of this transfer
+        if self.throttle is not None and d["status"] == "downloading":
+            self.throttle.consume_progress(key, d, lambda: self._cancel_requested)
+
+        if d["status"] == "finished":
+            # Transfers of one entry run back to back (video, then audio)
+            self._record_since((STAGE_TRANSFER, key), STAGE_TRANSFER, restart=True)
+            self.metrics.inc(
+                COUNTER_BYTES, d.get("total_bytes") or d.get("downloaded_bytes") or 0
+            )
+
+            filename = os.path.basename(d.get("filename", ""))
+            if filename:
+                self._log(f"Finished: {filename}")
+
+    def _postprocessor_hook(self, key, d):
+        name = d.get("postprocessor")
+
+        if d["status"] == "started":
+            if self._cancel_requested:
+                from yt_dlp.utils import DownloadCancelled
+                raise DownloadCancelled()
+            self._mark((name, key))
+            self.tracker.set_stage(STAGE_POSTPROCESSING)
+
+        elif d["status"] == "finished":
+            stage = POSTPROCESSOR_STAGES.get(name, STAGE_POSTPROCESS)
+            self._record_since((name, key), stage)
+
+    def _match_filter(self, info, incomplete=False, key=None):
+        # yt-dlp asks before every playlist entry and before format
+        # selection, so a cancel also stops enumeration and extraction.
+        # A DownloadCancelled with a message aborts instead of skipping.
+        if self._cancel_requested:
+            from yt_dlp.utils import DownloadCancelled
+            raise DownloadCancelled("Cancelled")
+
+        # For a video it is called right before format selection
+        # (incomplete) and again once the formats are chosen
+        if key is not None:
+            if incomplete:
+                self._mark((STAGE_FORMAT_SELECTION, key))
+            else:
+                self._record_since((STAGE_FORMAT_SELECTION, key), STAGE_FORMAT_SELECTION)
+                self._mark((STAGE_TRANSFER, key))
+        return None
+
+    def retry_sleep_functions(self):
+        # yt-dlp calls these before every retry and sleeps for the
+        # result, a short jittered backoff since a cancel cannot end it
+        def on_retry(n):
+            self.metrics.inc(COUNTER_RETRIES)
+            return backoff_delay(n + 1, cap=RETRY_SLEEP_MAX)
+
+        return {"http": on_retry, "fragment": on_retry, "extractor": on_retry}
+
+    # =====================================================
+    # METRICS
+    # =====================================================
+    def _record(self, stage, seconds):
+        self.metrics.observe(stage, seconds)
+        with self._timings_lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def _mark(self, name):
+        self._marks[name] = time.perf_counter()
+
+    def _record_since(self, name, stage, restart=False):
+        started = self._marks.pop(name, None)
+        if started is None:
+            return
+
+        now = time.perf_counter()
+        self._record(stage, now - started)
+        if restart:
+            self._marks[name] = now
+
+    @contextmanager
+    def timed(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._record(stage, time.perf_counter() - start)
+
+    def remove_partials(self):
+        # Leftovers of interrupted transfers: the .part file, its resume
+        # state and any fragments
+        for partial in list(self._partials):
+            # Fragment downloads keep their state next to the final name
+            base = partial[:-len(".part")] if partial.endswith(".part") else partial
+            paths = [partial, base + ".ytdl"]
+            paths += glob.glob(glob.escape(partial) + "-Frag*")
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    self._log(f"Could not remove {path}: {e}", LOG_WARNING)
+        self._partials.clear()
+
+    def run(self):
+        from yt_dlp.utils import DownloadCancelled
+
+        self.tracker = ProgressAggregator(self.on_progress, interval=self.progress_interval)
+        self.tracker.set_stage(STAGE_EXTRACTING)
+
+        # Single videos count as interactive until a playlist shows up
+        if self.bandwidth is not None:
+            self.throttle = self.bandwidth.register(PRIORITY_INTERACTIVE)
+
+        # Relative to the download folder, see output_paths
+        output_template = "%(playlist_title,UnknownPlaylist)s/%(title)s.%(ext)s"
+
+        try:
+            self._set_status("Downloading...")
+            self._log("Download started")
+
+            if self.is_archived():
+                self.tracker.set_stage(STAGE_FINISHED)
+                self._set_status("Already downloaded")
+                self._log("Skipped, already in the download archive")
+                return self.result
+
+            if self.journal is not None and self.url in self.journal.done:
+                self.tracker.set_stage(STAGE_FINISHED)
+                self._set_status("Completed")
+                self._log("Skipped, finished in an earlier run")
+                return self.result
+
+            # yt-dlp continues .part files by itself, as long as the
+            # folder and format are the same as before
+            partials = [
+                path for path in (self.journal.partials if self.journal is not None else [])
+                if os.path.exists(path)
+            ]
+            if partials:
+                self._log(f"Resuming {len(partials)} partial downloads of an earlier run")
+
+            # The listing session stays open while a playlist downloads,
+            # later pages are only fetched as the entries are reached
+            with self.session(self.listing_options()) as listing:
+                info, cached = self.extract_listing(listing)
+                if self._cancel_requested:
+                    raise DownloadCancelled()
+
+                if is_playlist(info):
+                    failed = self.download_playlist(listing, info, cached)
+                else:
+                    failed = 0
+                    if not info:
+                        raise Exception(f"Unable to extract {self.url}")
+
+                    error = self.download_video(0, self.url, output_template, info)
+                    if error is not None:
+                        raise Exception(error or f"Unable to download {self.url}")
+                    self.tracker.entry_done(0)
+
+            failed += self.wait_for_encodes()
+
+            if self._cancel_requested:
+                raise DownloadCancelled()
+
+            self.tracker.set_stage(STAGE_FINISHED)
+
+            if failed:
+                self._set_status(f"Completed with {failed} errors")
+                self._log(f"All downloads completed, {failed} entries failed", LOG_WARNING)
+            else:
+                self._set_status("Completed")
+                self._log("All downloads completed")
+
+        except DownloadCancelled:
+            self._set_status("Cancelled")
+            self._log("Download cancelled by user", LOG_WARNING)
+
+        except Exception as e:
+            self._set_status("Error")
+            self._log(f"Error: {str(e)}", LOG_ERROR)
+            self.metrics.inc(COUNTER_ERRORS)
+
+        finally:
+            # Never leave encodes of this job behind in the shared pool
+            self.wait_for_encodes()
+
+            if self._cancel_requested and not self.interrupted:
+                self.remove_partials()
+
+            if self.throttle is not None:
+                self.bandwidth.unregister(self.throttle)
+                self.throttle = None
+
+            if self.journal is not None:
+                self.journal.flush()
+
+            self.metrics.finish_job(self.url, self.result, self.timings)
+
+        return self.result
+
+    def _log(self, message, level=LOG_INFO):
+        self.on_log(message, level)
+
+    def _set_status(self, text):
+        self.result = text
+        self.on_status(text)
+
+    # =====================================================
+    # ARCHIVE
+    # =====================================================
+    def is_archived(self):
+        # Resolve the video id from the URL alone, like yt-dlp does
+        # before extracting, so known videos cost no network request
+        if self.archive is None:
+            return False
+
+        import yt_dlp
+
+        for ie in yt_dlp.extractor.gen_extractor_classes():
+            if ie.suitable(self.url):
+                video_id = ie.get_temp_id(self.url)
+                return video_id is not None and self.archived(ie.ie_key(), video_id)
+        return False
+
+    def archived(self, ie_key, video_id):
+        return all(
+            self.archive.contains(ie_key, video_id, output) for output in self.outputs
+        )
+
+    def archived_entry(self, entry):
+        ie_key = entry.get("ie_key") or entry.get("extractor_key")
+        return (
+            self.archive is not None and ie_key and entry.get("id")
+            and self.archived(ie_key, entry["id"])
+        )
+
+    # =====================================================
+    # PLAYLIST FAN-OUT
+    # =====================================================
+    def listing_options(self):
+        return {
+            # Entries are taken one by one, see stream_entries
+            "lazy_playlist": True,
+            "retry_sleep_functions": self.retry_sleep_functions(),
+            "quiet": True,
+            "no_warnings": True,
+            "ignoreerrors": True,
+            "extractor_args": EXTRACTOR_ARGS,
+        }
+
+    def cache_options(self, flat):
+        return {"flat": flat, "extractor_args": EXTRACTOR_ARGS}
+
+    def extract_listing(self, ydl):
+        # Returns (info, cached). The info is unprocessed: playlists keep
+        # their lazy entries, so nothing past the first page is fetched
+        # here, and videos are what process_ie_result expects. Listings
+        # are cached once complete, videos right away.
+        # A re-sync lists again to find new entries, it stops early anyway
+        if self.cache is not None:
+            for flat in (True, False):
+                if flat and self.sync_stop:
+                    continue
+                info = self.cache.get(self.url, self.cache_options(flat))
+                if info is not None:
+                    return info, True
+
+        with self.timed(STAGE_EXTRACT):
+            info = ydl.extract_info(self.url, download=False, process=False)
+
+            # Redirects, e.g. from a channel page to its videos tab
+            for _ in range(MAX_REDIRECTS):
+                if not info or info.get("_type") != "url":
+                    break
+                info = ydl.extract_info(
+                    info["url"], ie_key=info.get("ie_key"), download=False, process=False
+                )
+
+        if info and not is_playlist(info) and self.cache is not None:
+            self.cache.put(self.url, self.cache_options(False), ydl.sanitize_info(info))
+
+        return info, False
+
+    def extract_cached(self, ydl, url, fresh=False):
+        # Retries and repeated syncs reuse format lists from the
+        # metadata cache instead of extracting again; fresh skips it
+        # when the cached format URLs may be what failed
+        options = self.cache_options(False)
+
+        if self.cache is not None and not fresh:
+            info = self.cache.get(url, options)
+            if info is not None:
+                return info
+
+        # Unprocessed results are what process_ie_result expects later
+        info = ydl.extract_info(url, download=False, process=False)
+
+        if info and self.cache is not None:
+            info = ydl.sanitize_info(info)
+            self.cache.put(url, options, info)
+
+        return info
+
+    def stream_entries(self, ydl, info, cached):
+        # Yields playlist entries as they are listed; pages are fetched
+        # on demand, so the first downloads start while later pages are
+        # still unknown. A complete listing goes to the metadata cache.
+        from yt_dlp.utils import PlaylistEntries
+
+        items = PlaylistEntries(ydl, info).get_requested_items()
+        listed = []
+        elapsed = 0.0
+        try:
+            while not self._cancel_requested:
+                start = time.perf_counter()
+                item = next(items, None)
+                elapsed += time.perf_counter() - start
+                if item is None:
+                    break
+
+                entry = item[1]
+                if entry and (entry.get("url") or entry.get("webpage_url")
+                              or entry.get("formats")):
+                    listed.append(entry)
+                    yield entry
+        finally:
+            self._record(STAGE_EXTRACT, elapsed)
+
+        if self._cancel_requested or cached or self.cache is None:
+            return
+
+        self.cache.put(
+            self.url, self.cache_options(True), ydl.sanitize_info(dict(info, entries=listed))
+        )
+
+    def download_playlist(self, ydl, info, cached=False):
+        from yt_dlp.utils import DownloadCancelled, sanitize_filename
+
+        title = info.get("title") or "UnknownPlaylist"
+        expected = info.get("playlist_count")
+
+        # Playlists are bulk transfers and give way to single videos
+        if self.throttle is not None:
+            self.throttle.set_priority(PRIORITY_BULK)
+
+        # Same layout as %(playlist_title)s/%(title)s, with the title
+        # baked in because each entry is downloaded as a single video
+        folder = sanitize_filename(title).replace("%", "%%")
+        output_template = os.path.join(folder, "%(title)s.%(ext)s")
+
+        self._log(f"Playlist: {title} ({self.playlist_workers} workers)")
+
+        def download_entry(index, entry):
+            if self._cancel_requested:
+                return
+
+            url = entry.get("url") or entry.get("webpage_url")
+
+            # Entries listed with their formats need no extraction
+            info = None
+            if entry.get("_type", "video") == "video" and entry.get("formats"):
+                info = entry
+
+            try:
+                error = self.download_video(index, url, output_template, info)
+            except DownloadCancelled:
+                return
+            except Exception as e:
+                error = ""
+                self._log(f"Error: {entry.get('title') or url}: {e}", LOG_ERROR)
+
+            if self._cancel_requested:
+                return
+
+            if error is not None:
+                self.tracker.fail(index)
+                self.metrics.inc(COUNTER_ERRORS)
+                reason = f": {error}" if error else ""
+                self._log(f"Failed: {entry.get('title') or url}{reason}", LOG_ERROR)
+            else:
+                self.tracker.entry_done(index)
+
+        # Entries are submitted as they are listed. Archived ones are
+        # skipped before any format negotiation; on a re-sync, a run of
+        # them means the rest of the playlist is known as well. A resumed
+        # job also skips what it finished before it was interrupted.
+        submitted = skipped = done_before = in_archive = 0
+        entries = self.stream_entries(ydl, info, cached)
+        with ThreadPoolExecutor(max_workers=self.playlist_workers) as pool:
+            for entry in entries:
+                if self.journal is not None and \
+                        (entry.get("url") or entry.get("webpage_url")) in self.journal.done:
+                    skipped += 1
+                    done_before += 1
+                    continue
+
+                if self.archived_entry(entry):
+                    skipped += 1
+                    in_archive += 1
+                    if self.sync_stop and in_archive >= self.sync_stop:
+                        self._log(
+                            f"Stopped listing after {in_archive} entries in a row "
+                            f"that are already in the download archive"
+                        )
+                        break
+                    continue
+
+                in_archive = 0
+                pool.submit(download_entry, submitted, entry)
+                submitted += 1
+                self.tracker.entry_count = max(
+                    1, submitted, (expected or 0) - skipped
+                )
+
+            entries.close()
+            self.tracker.entry_count = max(1, submitted)
+
+            message = f"Listed {submitted + skipped} entries"
+            if skipped - done_before:
+                message += f", skipping {skipped - done_before} already in the download archive"
+            if done_before:
+                message += f", {done_before} finished in an earlier run"
+            self._log(message)
+
+        return self.tracker.failed
+
+    # =====================================================
+    # RETRIES
+    # =====================================================
+    def download_video(self, key, url, output_template, info=None):
+        # Extracts (unless info is given) and downloads one video while
+        # holding a slot of its host in the limiter. Throttled and
+        # transient failures are tried again after a jittered backoff,
+        # extracting afresh. Returns None once the video is downloaded,
+        # else the last error message ("" if yt-dlp gave none). The
+        # outcome goes to the journal unless the job was stopped.
+        host = host_of(url)
+        errors = ErrorLog()
+
+        self._entry_urls[key] = url
+        if self.journal is not None:
+            self.journal.entry_started(url, (info or {}).get("title"))
+
+        error = self._download_attempts(key, url, output_template, info, host, errors)
+        if self.journal is not None and (error is None or not self._cancel_requested):
+            self.journal.entry_finished(url, error is None)
+        return error
+
+    def _download_attempts(self, key, url, output_template, info, host, errors):
+        from yt_dlp.utils import DownloadCancelled
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            ticket = None
+            if self.limiter is not None:
+                ticket = self.limiter.acquire(host, lambda: self._cancel_requested)
+                if ticket is None:
+                    raise DownloadCancelled()
+
+            errors.clear()
+            outcome = None
+            try:
+                with self.open_ydl(key, output_template, errors) as ydl:
+                    current = info if attempt == 1 else None
+                    if current is None:
+                        with self.timed(STAGE_EXTRACT):
+                            current = self.extract_cached(ydl, url, fresh=attempt > 1)
+                    if current is not None:
+                        try:
+                            ydl.process_ie_result(current, download=True)
+                        except DiskFull as e:
+                            # Nothing was transferred, and trying again
+                            # would not help
+                            errors.error(str(e))
+                            current = None
+                    failed = current is None or download_failed(ydl)
+                outcome = classify(errors.errors) if failed else OUTCOME_OK
+            finally:
+                if self.limiter is not None:
+                    self.limiter.release(host, outcome, ticket)
+                self._release_disk(key)
+
+            if outcome == OUTCOME_OK:
+                return None
+            if outcome == OUTCOME_ERROR or attempt == MAX_ATTEMPTS or self._cancel_requested:
+                return errors.last
+
+            # A host paused by the limiter also holds acquire back
+            delay = backoff_delay(attempt)
+            self.metrics.inc(COUNTER_BACKOFFS)
+            message = f"{errors.last or 'Download failed'}. Retrying in {delay:.1f} s " \
+                      f"(attempt {attempt + 1}/{MAX_ATTEMPTS})"
+            if outcome == OUTCOME_THROTTLED:
+                self.metrics.inc(COUNTER_THROTTLED)
+                if self.limiter is not None:
+                    message += f", {host} now limited to {self.limiter.limit(host)} at a time"
+            self._log(message, LOG_WARNING)
+            self._sleep(delay)
+
+        return errors.last
+
+    def _sleep(self, seconds):
+        deadline = time.monotonic() + seconds
+        while not self._cancel_requested and time.monotonic() < deadline:
+            time.sleep(max(0.0, min(0.1, deadline - time.monotonic())))
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def interrupt(self):
+        # Stops like cancel, but keeps the partial files and leaves the
+        # job unfinished in the journal, so the next run resumes it
+        self.interrupted = True
+        self.cancel()
@@ -0,0 +1,90 @@
+import math
+
+
+# Audio codecs that play nearly everywhere as they are, best first
+PREFERRED_AUDIO_CODECS = ("aac", "opus", "vorbis", "mp3")
+
+CODEC_ALIASES = {
+    "mp4a": "aac",
+    "mp3": "mp3",
+    "libmp3lame": "mp3",
+}
+
+# A stream within this share of the target bitrate counts as reaching it
+BITRATE_SLACK = 0.9
+
+
+def audio_codec(fmt):
+    codec = (fmt.get("acodec") or "").split(".")[0].lower()
+    return CODEC_ALIASES.get(codec, codec)
+
+
+def has_audio(fmt):
+    return audio_codec(fmt) != "none"
+
+
+def is_audio_only(fmt):
+    return fmt.get("vcodec") == "none" and has_audio(fmt)
+
+
+def format_size(fmt):
+    return fmt.get("filesize") or fmt.get("filesize_approx") or math.inf
+
+
+class AudioFormatSelector:
+    # yt-dlp "format" callable for audio downloads. Formats carrying
+    # audio are ranked against the target, in this order:
+    #   1. audio-only streams over muxed ones
+    #   2. streams that reach the target bitrate
+    #   3. the target codec, so the file needs no encode at all
+    #   4. the bitrate closest to the target, or the highest below it
+    #   5. codecs in PREFERRED_AUDIO_CODECS
+    #   6. the smaller file
+    # codec None accepts any codec, bitrate None takes the highest.
+    def __init__(self, codec=None, bitrate=None):
+        self.codec = codec
+        self.bitrate = bitrate
+
+    def __repr__(self):
+        # Part of the session pool key, so equal selectors share sessions
+        return f"AudioFormatSelector({self.codec!r}, {self.bitrate!r})"
+
+    def __call__(self, ctx):
+        ranked = self.rank(ctx["formats"])
+        if ranked:
+            yield ranked[0]
+
+    def rank(self, formats):
+        candidates = [
+            fmt for fmt in formats if has_audio(fmt) and not fmt.get("has_drm")
+        ]
+        return sorted(candidates, key=self._score, reverse=True)
+
+    def _score(self, fmt):
+        codec = audio_codec(fmt)
+        audio_only = is_audio_only(fmt)
+
+        # tbr of an audio-only stream is its audio bitrate
+        bitrate = fmt.get("abr") or (fmt.get("tbr") if audio_only else None)
+        if bitrate is None:
+            reaches, closeness = True, -math.inf
+        elif self.bitrate is None:
+            reaches, closeness = True, bitrate
+        elif bitrate >= self.bitrate * BITRATE_SLACK:
+            reaches, closeness = True, -abs(bitrate - self.bitrate)
+        else:
+            reaches, closeness = False, bitrate
+
+        if codec in PREFERRED_AUDIO_CODECS:
+            preference = len(PREFERRED_AUDIO_CODECS) - PREFERRED_AUDIO_CODECS.index(codec)
+        else:
+            preference = 0
+
+        return (
+            audio_only,
+            reaches,
+            self.codec is not None and codec == self.codec,
+            closeness,
+            preference,
+            -format_size(fmt),
+        )
@@ -0,0 +1,233 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from core.paths import data_dir
+
+
+# Seconds between commits of batched entry updates
+JOURNAL_FLUSH_INTERVAL = 1.0
+
+ENTRY_DOWNLOADING = "downloading"
+ENTRY_DONE = "done"
+ENTRY_FAILED = "failed"
+
+
+def default_journal_path():
+    return os.path.join(data_dir(), "journal.sqlite3")
+
+
+class JobJournal:
+    # SQLite record of queued and running jobs: URL, folder, format and
+    # options, and per entry its status and partial file. Jobs are
+    # written as soon as they are queued and marked finished when they
+    # end for good, so whatever is unfinished on the next launch was
+    # interrupted and can be resumed. Entry updates come from the
+    # download threads and are only collected in memory; a background
+    # thread commits them every flush_interval, several updates of one
+    # entry as a single row.
+    def __init__(self, path=None, flush_interval=JOURNAL_FLUSH_INTERVAL):
+        self.path = path or default_journal_path()
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._entries = {}
+        self._finished = {}
+        self._claimed = set()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " download_path TEXT NOT NULL,"
+                " format TEXT NOT NULL,"
+                " options TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " finished_at REAL,"
+                " status TEXT)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " job_id INTEGER NOT NULL,"
+                " key TEXT NOT NULL,"
+                " title TEXT,"
+                " status TEXT,"
+                " partial TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (job_id, key))"
+            )
+
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="journal", daemon=True)
+        self._writer.start()
+
+    # =====================================================
+    # JOBS
+    # =====================================================
+    def add_job(self, url, download_path, format_type, options=None):
+        # Returns a JournalJob. An unfinished job with the same URL,
+        # folder and format that nothing in this process runs yet is
+        # taken over, with the entries it already finished.
+        options = json.dumps(options or {}, sort_keys=True)
+
+        # Jobs finished a moment ago must not be taken over
+        self.flush()
+        with self._lock, self._db:
+            rows = self._db.execute(
+                "SELECT id FROM jobs WHERE finished_at IS NULL"
+                " AND url = ? AND download_path = ? AND format = ? ORDER BY id",
+                (url, download_path, format_type)
+            ).fetchall()
+            job_id = next((row["id"] for row in rows if row["id"] not in self._claimed), None)
+
+            if job_id is None:
+                job_id = self._db.execute(
+                    "INSERT INTO jobs (url, download_path, format, options, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (url, download_path, format_type, options, time.time())
+                ).lastrowid
+            else:
+                self._db.execute("UPDATE jobs SET options = ? WHERE id = ?", (options, job_id))
+            self._claimed.add(job_id)
+
+        return self.job(job_id)
+
+    def job(self, job_id):
+        # Handle for an existing job, e.g. in a worker process
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, status, partial FROM entries WHERE job_id = ?", (job_id,)
+            ).fetchall()
+        return JournalJob(self, job_id, rows)
+
+    def finish_job(self, job_id, status):
+        with self._pending_lock:
+            self._finished[job_id] = (status, time.time())
+        with self._lock:
+            self._claimed.discard(job_id)
+
+    def incomplete(self):
+        # Unfinished jobs that this process does not run, oldest first
+        self.flush()
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT * FROM jobs WHERE finished_at IS NULL ORDER BY id"
+            ).fetchall()
+            claimed = set(self._claimed)
+
+        jobs = []
+        for row in rows:
+            if row["id"] in claimed:
+                continue
+            job = dict(row)
+            job["options"] = json.loads(job["options"])
+            jobs.append(job)
+        return jobs
+
+    def prune(self):
+        # Finished jobs are only kept until the next launch
+        self.flush()
+        with self._lock, self._db:
+            self._db.execute(
+                "DELETE FROM entries WHERE job_id IN"
+                " (SELECT id FROM jobs WHERE finished_at IS NOT NULL)"
+            )
+            cursor = self._db.execute("DELETE FROM jobs WHERE finished_at IS NOT NULL")
+        return cursor.rowcount
+
+    # =====================================================
+    # ENTRIES
+    # =====================================================
+    def update_entry(self, job_id, key, **fields):
+        # Only collects the update; partial="" clears the partial file
+        with self._pending_lock:
+            pending = self._entries.setdefault((job_id, key), {})
+            pending.update(fields)
+            pending["updated_at"] = time.time()
+
+    def flush(self):
+        # Batches are taken and written under one lock, so an older
+        # batch never lands after a newer one
+        with self._lock:
+            with self._pending_lock:
+                entries, self._entries = self._entries, {}
+                finished, self._finished = self._finished, {}
+
+            if entries or finished:
+                self._write(entries, finished)
+
+    def _write(self, entries, finished):
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO entries (job_id, key, title, status, partial, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (job_id, key) DO UPDATE SET"
+                " title = coalesce(excluded.title, title),"
+                " status = coalesce(excluded.status, status),"
+                " partial = coalesce(excluded.partial, partial),"
+                " updated_at = excluded.updated_at",
+                [
+                    (job_id, key, fields.get("title"), fields.get("status"),
+                     fields.get("partial"), fields["updated_at"])
+                    for (job_id, key), fields in entries.items()
+                ]
+            )
+            self._db.executemany(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?",
+                [(status, at, job_id) for job_id, (status, at) in finished.items()]
+            )
+
+    def _write_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error:
+                pass
+
+    def close(self):
+        self._stop.set()
+        self._writer.join()
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+
+class JournalJob:
+    # What one DownloadTask writes to the journal. Entries are keyed by
+    # their URL; done holds the ones finished in an earlier run and
+    # partials the partial files they left behind.
+    def __init__(self, journal, job_id, rows=()):
+        self.journal = journal
+        self.id = job_id
+        self.done = {row["key"] for row in rows if row["status"] == ENTRY_DONE}
+        self.partials = [
+            row["partial"] for row in rows
+            if row["partial"] and row["status"] != ENTRY_DONE
+        ]
+
+    def entry_started(self, key, title=None):
+        self.journal.update_entry(self.id, key, status=ENTRY_DOWNLOADING, title=title)
+
+    def entry_partial(self, key, path):
+        self.journal.update_entry(self.id, key, partial=path)
+
+    def entry_finished(self, key, ok):
+        self.journal.update_entry(
+            self.id, key, status=ENTRY_DONE if ok else ENTRY_FAILED, partial=""
+        )
+        if ok:
+            self.done.add(key)
+
+    def finish(self, status):
+        self.journal.finish_job(self.id, status)
+
+    def flush(self):
+        self.journal.flush()
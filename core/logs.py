@@ -0,0 +1,52 @@
+import logging
+import os
+from logging.handlers import RotatingFileHandler
+
+from core.paths import data_dir
+
+
+LOG_INFO = "info"
+LOG_WARNING = "warning"
+LOG_ERROR = "error"
+
+LOG_LEVELS = [LOG_INFO, LOG_WARNING, LOG_ERROR]
+
+_LOGGING_LEVELS = {
+    LOG_INFO: logging.INFO,
+    LOG_WARNING: logging.WARNING,
+    LOG_ERROR: logging.ERROR,
+}
+
+
+def default_log_path():
+    return os.path.join(data_dir(), "logs", "zenloader.log")
+
+
+class RotatingLogFile:
+    # Full, untrimmed session history on disk. The GUI only keeps the
+    # most recent lines in memory and spills everything here.
+    def __init__(self, path=None, max_bytes=5 * 1024 * 1024, backup_count=3):
+        path = path or default_log_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+
+        self._logger = logging.Logger(f"zenloader.file.{path}")
+        self._logger.propagate = False
+
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._logger.addHandler(handler)
+
+    def write(self, timestamp, level, job_id, message):
+        job = f"[#{job_id}] " if job_id is not None else ""
+        self._logger.log(
+            _LOGGING_LEVELS.get(level, logging.INFO),
+            f"{timestamp} {level.upper():7} {job}{message}"
+        )
+
+    def close(self):
+        for handler in list(self._logger.handlers):
+            handler.close()
+            self._logger.removeHandler(handler)
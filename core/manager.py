@@ -0,0 +1,163 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+
+from PySide6.QtCore import QObject, Signal
+
+from core.service import (
+    DownloadService, EVENT_ADDED, EVENT_PROGRESS, EVENT_STATUS, EVENT_LOG,
+    EVENT_FINISHED, EVENT_QUEUE
+)
+
+
+# Time running downloads get to stop when the application quits
+SHUTDOWN_TIMEOUT = 5.0
+
+
+class DownloadManager(QObject):
+    # Qt adapter of core.service.DownloadService. The service runs on an
+    # asyncio loop in a thread of its own; calls from the GUI are handed
+    # to that loop and wait for the result, which is only bookkeeping,
+    # and its events come back as signals (queued to the GUI thread).
+    # Jobs are core.service.Job objects.
+    job_added = Signal(int)
+    job_progress = Signal(int, object)
+    job_status = Signal(int, str)
+    job_log = Signal(int, str, str)
+    job_finished = Signal(int)
+    queue_changed = Signal()
+
+    def __init__(self, max_concurrent=2, *args, **options):
+        super().__init__()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name="download-service", daemon=True
+        )
+        self._thread.start()
+
+        self.service = self._call(DownloadService, max_concurrent, *args, **options)
+        events = self._call(self.service.events)
+        asyncio.run_coroutine_threadsafe(self._forward(events), self.loop)
+
+    def _call(self, func, *args, **kwargs):
+        # Runs func on the loop thread and returns what it returned
+        future = Future()
+
+        def call():
+            try:
+                future.set_result(func(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+        self.loop.call_soon_threadsafe(call)
+        return future.result()
+
+    async def _forward(self, events):
+        async for event in events:
+            if event.kind == EVENT_PROGRESS:
+                self.job_progress.emit(event.job_id, event.value)
+            elif event.kind == EVENT_STATUS:
+                self.job_status.emit(event.job_id, event.value)
+            elif event.kind == EVENT_LOG:
+                self.job_log.emit(event.job_id, event.value, event.level)
+            elif event.kind == EVENT_ADDED:
+                self.job_added.emit(event.job_id)
+            elif event.kind == EVENT_FINISHED:
+                self.job_finished.emit(event.job_id)
+            elif event.kind == EVENT_QUEUE:
+                self.queue_changed.emit()
+
+    def close(self, interrupt=False, timeout=None):
+        # Cancels all jobs, waits for them and stops the loop
+        if not self._thread.is_alive():
+            return
+        asyncio.run_coroutine_threadsafe(
+            self.service.close(interrupt, timeout), self.loop
+        ).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def shutdown(self):
+        # On application exit: running downloads keep their partial
+        # files and stay in the journal, so the next launch resumes them
+        self.close(interrupt=True, timeout=SHUTDOWN_TIMEOUT)
+
+    # =====================================================
+    # SETTINGS
+    # =====================================================
+    @property
+    def jobs(self):
+        return self.service.jobs
+
+    @property
+    def max_concurrent(self):
+        return self.service.max_concurrent
+
+    @property
+    def playlist_workers(self):
+        return self.service.playlist_workers
+
+    @property
+    def sync_stop(self):
+        return self.service.sync_stop
+
+    @property
+    def archive(self):
+        return self.service.archive
+
+    @property
+    def workers(self):
+        return self.service.workers
+
+    def set_max_concurrent(self, value):
+        self._call(self.service.set_max_concurrent, value)
+
+    def set_archive(self, archive):
+        self._call(self.service.set_archive, archive)
+
+    def set_workers(self, workers):
+        self._call(self.service.set_workers, workers)
+
+    def set_playlist_workers(self, value):
+        self._call(self.service.set_playlist_workers, value)
+
+    def set_sync_stop(self, value):
+        self._call(self.service.set_sync_stop, value)
+
+    # =====================================================
+    # QUEUE
+    # =====================================================
+    def add_job(self, url, download_path, format_type, priority=0, prefetch=None):
+        return self._call(
+            self.service.add_job, url, download_path, format_type, priority, prefetch
+        ).id
+
+    def resume_jobs(self):
+        return [job.id for job in self._call(self.service.resume_jobs)]
+
+    def move_job(self, job_id, offset):
+        self._call(self.service.move_job, job_id, offset)
+
+    def set_priority(self, job_id, priority):
+        self._call(self.service.set_priority, job_id, priority)
+
+    def pending_jobs(self):
+        return self._call(self.service.pending_jobs)
+
+    def running_jobs(self):
+        return self._call(self.service.running_jobs)
+
+    def remove_finished(self):
+        return self._call(self.service.remove_finished)
+
+    def active_count(self):
+        return self._call(self.service.active_count)
+
+    def pending_count(self):
+        return self._call(self.service.pending_count)
+
+    def cancel_job(self, job_id):
+        self._call(self.service.cancel_job, job_id)
+
+    def cancel_all(self):
+        self._call(self.service.cancel_all)
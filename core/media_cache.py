@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+from core.paths import data_dir
+
+
+DEFAULT_MEDIA_CACHE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+HASH_CHUNK = 1024 * 1024
+
+
+def default_media_cache_dir():
+    return os.path.join(data_dir(), "cache", "media")
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class MediaCache:
+    # Content-addressed store of downloaded source files. Blobs are named
+    # after the SHA-256 of their bytes, so a file is kept once however
+    # often it was requested; a small JSON file per source (extractor,
+    # video id, format id) points at its blob. Reads touch the blob, so
+    # eviction drops the least recently used ones first once the total
+    # size goes over max_bytes. Sources are not signed URLs, there is no
+    # TTL.
+    def __init__(self, path=None, max_bytes=DEFAULT_MEDIA_CACHE_MAX_BYTES):
+        self.path = path or default_media_cache_dir()
+        self.max_bytes = max_bytes
+        self.blobs = os.path.join(self.path, "blobs")
+        self.index = os.path.join(self.path, "index")
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.blobs, exist_ok=True)
+        os.makedirs(self.index, exist_ok=True)
+
+    def _index_file(self, extractor, video_id, format_id):
+        key = json.dumps([extractor.lower(), video_id, format_id])
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.index, digest + ".json")
+
+    def get(self, extractor, video_id, format_id):
+        # Path of the cached source, or None
+        path = self._index_file(extractor, video_id, format_id)
+
+        with self._lock:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    blob = os.path.join(self.blobs, json.load(f)["blob"])
+                os.utime(blob)
+
+            except (OSError, ValueError, KeyError):
+                # The blob may have been evicted
+                if os.path.exists(path):
+                    os.remove(path)
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return blob
+
+    def put(self, extractor, video_id, format_id, source, link=False):
+        # Adds a finished download and returns its blob. link hard-links
+        # instead of copying, for sources deleted right afterwards; a
+        # kept file could still be changed in place.
+        blob = os.path.join(
+            self.blobs, file_digest(source) + os.path.splitext(source)[1]
+        )
+        temp = f"{blob}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        try:
+            if not os.path.exists(blob):
+                self._copy(source, temp, link)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+            return None
+
+        with self._lock:
+            try:
+                if os.path.exists(temp):
+                    os.replace(temp, blob)
+                else:
+                    os.utime(blob)
+
+                path = self._index_file(extractor, video_id, format_id)
+                index_temp = f"{path}.{os.getpid()}.tmp"
+                with open(index_temp, "w", encoding="utf-8") as f:
+                    json.dump({"blob": os.path.basename(blob)}, f)
+                os.replace(index_temp, path)
+
+            except OSError:
+                if os.path.exists(temp):
+                    os.remove(temp)
+                return None
+
+            # The blob is stored even if eviction runs into trouble
+            try:
+                self._evict(keep=blob)
+            except OSError:
+                pass
+            return blob
+
+    def _copy(self, source, target, link):
+        # Hard links fail across drives, those get a copy
+        if link:
+            try:
+                os.link(source, target)
+                return
+            except OSError:
+                pass
+        shutil.copyfile(source, target)
+
+    def materialize(self, blob, target):
+        # Copies a blob to where a download would have put it
+        temp = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(blob, temp)
+            os.replace(temp, target)
+        except OSError:
+            if os.path.exists(temp):
+                os.remove(temp)
+            raise
+
+    def _evict(self, keep=None):
+        # Worker processes share the folder, so any blob can disappear
+        # between the listing and its stat() or remove()
+        files = []
+        total = 0
+
+        for entry in os.scandir(self.blobs):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+
+        files.sort()
+        while files and total > self.max_bytes:
+            _, size, path = files.pop(0)
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Still open somewhere (Windows)
+                continue
+            total -= size
+
+    def stats(self):
+        with self._lock:
+            entries = 0
+            size = 0
+            for entry in os.scandir(self.blobs):
+                if not entry.name.endswith(".tmp"):
+                    try:
+                        size += entry.stat().st_size
+                    except OSError:
+                        continue
+                    entries += 1
+
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": entries,
+                "bytes": size,
+            }
+
+    def clear(self):
+        with self._lock:
+            for folder in (self.blobs, self.index):
+                for entry in os.scandir(folder):
+                    try:
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass
@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+STAGE_EXTRACT = "extract"
+STAGE_FORMAT_SELECTION = "format_selection"
+STAGE_TRANSFER = "transfer"
+STAGE_MERGE = "merge"
+STAGE_POSTPROCESS = "postprocess"
+STAGE_ENCODE = "encode"
+STAGE_MOVE = "move"
+STAGE_FSYNC = "fsync"
+
+STAGES = [
+    STAGE_EXTRACT, STAGE_FORMAT_SELECTION, STAGE_TRANSFER, STAGE_MERGE,
+    STAGE_POSTPROCESS, STAGE_ENCODE, STAGE_MOVE, STAGE_FSYNC,
+]
+
+COUNTER_BYTES = "bytes_downloaded"
+COUNTER_BYTES_WRITTEN = "bytes_written"
+COUNTER_RETRIES = "retries"
+COUNTER_ERRORS = "errors"
+COUNTER_JOBS = "jobs_finished"
+COUNTER_THROTTLED = "throttled"
+COUNTER_BACKOFFS = "backoffs"
+
+GAUGE_PENDING = "jobs_pending"
+GAUGE_RUNNING = "jobs_running"
+GAUGE_ENCODES = "encodes_in_flight"
+
+MAX_RECENT_JOBS = 100
+
+# yt-dlp postprocessor names (PostProcessor.pp_key()) that get their
+# own stage instead of counting as post-processing
+POSTPROCESSOR_STAGES = {
+    "Merger": STAGE_MERGE,
+    "MoveFiles": STAGE_MOVE,
+    "StagedMove": STAGE_MOVE,
+}
+
+
+class StageSummary:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total, 4),
+            "avg_seconds": round(self.total / self.count, 4) if self.count else 0.0,
+            "max_seconds": round(self.max, 4),
+        }
+
+
+class Metrics:
+    # Thread-safe registry shared by all jobs: stage timings, counters
+    # and gauges, plus the per-stage totals of the most recent jobs.
+    # Snapshots are plain dicts and export to JSON or Prometheus text.
+    def __init__(self, max_recent_jobs=MAX_RECENT_JOBS):
+        self.started = time.time()
+        self._stages = {stage: StageSummary() for stage in STAGES}
+        self._counters = {}
+        self._gauges = {}
+        self._recent = deque(maxlen=max_recent_jobs)
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            self._stages.setdefault(stage, StageSummary()).add(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name, delta):
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def finish_job(self, url, status, timings):
+        with self._lock:
+            self._recent.append({
+                "url": url,
+                "status": status,
+                "finished_at": round(time.time(), 3),
+                "stages": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+            })
+            self._counters[COUNTER_JOBS] = self._counters.get(COUNTER_JOBS, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "uptime_seconds": round(time.time() - self.started, 1),
+                "stages": {name: summary.as_dict() for name, summary in self._stages.items()},
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "recent_jobs": list(self._recent),
+            }
+
+    # =====================================================
+    # EXPORT
+    # =====================================================
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP zenloader_stage_seconds Time spent per download stage.",
+            "# TYPE zenloader_stage_seconds summary",
+        ]
+        for stage, summary in snapshot["stages"].items():
+            lines.append(f'zenloader_stage_seconds_sum{{stage="{stage}"}} {summary["total_seconds"]}')
+            lines.append(f'zenloader_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+
+        for name, value in sorted(snapshot["counters"].items()):
+            lines.append(f"# TYPE zenloader_{name}_total counter")
+            lines.append(f"zenloader_{name}_total {value}")
+
+        for name, value in sorted(snapshot["gauges"].items()):
+            lines.append(f"# TYPE zenloader_{name} gauge")
+            lines.append(f"zenloader_{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # .prom files get the Prometheus text format (for the node
+        # exporter textfile collector), anything else JSON. Written
+        # atomically so a scraper never sees half a file.
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp, path)
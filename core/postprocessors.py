@@ -0,0 +1,209 @@
+import os
+
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import RequestError
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import parse_http_range
+
+from core.connections import MIN_SEGMENTS
+from core.segmented import PROTOCOL_SEGMENTED
+
+
+# Kept apart from core.archive and core.transcode so those stay
+# importable without loading yt-dlp.
+
+
+class ArchiveRecorder(PostProcessor):
+    # Runs after the final file is in place and records its path
+    def __init__(self, archive, format_type, downloader=None):
+        super().__init__(downloader)
+        self.archive = archive
+        self.format_type = format_type
+
+    def run(self, info):
+        path = info.get("filepath")
+        # An MP3 handed to the EncodePool is recorded once it is encoded
+        if info.get("__encode_pending"):
+            return [], info
+
+        size = os.path.getsize(path) if path and os.path.exists(path) else None
+        extractor = info.get("extractor_key") or info.get("ie_key")
+
+        if extractor and info.get("id"):
+            self.archive.record(extractor, info["id"], self.format_type, path, size)
+
+        return [], info
+
+
+class EncodeHandoff(PostProcessor):
+    # Hands the finished download to the EncodePool instead of running
+    # FFmpegExtractAudio inline. The info dict already points at the MP3;
+    # the archive entry is only written once the encode succeeded.
+    def __init__(self, submit, downloader=None):
+        super().__init__(downloader)
+        self.submit = submit
+
+    def run(self, info):
+        source = info["filepath"]
+        target = os.path.splitext(source)[0] + ".mp3"
+
+        # The selected stream already was MP3
+        if source == target:
+            return [], info
+
+        self.submit(info, source, target)
+
+        info["filepath"] = target
+        info["__encode_pending"] = True
+        return [], info
+
+
+class DeriveOutputs(PostProcessor):
+    # Runs once the single download of a job with several outputs is in
+    # place and hands it to DownloadTask, which writes the outputs
+    def __init__(self, derive, downloader=None):
+        super().__init__(downloader)
+        self.derive = derive
+
+    def run(self, info):
+        self.derive(info)
+        return [], info
+
+
+class MediaCacheLookup(PostProcessor):
+    # Runs before the download: a source that is in the media cache is
+    # copied to where yt-dlp would write it, and yt-dlp then treats it
+    # as already downloaded
+    def __init__(self, cache, on_hit=None, downloader=None):
+        super().__init__(downloader)
+        self.cache = cache
+        self.on_hit = on_hit or (lambda info: None)
+
+    def run(self, info):
+        filename = info.get("_filename")
+        extractor = info.get("extractor_key") or info.get("ie_key")
+        if not filename or not extractor or not info.get("format_id") \
+                or os.path.exists(filename):
+            return [], info
+
+        blob = self.cache.get(extractor, info["id"], info["format_id"])
+        if blob is not None:
+            try:
+                self.cache.materialize(blob, filename)
+            except OSError as e:
+                self.report_warning(f"Could not use the cached media: {e}")
+                return [], info
+
+            info["_media_cache_blob"] = blob
+            self.on_hit(info)
+
+        return [], info
+
+
+class DiskAdmission(PostProcessor):
+    # Runs before the download once the formats are chosen. admit
+    # raises core.disk.DiskFull when they do not fit; it is not a
+    # PostProcessingError on purpose, yt-dlp would only report that and
+    # download anyway.
+    def __init__(self, admit, downloader=None):
+        super().__init__(downloader)
+        self.admit = admit
+
+    def run(self, info):
+        self.admit(info)
+        return [], info
+
+
+class StagedMove(PostProcessor):
+    # Last postprocessor before yt-dlp's own move: takes the finished
+    # files out of the staging folder with core.disk.move_file, which
+    # only renames them into place once complete. yt-dlp then finds
+    # nothing left to move.
+    def __init__(self, move, downloader=None):
+        super().__init__(downloader)
+        self.move = move
+
+    @classmethod
+    def pp_key(cls):
+        return "StagedMove"
+
+    def run(self, info):
+        finaldir = info.get("__finaldir")
+        if not finaldir:
+            return [], info
+
+        files = dict(info.get("__files_to_move") or {})
+        files[info["filepath"]] = None
+        for source, target in files.items():
+            target = target or os.path.join(finaldir, os.path.basename(source))
+            if os.path.abspath(source) == os.path.abspath(target) or not os.path.exists(source):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            self.move(source, target)
+
+        info["filepath"] = os.path.join(finaldir, os.path.basename(info["filepath"]))
+        info["__files_to_move"] = {}
+        return [], info
+
+
+class SegmentedTransfer(PostProcessor):
+    # Runs before the download and moves large HTTP formats to the
+    # segmented downloader when the server answers range requests.
+    # Merged downloads are checked format by format.
+    def __init__(self, tuner, downloader=None):
+        super().__init__(downloader)
+        self.tuner = tuner
+
+    def run(self, info):
+        # Taken from the media cache, nothing to transfer
+        if info.get("_media_cache_blob"):
+            return [], info
+
+        formats = info.get("requested_formats")
+        if formats:
+            for fmt in formats:
+                self._segment(fmt)
+            info["protocol"] = "+".join(fmt["protocol"] for fmt in formats)
+        else:
+            self._segment(info)
+        return [], info
+
+    def _segment(self, fmt):
+        segment_size = self.tuner.segment_size
+        min_size = segment_size * MIN_SEGMENTS
+
+        if fmt.get("protocol") not in ("http", "https") or fmt.get("is_live"):
+            return
+        if fmt.get("impersonate") or fmt.get("section_start") or fmt.get("section_end"):
+            return
+        if (fmt.get("filesize") or fmt.get("filesize_approx") or min_size) < min_size:
+            return
+
+        size = self._range_size(fmt)
+        if not size or size < min_size:
+            return
+
+        fmt["protocol"] = PROTOCOL_SEGMENTED
+        fmt["filesize"] = size
+        fmt["downloader_options"] = {
+            **(fmt.get("downloader_options") or {}),
+            "connection_tuner": self.tuner,
+            "segment_size": segment_size,
+        }
+
+    def _range_size(self, fmt):
+        # One byte range request: a 206 answer with the full length means
+        # the server can serve the file in parts
+        headers = {**(fmt.get("http_headers") or {}), "Range": "bytes=0-0"}
+        try:
+            response = self._downloader.urlopen(Request(fmt["url"], headers=headers))
+        except RequestError as e:
+            self.write_debug(f"Range request failed, using one connection: {e}")
+            return None
+
+        try:
+            if response.status != 206:
+                return None
+            return parse_http_range(response.headers.get("Content-Range"))[2]
+        finally:
+            response.close()
@@ -0,0 +1,104 @@
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Optional
+
+from core.engine import DownloadTask, FORMAT_MP4, is_playlist
+
+
+# Seconds between preview updates while a playlist is being listed
+PREVIEW_INTERVAL = 0.5
+
+
+@dataclass(frozen=True)
+class Preview:
+    url: str
+    title: str = ""
+    duration: Optional[float] = None
+    formats: int = 0
+    height: Optional[int] = None
+    # Playlists only; complete is False while the listing goes on
+    entries: Optional[int] = None
+    complete: bool = True
+    error: str = ""
+
+
+def can_prefetch(url):
+    return urllib.parse.urlparse(url).scheme in ("http", "https")
+
+
+def video_preview(url, info):
+    # Single-format videos carry the format fields themselves
+    formats = info.get("formats") or ([info] if info.get("url") else [])
+    heights = [fmt.get("height") for fmt in formats if fmt.get("height")]
+    return Preview(
+        url=url,
+        title=info.get("title") or "",
+        duration=info.get("duration"),
+        formats=len(formats),
+        height=max(heights) if heights else None,
+    )
+
+
+class Prefetch:
+    # Extracts a pasted URL on a background thread while the format and
+    # folder are still being chosen. It runs DownloadTask's own listing
+    # code, so the metadata cache and the session pool end up holding
+    # exactly what the job looks up first: a queued download finds its
+    # info (or the complete playlist listing) there and starts the
+    # transfer right away. on_preview receives Preview snapshots.
+    def __init__(self, url, cache=None, sessions=None, on_preview=None):
+        self.url = url
+        self.task = DownloadTask(url, "", FORMAT_MP4, cache=cache, sessions=sessions)
+        self.on_preview = on_preview or (lambda preview: None)
+        self.cancelled = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="prefetch", daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        self.cancelled = True
+        self.task.cancel()
+
+    def wait(self):
+        # Blocks until the lookup has finished or given up
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        try:
+            with self.task.session(self.task.listing_options()) as ydl:
+                info, cached = self.task.extract_listing(ydl)
+                if self.cancelled:
+                    return
+
+                if not info:
+                    self._emit(Preview(self.url, error="Unable to extract"))
+                elif is_playlist(info):
+                    self._list(ydl, info, cached)
+                else:
+                    self._emit(video_preview(self.url, info))
+
+        except Exception as e:
+            self._emit(Preview(self.url, error=str(e)))
+
+    def _list(self, ydl, info, cached):
+        # Walks the listing so it is cached complete for the job
+        title = info.get("title") or ""
+        count = 0
+        last_emit = time.monotonic()
+
+        for _ in self.task.stream_entries(ydl, info, cached):
+            count += 1
+            if time.monotonic() - last_emit >= PREVIEW_INTERVAL:
+                last_emit = time.monotonic()
+                self._emit(Preview(self.url, title, entries=count, complete=False))
+
+        self._emit(Preview(self.url, title, entries=count))
+
+    def _emit(self, preview):
+        if not self.cancelled:
+            self.on_preview(preview)
@@ -0,0 +1,139 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+
+STAGE_EXTRACTING = "extracting"
+STAGE_DOWNLOADING = "downloading"
+STAGE_POSTPROCESSING = "postprocessing"
+STAGE_ENCODING = "encoding"
+STAGE_FINISHED = "finished"
+
+DEFAULT_PROGRESS_INTERVAL = 0.25
+
+
+@dataclass(frozen=True)
+class Progress:
+    stage: str
+    percent: int = 0
+    downloaded_bytes: int = 0
+    total_bytes: int = 0
+    speed: float = 0.0
+    eta: Optional[float] = None
+    entries_done: int = 0
+    entries_total: int = 1
+    encodes_done: int = 0
+    encodes_total: int = 0
+
+
+class ProgressAggregator:
+    # Collects yt-dlp progress hook dicts from one or more entries and
+    # emits a Progress snapshot at most once per interval. The hook
+    # side only stores numbers; the snapshot is computed on emission.
+    # Entries whose size is not known yet count with the average size.
+    def __init__(self, emit, entry_count=1, interval=DEFAULT_PROGRESS_INTERVAL,
+                 clock=time.monotonic):
+        self.emit = emit
+        self.entry_count = entry_count
+        self.interval = interval
+        self.clock = clock
+        self.failed = 0
+        self.stage = STAGE_EXTRACTING
+        self._files = {}
+        self._done_entries = set()
+        self.encodes_done = 0
+        self.encodes_total = 0
+        self._last_emit = float("-inf")
+        self._lock = threading.Lock()
+
+    def hook(self, key, d):
+        status = d["status"]
+
+        if status == "downloading":
+            total = d.get("total_bytes") or d.get("total_bytes_estimate") or 0
+            self._files[(key, d.get("filename"))] = (
+                d.get("downloaded_bytes") or 0, total, d.get("speed") or 0.0
+            )
+            if self.stage != STAGE_DOWNLOADING:
+                self.set_stage(STAGE_DOWNLOADING)
+            elif self.clock() - self._last_emit >= self.interval:
+                self._maybe_emit()
+
+        elif status == "finished":
+            size = d.get("total_bytes") or d.get("downloaded_bytes") or 0
+            self._files[(key, d.get("filename"))] = (size, size, 0.0)
+            self._maybe_emit()
+
+    def entry_done(self, key):
+        with self._lock:
+            self._done_entries.add(key)
+        self._maybe_emit(force=True)
+
+    def encode_queued(self):
+        with self._lock:
+            self.encodes_total += 1
+        self._maybe_emit(force=True)
+
+    def encode_finished(self):
+        with self._lock:
+            self.encodes_done += 1
+        self._maybe_emit(force=True)
+
+    def fail(self, key=None):
+        with self._lock:
+            self.failed += 1
+        self._maybe_emit(force=True)
+
+    def set_stage(self, stage):
+        self.stage = stage
+        self._maybe_emit(force=True)
+
+    def snapshot(self):
+        with self._lock:
+            entries = {}
+            speed = 0.0
+            for (key, _), (downloaded, total, file_speed) in list(self._files.items()):
+                done, size = entries.get(key, (0, 0))
+                entries[key] = (done + downloaded, size + total)
+                speed += file_speed
+
+            sized = [(done, size) for done, size in entries.values() if size]
+            remaining = self.entry_count - self.failed
+            done = sum(min(done, size) for done, size in sized)
+            total = sum(size for _, size in sized)
+            if sized and remaining > len(sized):
+                total += total / len(sized) * (remaining - len(sized))
+
+            finished = len(self._done_entries)
+            encodes_done = self.encodes_done
+            encodes_total = self.encodes_total
+
+        if self.stage == STAGE_FINISHED:
+            percent = 100
+        else:
+            percent = int(done * 100 / total) if total else 0
+
+        eta = (total - done) / speed if speed and total > done else None
+
+        return Progress(
+            stage=self.stage,
+            percent=percent,
+            downloaded_bytes=int(done),
+            total_bytes=int(total),
+            speed=speed,
+            eta=eta,
+            entries_done=finished,
+            entries_total=self.entry_count,
+            encodes_done=encodes_done,
+            encodes_total=encodes_total,
+        )
+
+    def _maybe_emit(self, force=False):
+        now = self.clock()
+        with self._lock:
+            if not force and now - self._last_emit < self.interval:
+                return
+            self._last_emit = now
+
+        self.emit(self.snapshot())
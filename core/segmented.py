@@ -0,0 +1,137 @@
+import glob
+import math
+import os
+import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from yt_dlp.downloader import PROTOCOL_MAP
+from yt_dlp.downloader.fragment import FragmentFD
+from yt_dlp.networking.exceptions import HTTPError, IncompleteRead
+from yt_dlp.utils import DownloadError, RetryManager
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+from core.disk import preallocate
+
+
+# Formats switched to this protocol by core.postprocessors.SegmentedTransfer
+# are fetched as parallel byte ranges of one HTTP URL. Importing this
+# module registers the downloader with yt-dlp.
+PROTOCOL_SEGMENTED = "http_segmented"
+
+
+class SegmentedHttpFD(FragmentFD):
+    # Downloads fixed-size ranges on several connections and appends
+    # them to the .part file in order, so the .part file is always a
+    # complete prefix. Resuming therefore works from its size, no matter
+    # whether it was written by this downloader (with any segment size)
+    # or by the plain HTTP downloader, and the other way round.
+    FD_NAME = "segmented"
+
+    def real_download(self, filename, info_dict):
+        options = info_dict["downloader_options"]
+        tuner = options["connection_tuner"]
+        segment_size = options["segment_size"]
+        size = info_dict["filesize"]
+
+        ctx = {
+            "filename": filename,
+            "total_frags": math.ceil(size / segment_size),
+        }
+        self._prepare_frag_download(ctx)
+
+        offset = ctx["complete_frags_downloaded_bytes"]
+        if offset > size:
+            self.report_warning("Partial file is larger than the media. Restarting ...")
+            ctx["dest_stream"].truncate(0)
+            offset = ctx["complete_frags_downloaded_bytes"] = 0
+        ctx["fragment_index"] = offset // segment_size
+
+        # Segments arrive in order, so the file grows front to back
+        # into blocks allocated up front
+        preallocate(ctx["dest_stream"], size)
+
+        # Fragments of an earlier attempt may cover other ranges
+        for path in glob.glob(glob.escape(ctx["tmpfilename"]) + "-Frag*"):
+            self.try_remove(path)
+
+        self._start_frag_download(ctx, info_dict)
+
+        segments = iter([
+            (index, start, min(start + segment_size, size))
+            for index, start in enumerate(
+                range(offset, size, segment_size), start=ctx["fragment_index"] + 1
+            )
+        ])
+        tuning = tuner.start(urllib.parse.urlparse(info_dict["url"]).hostname)
+        pending = deque()
+
+        pool = ThreadPoolExecutor(tuner.max_connections)
+        try:
+            while True:
+                while len(pending) < tuning.connections:
+                    segment = next(segments, None)
+                    if segment is None:
+                        break
+                    pending.append(
+                        (segment, pool.submit(self._fetch_segment, ctx, info_dict, *segment))
+                    )
+
+                if not pending:
+                    break
+
+                (index, start, end), future = pending.popleft()
+                fragment_filename = future.result()
+                if fragment_filename is None:
+                    ctx["dest_stream"].close()
+                    self.report_error(f"Unable to download bytes {start}-{end - 1}")
+                    return False
+
+                ctx["fragment_index"] = index
+                ctx["fragment_filename_sanitized"] = fragment_filename
+                self._append_fragment(ctx, self._read_fragment(ctx))
+                tuning.segment_done(end - start)
+
+        except BaseException:
+            ctx["dest_stream"].close()
+            raise
+
+        finally:
+            tuning.finish()
+            pool.shutdown(wait=True, cancel_futures=True)
+
+        return self._finish_frag_download(ctx, info_dict)
+
+    def _fetch_segment(self, ctx, info_dict, index, start, end):
+        # Runs on a pool thread; returns the fragment file or None
+        ctx = dict(ctx, fragment_index=index)
+        headers = HTTPHeaderDict(info_dict.get("http_headers"))
+        headers["Range"] = f"bytes={start}-{end - 1}"
+
+        def error_callback(err, count, retries):
+            self.report_retry(err, count, retries, index)
+
+        for retry in RetryManager(self.params.get("fragment_retries"), error_callback):
+            try:
+                if not self._download_fragment(ctx, info_dict["url"], info_dict, headers):
+                    return None
+            except (HTTPError, IncompleteRead) as err:
+                retry.error = err
+                continue
+
+            # A server that ignores Range sends the whole file instead
+            fragment_filename = ctx["fragment_filename_sanitized"]
+            received = os.path.getsize(fragment_filename)
+            if received != end - start:
+                self.try_remove(fragment_filename)
+                retry.error = DownloadError(
+                    f"Expected {end - start} bytes for range {start}-{end - 1}, got {received}"
+                )
+                continue
+
+            return fragment_filename
+
+        return None
+
+
+PROTOCOL_MAP[PROTOCOL_SEGMENTED] = SegmentedHttpFD
@@ -0,0 +1,461 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from core.engine import DownloadTask, DEFAULT_PLAYLIST_WORKERS, DEFAULT_SYNC_STOP
+from core.metrics import GAUGE_PENDING, GAUGE_RUNNING
+from core.workers import WorkerJob, job_spec
+
+
+# Asyncio front end of the download engine. Nothing in here imports Qt,
+# so other services can embed it; core.manager adapts it to signals.
+
+MAX_CONCURRENT_LIMIT = 8
+
+EVENT_ADDED = "added"
+EVENT_PROGRESS = "progress"
+EVENT_STATUS = "status"
+EVENT_LOG = "log"
+EVENT_FINISHED = "finished"
+# The pending or running set changed; job_id is None
+EVENT_QUEUE = "queue"
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    kind: str
+    job_id: Optional[int] = None
+    # Progress snapshot, status text or log message
+    value: Any = None
+    # Log level from core.logs, log events only
+    level: Optional[str] = None
+
+
+class Job:
+    def __init__(self, service, job_id, url, download_path, format_type, priority=0,
+                 prefetch=None):
+        self.service = service
+        self.id = job_id
+        self.url = url
+        self.download_path = download_path
+        self.format_type = format_type
+        self.priority = priority
+        self.status = "Queued"
+        self.progress = 0
+        self.last_progress = None
+        self.journal = None
+        # Prefetch of the same URL still filling the cache, waited for first
+        self.prefetch = prefetch
+        # DownloadTask or WorkerJob while running, and its coroutine
+        self.runner = None
+        self.task = None
+        # Cancelled after it was scheduled but before its runner exists
+        self.cancel_requested = False
+        self.done = False
+        self._done = asyncio.Event()
+
+    def events(self):
+        return self.service.events(self.id)
+
+    async def wait(self):
+        # Final status text once the job ended, however it ended
+        await self._done.wait()
+        return self.status
+
+    def cancel(self):
+        self.service.cancel_job(self.id)
+
+
+class EventStream:
+    # Async iterator over the events of a DownloadService, or of one of
+    # its jobs. It is registered when created, so nothing published
+    # after that is missed, and ends when the job finishes or the
+    # service closes.
+    def __init__(self, service, job_id=None):
+        self.service = service
+        self.job_id = job_id
+        self._queue = asyncio.Queue()
+        self._closed = False
+        service._streams.append(self)
+
+    def _put(self, event):
+        if event is None or self.job_id is None or event.job_id == self.job_id:
+            self._queue.put_nowait(event)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._closed:
+            raise StopAsyncIteration
+
+        event = await self._queue.get()
+        if event is None or (self.job_id is not None and event.kind == EVENT_FINISHED):
+            self.close()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self.service._streams.remove(self)
+
+
+class DownloadService:
+    # Priority queue of download jobs on one asyncio loop. Queued jobs
+    # are plain entries; each running job is a coroutine that awaits its
+    # blocking DownloadTask (or WorkerJob) on the service's executor,
+    # whose callbacks come back to the loop as JobEvents. Cancelling
+    # that coroutine asks the task to stop and waits until it has, so
+    # closing the service (or leaving "async with") never leaves a
+    # download running. All methods belong to the loop's thread.
+    def __init__(self, max_concurrent=2,
+                 playlist_workers=DEFAULT_PLAYLIST_WORKERS, archive=None,
+                 cache=None, encode_pool=None, sessions=None, bandwidth=None,
+                 metrics=None, connections=None, workers=None,
+                 sync_stop=DEFAULT_SYNC_STOP, limiter=None, journal=None,
+                 media_cache=None, disk=None):
+        self.media_cache = media_cache
+        self.disk = disk
+        self.workers = workers
+        self.journal = journal
+        self.limiter = limiter
+        self.sync_stop = sync_stop
+        self.metrics = metrics
+        self.connections = connections
+        self.sessions = sessions
+        self.bandwidth = bandwidth
+        self.encode_pool = encode_pool
+        self.playlist_workers = playlist_workers
+        self.archive = archive
+        self.cache = cache
+        self.jobs = {}
+        self._pending = []
+        self._running = {}
+        self._next_id = 1
+        self._streams = []
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._closed = False
+        self._interrupting = False
+        # One thread per running job, never more than the limit
+        self._executor = ThreadPoolExecutor(MAX_CONCURRENT_LIMIT, thread_name_prefix="download")
+        self.max_concurrent = max(1, min(MAX_CONCURRENT_LIMIT, int(max_concurrent)))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    # =====================================================
+    # EVENTS
+    # =====================================================
+    def events(self, job_id=None):
+        return EventStream(self, job_id)
+
+    def _publish(self, kind, job_id=None, value=None, level=None):
+        event = JobEvent(kind, job_id, value, level)
+        for stream in list(self._streams):
+            stream._put(event)
+
+    def _queue_changed(self):
+        if self.metrics is not None:
+            self.metrics.set_gauge(GAUGE_PENDING, len(self._pending))
+            self.metrics.set_gauge(GAUGE_RUNNING, len(self._running))
+
+        if self._pending or self._running:
+            self._idle.clear()
+        else:
+            self._idle.set()
+        self._publish(EVENT_QUEUE)
+
+    # =====================================================
+    # QUEUE
+    # =====================================================
+    def add_job(self, url, download_path, format_type, priority=0, prefetch=None):
+        if self._closed:
+            raise RuntimeError("DownloadService is closed")
+
+        job = Job(self, self._next_id, url, download_path, format_type, priority, prefetch)
+        self._next_id += 1
+        self.jobs[job.id] = job
+
+        # Recorded before anything runs, so a crash cannot lose it
+        if self.journal is not None:
+            job.journal = self.journal.add_job(url, download_path, format_type, {
+                "priority": priority,
+                "playlist_workers": self.playlist_workers,
+                "sync_stop": self.sync_stop,
+            })
+
+        # Higher priority goes first, same priority keeps FIFO order
+        index = len(self._pending)
+        for i, pending in enumerate(self._pending):
+            if pending.priority < priority:
+                index = i
+                break
+        self._pending.insert(index, job)
+
+        self._publish(EVENT_ADDED, job.id)
+        self._queue_changed()
+        self._schedule()
+        return job
+
+    def resume_jobs(self):
+        # Queues what an earlier run left unfinished, with the folder,
+        # format and priority it had; returns the new jobs
+        if self.journal is None:
+            return []
+
+        return [
+            self.add_job(
+                record["url"], record["download_path"], record["format"],
+                record["options"].get("priority", 0)
+            )
+            for record in self.journal.incomplete()
+        ]
+
+    def move_job(self, job_id, offset):
+        job = self.jobs.get(job_id)
+        if job not in self._pending:
+            return
+
+        index = self._pending.index(job)
+        new_index = max(0, min(len(self._pending) - 1, index + offset))
+        if new_index == index:
+            return
+
+        self._pending.insert(new_index, self._pending.pop(index))
+
+        # Take over the priority of the job we jumped over so that
+        # later insertions respect the manual order
+        if offset < 0:
+            job.priority = max(job.priority, self._pending[new_index + 1].priority)
+        else:
+            job.priority = min(job.priority, self._pending[new_index - 1].priority)
+        self._queue_changed()
+
+    def set_priority(self, job_id, priority):
+        job = self.jobs.get(job_id)
+        if job not in self._pending:
+            return
+
+        self._pending.remove(job)
+        job.priority = priority
+        self._pending.append(job)
+        self._pending.sort(key=lambda j: -j.priority)
+        self._queue_changed()
+
+    def pending_jobs(self):
+        return list(self._pending)
+
+    def running_jobs(self):
+        return list(self._running.values())
+
+    def remove_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.done]
+        for job_id in finished:
+            del self.jobs[job_id]
+        return finished
+
+    def active_count(self):
+        return len(self._running)
+
+    def pending_count(self):
+        return len(self._pending)
+
+    async def join(self):
+        # Returns once nothing is queued or running
+        await self._idle.wait()
+
+    # =====================================================
+    # CONCURRENCY
+    # =====================================================
+    def set_max_concurrent(self, value):
+        self.max_concurrent = max(1, min(MAX_CONCURRENT_LIMIT, int(value)))
+        self._schedule()
+
+    def set_archive(self, archive):
+        # Applies to jobs started from now on
+        self.archive = archive
+
+    def set_workers(self, workers):
+        # A core.workers.WorkerPool, or None to run jobs in threads.
+        # Applies to jobs started from now on
+        self.workers = workers
+
+    def set_playlist_workers(self, value):
+        # Applies to jobs started from now on
+        self.playlist_workers = int(value)
+
+    def set_sync_stop(self, value):
+        # Applies to jobs started from now on
+        self.sync_stop = int(value)
+
+    def _schedule(self):
+        while self._pending and len(self._running) < self.max_concurrent and not self._closed:
+            job = self._pending.pop(0)
+            self._running[job.id] = job
+            job.task = asyncio.get_running_loop().create_task(self._run(job))
+
+    def _runner(self, job):
+        loop = asyncio.get_running_loop()
+
+        # Called on the executor thread (or a WorkerJob's), handled on the loop
+        def relay(handler):
+            return lambda *args: loop.call_soon_threadsafe(handler, job, *args)
+
+        callbacks = {
+            "on_progress": relay(self._on_progress),
+            "on_status": relay(self._set_status),
+            "on_log": relay(self._on_log),
+        }
+
+        if self.workers is not None:
+            spec = job_spec(
+                job.url, job.download_path, job.format_type, self.playlist_workers,
+                self.archive, self.cache, self.encode_pool, self.sessions,
+                self.sync_stop, job.journal, self.media_cache, self.disk,
+            )
+            return WorkerJob(
+                self.workers, spec, metrics=self.metrics, bandwidth=self.bandwidth,
+                connections=self.connections, **callbacks
+            )
+
+        return DownloadTask(
+            job.url, job.download_path, job.format_type,
+            playlist_workers=self.playlist_workers,
+            archive=self.archive,
+            cache=self.cache,
+            encode_pool=self.encode_pool,
+            sessions=self.sessions,
+            bandwidth=self.bandwidth,
+            metrics=self.metrics,
+            connections=self.connections,
+            sync_stop=self.sync_stop,
+            limiter=self.limiter,
+            journal=job.journal,
+            media_cache=self.media_cache,
+            disk=self.disk,
+            **callbacks
+        )
+
+    async def _run(self, job):
+        # Extracting again while the lookup is half done would throw it away
+        if job.prefetch is not None and not job.cancel_requested:
+            await asyncio.get_running_loop().run_in_executor(self._executor, job.prefetch.wait)
+
+        if job.cancel_requested:
+            self._set_status(job, "Cancelled")
+            self._finish(job)
+            return
+
+        job.runner = self._runner(job)
+        self._set_status(job, "Starting...")
+        self._queue_changed()
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, job.runner.run)
+        result = None
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # A blocking download cannot be interrupted, only asked to stop
+            if self._interrupting:
+                job.runner.interrupt()
+            else:
+                job.runner.cancel()
+            result = await future
+            raise
+        finally:
+            self._finish(job, result)
+
+    # =====================================================
+    # CANCEL
+    # =====================================================
+    def cancel_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+
+        if job in self._pending:
+            self._pending.remove(job)
+            self._set_status(job, "Cancelled")
+            self._finish(job)
+
+        elif job.id in self._running:
+            # _run checks the flag before it builds the runner
+            job.cancel_requested = True
+            if job.prefetch is not None:
+                job.prefetch.cancel()
+            if job.runner is not None:
+                job.runner.cancel()
+            self._set_status(job, "Cancelling...")
+
+    def cancel_all(self):
+        for job in list(self._pending) + list(self._running.values()):
+            self.cancel_job(job.id)
+
+    async def close(self, interrupt=False, timeout=None):
+        # Cancels everything and waits for running jobs to stop, for at
+        # most timeout seconds. interrupt keeps partial files and leaves
+        # all jobs unfinished in the journal, to be resumed next time.
+        self._closed = True
+        self._interrupting = interrupt
+        for job in list(self._pending):
+            self.cancel_job(job.id)
+
+        tasks = []
+        for job in list(self._running.values()):
+            job.task.cancel()
+            # A task cancelled before its first step never runs _run
+            if job.runner is None:
+                self._set_status(job, "Cancelled")
+                self._finish(job)
+            else:
+                tasks.append(job.task)
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+        self._executor.shutdown(wait=False)
+        for stream in list(self._streams):
+            stream._put(None)
+
+    # =====================================================
+    # TASK CALLBACKS
+    # =====================================================
+    def _on_progress(self, job, progress):
+        job.progress = progress.percent
+        job.last_progress = progress
+        self._publish(EVENT_PROGRESS, job.id, progress)
+
+    def _set_status(self, job, text):
+        job.status = text
+        self._publish(EVENT_STATUS, job.id, text)
+
+    def _on_log(self, job, message, level):
+        self._publish(EVENT_LOG, job.id, message, level)
+
+    def _finish(self, job, result=None):
+        # WorkerJob has statuses of its own that it does not report
+        if result is not None and result != job.status:
+            self._set_status(job, result)
+
+        self._running.pop(job.id, None)
+        if job.prefetch is not None:
+            job.prefetch.cancel()
+            job.prefetch = None
+        job.runner = None
+        job.task = None
+        job.done = True
+        if job.journal is not None:
+            if not self._interrupting:
+                job.journal.finish(job.status)
+            job.journal = None
+
+        job._done.set()
+        self._publish(EVENT_FINISHED, job.id)
+        self._queue_changed()
+        self._schedule()
@@ -0,0 +1,133 @@
+import json
+import threading
+from contextlib import contextmanager
+
+
+# Options that belong to a single job. Everything else identifies the
+# session, so jobs with the same settings share extractors, cookies and
+# open connections.
+PER_JOB_OPTIONS = (
+    "progress_hooks", "postprocessor_hooks", "outtmpl", "download_archive",
+    "match_filter", "retry_sleep_functions", "logger", "paths",
+)
+
+# Per-job options that are plain params, set on checkout and removed
+# again on release (yt-dlp reads some with .get(name, {}), so a
+# leftover None would break it)
+PER_JOB_PARAMS = ("match_filter", "retry_sleep_functions", "logger", "paths")
+
+DEFAULT_MAX_IDLE = 4
+
+
+def session_key(options):
+    shared = {k: v for k, v in options.items() if k not in PER_JOB_OPTIONS}
+    return json.dumps(shared, sort_keys=True, default=repr)
+
+
+class SessionPool:
+    # Long-lived YoutubeDL instances keyed by their shared options. A
+    # session is checked out by one job at a time; per-job hooks, output
+    # template, archive and extra postprocessors are applied on checkout
+    # and removed again when the session goes back to the pool.
+    def __init__(self, max_idle=DEFAULT_MAX_IDLE):
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def session(self, options, postprocessors=()):
+        key = session_key(options)
+
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+            if ydl is not None:
+                self.reused += 1
+
+        if ydl is None:
+            import yt_dlp
+
+            shared = {k: v for k, v in options.items() if k not in PER_JOB_OPTIONS}
+            ydl = yt_dlp.YoutubeDL(shared)
+            with self._lock:
+                self.created += 1
+
+        snapshot = self._snapshot(ydl)
+        self._checkout(ydl, options, postprocessors)
+
+        try:
+            yield ydl
+        except BaseException:
+            # Whatever state the session is in now, do not reuse it
+            ydl.close()
+            raise
+
+        self._release(ydl, snapshot)
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(ydl)
+                ydl = None
+
+        if ydl is not None:
+            ydl.close()
+
+    def _snapshot(self, ydl):
+        pps = {when: list(pps) for when, pps in ydl._pps.items()}
+        hooks = [(pp, list(pp._progress_hooks)) for chain in pps.values() for pp in chain]
+        return pps, hooks
+
+    def _checkout(self, ydl, options, postprocessors):
+        ydl._download_retcode = 0
+
+        ydl.params["outtmpl"] = options.get("outtmpl") or {}
+        ydl._parse_outtmpl()
+
+        archive = options.get("download_archive")
+        ydl.params["download_archive"] = archive
+        ydl.archive = archive if archive is not None else set()
+
+        for name in PER_JOB_PARAMS:
+            if options.get(name) is not None:
+                ydl.params[name] = options[name]
+
+        for hook in options.get("progress_hooks") or []:
+            ydl.add_progress_hook(hook)
+
+        for pp, when in postprocessors:
+            ydl.add_post_processor(pp, when=when)
+
+        for hook in options.get("postprocessor_hooks") or []:
+            ydl.add_postprocessor_hook(hook)
+
+    def _release(self, ydl, snapshot):
+        pps, hooks = snapshot
+        ydl._progress_hooks = []
+        ydl._postprocessor_hooks = []
+        ydl._pps = pps
+        for pp, pp_hooks in hooks:
+            pp._progress_hooks = pp_hooks
+
+        ydl.params["download_archive"] = None
+        ydl.archive = set()
+        for name in PER_JOB_PARAMS:
+            ydl.params.pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "created": self.created,
+                "reused": self.reused,
+                "idle": sum(len(idle) for idle in self._idle.values()),
+            }
+
+    def close(self):
+        with self._lock:
+            sessions = [ydl for idle in self._idle.values() for ydl in idle]
+            self._idle = {}
+
+        for ydl in sessions:
+            ydl.close()
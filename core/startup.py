@@ -0,0 +1,28 @@
+import time
+
+
+# Milestones of a GUI launch, in the order they happen
+MARK_IMPORTS = "imports"
+MARK_WINDOW = "window"
+MARK_FIRST_PAINT = "first_paint"
+MARK_READY = "ready"
+
+
+class StartupTimer:
+    # Milliseconds from process start to each milestone. The clock
+    # starts when main.py is first executed, before Qt is imported.
+    def __init__(self, start=None, clock=time.perf_counter):
+        self.clock = clock
+        self.start = clock() if start is None else start
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = round((self.clock() - self.start) * 1000, 1)
+        return self.marks[name]
+
+    def report(self):
+        return dict(self.marks)
+
+    def summary(self):
+        return ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks.items())
@@ -0,0 +1,189 @@
+import random
+import re
+import threading
+import time
+import urllib.parse
+
+
+# Outcome of one attempt at a video, as HostLimiter.release takes it
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_TRANSIENT = "transient"
+OUTCOME_ERROR = "error"
+
+# Hosts start with no practical limit; it only drops once they throttle
+MIN_HOST_LIMIT = 1
+MAX_HOST_LIMIT = 16
+
+# A throttled attempt multiplies the host limit by this
+DECREASE_FACTOR = 0.5
+
+# Jittered exponential backoff: BACKOFF_BASE * 2^(n-1) seconds, capped,
+# scaled by a random factor between 0.5 and 1
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+# yt-dlp sleeps between its own retries where a cancel cannot reach it
+RETRY_SLEEP_MAX = 5.0
+
+# Attempts per video when it fails with a throttled or transient error
+MAX_ATTEMPTS = 4
+
+THROTTLED = re.compile(
+    r"HTTP Error (?:429|403)|Too Many Requests|rate[- ]?limit", re.IGNORECASE
+)
+TRANSIENT = re.compile(
+    r"HTTP Error 5\d\d|timed? ?out|Connection (?:reset|refused|aborted)"
+    r"|Remote end closed|IncompleteRead|Temporary failure|getaddrinfo failed",
+    re.IGNORECASE
+)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+
+
+def host_of(url):
+    return urllib.parse.urlparse(url or "").hostname or ""
+
+
+def classify(messages):
+    # The worst outcome any of the error messages points to
+    text = "\n".join(messages)
+    if THROTTLED.search(text):
+        return OUTCOME_THROTTLED
+    if TRANSIENT.search(text):
+        return OUTCOME_TRANSIENT
+    return OUTCOME_ERROR
+
+
+class ErrorLog:
+    # yt-dlp logger that keeps the error messages. With ignoreerrors they
+    # are the only record of why a video failed.
+    def __init__(self):
+        self.errors = []
+
+    def debug(self, message):
+        pass
+
+    def info(self, message):
+        pass
+
+    def warning(self, message):
+        pass
+
+    def error(self, message):
+        self.errors.append(message.removeprefix("ERROR: "))
+
+    def clear(self):
+        self.errors = []
+
+    @property
+    def last(self):
+        return self.errors[-1] if self.errors else ""
+
+
+class HostState:
+    def __init__(self, limit):
+        self.limit = float(limit)
+        self.active = 0
+        self.ok = 0
+        self.throttled = 0
+        self.errors = 0
+        self.streak = 0
+        self.paused_until = 0.0
+        # Bumped on every decrease; attempts started before it do not
+        # decrease the limit again
+        self.epoch = 0
+
+
+class HostLimiter:
+    # Shared by all jobs: how many videos of one host are extracted and
+    # downloaded at the same time. AIMD like TCP: every success adds
+    # 1/limit (one per full round) and a throttled attempt halves the
+    # limit, once per round: attempts that started before the last
+    # decrease only count. A host that still throttles at the minimum
+    # limit is paused for a jittered backoff that grows until the next
+    # success. Other errors are only counted.
+    def __init__(self, max_limit=MAX_HOST_LIMIT, min_limit=MIN_HOST_LIMIT,
+                 decrease=DECREASE_FACTOR, clock=time.monotonic):
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease = decrease
+        self.clock = clock
+        self._hosts = {}
+        self._changed = threading.Condition()
+
+    def _state(self, host):
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.max_limit)
+        return state
+
+    def set_max_limit(self, value):
+        with self._changed:
+            self.max_limit = max(self.min_limit, int(value))
+            for state in self._hosts.values():
+                state.limit = min(state.limit, self.max_limit)
+            self._changed.notify_all()
+
+    def limit(self, host):
+        with self._changed:
+            return int(self._state(host).limit)
+
+    def acquire(self, host, cancelled=None, poll=0.25):
+        # Blocks while the host is paused or at its limit. Returns the
+        # ticket to release with, or None if cancelled returned True in
+        # the meantime.
+        with self._changed:
+            state = self._state(host)
+            while True:
+                if cancelled is not None and cancelled():
+                    return None
+
+                wait = state.paused_until - self.clock()
+                if wait <= 0 and state.active < int(state.limit):
+                    state.active += 1
+                    return state.epoch
+
+                self._changed.wait(min(poll, wait) if wait > 0 else poll)
+
+    def release(self, host, outcome=None, ticket=None):
+        # outcome None (cancelled, crashed) only frees the slot
+        with self._changed:
+            state = self._state(host)
+            state.active -= 1
+
+            if outcome == OUTCOME_OK:
+                state.ok += 1
+                state.streak = 0
+                state.limit = min(self.max_limit, state.limit + 1 / state.limit)
+
+            elif outcome == OUTCOME_THROTTLED:
+                state.throttled += 1
+                if ticket is None or ticket == state.epoch:
+                    state.epoch += 1
+                    if int(state.limit) <= self.min_limit:
+                        state.streak += 1
+                        state.paused_until = self.clock() + backoff_delay(state.streak)
+                    state.limit = max(self.min_limit, state.limit * self.decrease)
+
+            elif outcome is not None:
+                state.errors += 1
+
+            self._changed.notify_all()
+
+    def stats(self):
+        with self._changed:
+            now = self.clock()
+            return {
+                host: {
+                    "limit": int(state.limit),
+                    "active": state.active,
+                    "ok": state.ok,
+                    "throttled": state.throttled,
+                    "errors": state.errors,
+                    "paused_seconds": round(max(0.0, state.paused_until - now), 1),
+                }
+                for host, state in self._hosts.items()
+            }
@@ -0,0 +1,137 @@
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from core.paths import resource_path
+
+
+DEFAULT_MP3_QUALITY = "192"
+
+# How often a waiting submit() or a running encode checks for cancel
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def mp3_options(quality=DEFAULT_MP3_QUALITY):
+    return ["-vn", "-codec:a", "libmp3lame", "-b:a", f"{quality}k"]
+
+
+def find_ffmpeg():
+    ffmpeg_dir = resource_path("assets/ffmpeg")
+    for name in ["ffmpeg.exe", "ffmpeg"]:
+        path = os.path.join(ffmpeg_dir, name)
+        if os.path.exists(path):
+            return path
+    return shutil.which("ffmpeg")
+
+
+class EncodeError(Exception):
+    pass
+
+
+class EncodeCancelled(Exception):
+    pass
+
+
+class EncodePool:
+    # Second pipeline stage: downloaders hand finished source files over
+    # and go back to the network while ffmpeg encodes them here. ffmpeg
+    # already runs as a child process, so each slot is just a thread
+    # waiting on one. submit() blocks once max_pending files are waiting,
+    # which keeps downloads from running too far ahead of the encoders.
+    def __init__(self, workers=None, max_pending=None, ffmpeg=None):
+        self.workers = workers or os.cpu_count() or 2
+        self.ffmpeg = ffmpeg or find_ffmpeg()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="encode"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending or self.workers * 2)
+
+    @property
+    def available(self):
+        return self.ffmpeg is not None
+
+    def submit(self, source, target, quality=DEFAULT_MP3_QUALITY, cancelled=None,
+               interrupted=None):
+        # cancelled is polled while waiting for a slot and while ffmpeg
+        # runs; once it returns True the encode stops with EncodeCancelled
+        # and the source is removed, like after a successful encode,
+        # unless interrupted returns True as well: a later run encodes it
+        return self._submit(
+            source, target, mp3_options(quality), (), cancelled, True, interrupted
+        )
+
+    def derive(self, source, target, options, input_options=(), cancelled=None):
+        # Like submit, for any output ffmpeg writes from the source with
+        # the given options; the source is kept
+        return self._submit(source, target, options, input_options, cancelled, False)
+
+    def _submit(self, source, target, options, input_options, cancelled, remove_source,
+                interrupted=None):
+        while not self._slots.acquire(timeout=CANCEL_POLL_INTERVAL):
+            if cancelled is not None and cancelled():
+                raise EncodeCancelled()
+
+        try:
+            future = self._executor.submit(
+                self._encode, source, target, options, input_options, cancelled,
+                remove_source, interrupted
+            )
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _encode(self, source, target, options, input_options=(), cancelled=None,
+                remove_source=True, interrupted=None):
+        base, ext = os.path.splitext(target)
+        temp = base + ".encoding" + ext
+
+        def discard_source():
+            if remove_source and not (interrupted is not None and interrupted()):
+                os.remove(source)
+
+        if cancelled is not None and cancelled():
+            discard_source()
+            raise EncodeCancelled()
+
+        process = subprocess.Popen(
+            [
+                self.ffmpeg, "-y", "-loglevel", "error", *input_options, "-i", source,
+                *options, temp,
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+
+        while True:
+            try:
+                _, stderr = process.communicate(timeout=CANCEL_POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if cancelled is not None and cancelled():
+                    # The output is thrown away, no need to let ffmpeg finish it
+                    process.kill()
+                    process.communicate()
+                    if os.path.exists(temp):
+                        os.remove(temp)
+                    discard_source()
+                    raise EncodeCancelled()
+
+        if process.returncode != 0:
+            if os.path.exists(temp):
+                os.remove(temp)
+            message = stderr.decode("utf-8", "replace").strip().splitlines()
+            raise EncodeError(message[-1] if message else f"ffmpeg exited {process.returncode}")
+
+        os.replace(temp, target)
+        if remove_source and os.path.abspath(source) != os.path.abspath(target):
+            os.remove(source)
+        return target
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,535 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+
+from core.logs import LOG_ERROR, LOG_WARNING
+
+
+# Download jobs in separate processes. The parent only relays small
+# messages, so yt-dlp's extraction and progress handling never compete
+# with the GUI thread for the GIL, and a crashing or hanging worker is
+# killed without taking the window down. Nothing in here imports Qt.
+
+# Parent to worker
+COMMAND_JOB = "job"
+COMMAND_CANCEL = "cancel"
+COMMAND_INTERRUPT = "interrupt"
+COMMAND_LIMITS = "limits"
+COMMAND_STOP = "stop"
+
+# Worker to parent
+EVENT_PROGRESS = "progress"
+EVENT_STATUS = "status"
+EVENT_LOG = "log"
+EVENT_METRIC = "metric"
+EVENT_HEARTBEAT = "heartbeat"
+EVENT_DONE = "done"
+
+HEARTBEAT_INTERVAL = 1.0
+POLL_INTERVAL = 0.25
+
+# A worker that sends nothing at all for this long is considered hung
+HANG_TIMEOUT = 30.0
+
+# Time a cancelled job gets to wind down before its worker is killed
+CANCEL_GRACE = 10.0
+
+
+def job_spec(url, download_path, format_type, playlist_workers, archive=None,
+             cache=None, encode_pool=None, sessions=None, sync_stop=0,
+             journal=None, media_cache=None, disk=None):
+    # Turns the shared objects a DownloadTask takes into plain settings
+    # a worker process can rebuild them from. Limits are sent apart, see
+    # WorkerJob.
+    return {
+        "url": url,
+        "download_path": download_path,
+        "format_type": format_type,
+        "playlist_workers": playlist_workers,
+        "archive": archive.path if archive is not None else None,
+        "cache": (cache.path, cache.ttl) if cache is not None else None,
+        "encode": encode_pool is not None and encode_pool.available,
+        "sessions": sessions is not None,
+        "sync_stop": sync_stop,
+        "journal": (journal.journal.path, journal.id) if journal is not None else None,
+        "media_cache": (
+            (media_cache.path, media_cache.max_bytes) if media_cache is not None else None
+        ),
+        "disk": (disk.staging, disk.min_free) if disk is not None else None,
+    }
+
+
+# =====================================================
+# WORKER PROCESS
+# =====================================================
+class RelayMetrics:
+    # Stands in for core.metrics.Metrics inside a worker and forwards
+    # every call to the registry in the parent
+    def __init__(self, send):
+        self.send = send
+
+    def observe(self, stage, seconds):
+        self.send(EVENT_METRIC, "observe", (stage, seconds))
+
+    def inc(self, name, value=1):
+        self.send(EVENT_METRIC, "inc", (name, value))
+
+    def set_gauge(self, name, value):
+        self.send(EVENT_METRIC, "set_gauge", (name, value))
+
+    def add_gauge(self, name, delta):
+        self.send(EVENT_METRIC, "add_gauge", (name, delta))
+
+    def finish_job(self, url, status, timings):
+        self.send(EVENT_METRIC, "finish_job", (url, status, timings))
+
+
+class WorkerResources:
+    # Archive, cache, sessions and pools of one worker process. They
+    # live as long as the process, so later jobs find them warm.
+    def __init__(self, send, encoders):
+        from core.session import SessionPool
+        from core.throttling import HostLimiter
+
+        self.metrics = RelayMetrics(send)
+        self.sessions = SessionPool()
+        # Per process: hosts throttle each worker on its own
+        self.limiter = HostLimiter()
+        self.encoders = encoders
+        self.encode_pool = None
+        self.bandwidth = None
+        self.connections = None
+        # Per process like the limiter; free space is read afresh anyway
+        self.disk = None
+        self._archives = {}
+        self._caches = {}
+        self._journals = {}
+        self._media_caches = {}
+
+    def close(self):
+        self.sessions.close()
+        for journal in self._journals.values():
+            journal.close()
+
+    def set_limits(self, bandwidth, connections):
+        from core.bandwidth import BandwidthScheduler
+        from core.connections import ConnectionTuner
+
+        if bandwidth is None:
+            self.bandwidth = None
+        elif self.bandwidth is None:
+            self.bandwidth = BandwidthScheduler(*bandwidth)
+        else:
+            self.bandwidth.set_limits(*bandwidth)
+
+        if connections is None:
+            self.connections = None
+        elif self.connections is None:
+            self.connections = ConnectionTuner(*connections)
+        else:
+            self.connections.set_limits(*connections)
+
+    def task(self, spec, send):
+        from core.archive import DownloadArchive
+        from core.cache import MetadataCache
+        from core.disk import DiskSpace
+        from core.engine import DownloadTask
+        from core.journal import JobJournal
+        from core.media_cache import MediaCache
+        from core.transcode import EncodePool
+
+        archive = None
+        if spec["archive"] is not None:
+            archive = self._archives.get(spec["archive"])
+            if archive is None:
+                archive = self._archives[spec["archive"]] = DownloadArchive(spec["archive"])
+
+        cache = None
+        if spec["cache"] is not None:
+            cache = self._caches.get(spec["cache"])
+            if cache is None:
+                cache = self._caches[spec["cache"]] = MetadataCache(*spec["cache"])
+
+        # The parent keeps the job row, the worker writes its entries
+        journal = None
+        if spec["journal"] is not None:
+            path, job_id = spec["journal"]
+            if path not in self._journals:
+                self._journals[path] = JobJournal(path)
+            journal = self._journals[path].job(job_id)
+
+        media_cache = None
+        if spec["media_cache"] is not None:
+            media_cache = self._media_caches.get(spec["media_cache"])
+            if media_cache is None:
+                media_cache = self._media_caches[spec["media_cache"]] = MediaCache(
+                    *spec["media_cache"]
+                )
+
+        disk = None
+        if spec["disk"] is not None:
+            if self.disk is None:
+                self.disk = DiskSpace()
+            self.disk.set_staging(spec["disk"][0])
+            self.disk.min_free = spec["disk"][1]
+            disk = self.disk
+
+        if spec["encode"] and self.encode_pool is None:
+            self.encode_pool = EncodePool(self.encoders)
+
+        return DownloadTask(
+            spec["url"], spec["download_path"], spec["format_type"],
+            playlist_workers=spec["playlist_workers"],
+            archive=archive,
+            cache=cache,
+            encode_pool=self.encode_pool if spec["encode"] else None,
+            sessions=self.sessions if spec["sessions"] else None,
+            bandwidth=self.bandwidth,
+            metrics=self.metrics,
+            connections=self.connections,
+            sync_stop=spec["sync_stop"],
+            limiter=self.limiter,
+            journal=journal,
+            media_cache=media_cache,
+            disk=disk,
+            on_progress=lambda progress: send(EVENT_PROGRESS, progress),
+            on_status=lambda text: send(EVENT_STATUS, text),
+            on_log=lambda message, level: send(EVENT_LOG, message, level),
+        )
+
+
+def worker_main(commands, events, encoders):
+    # Entry point of a worker process. A listener thread reads commands
+    # so cancel and limit changes arrive while a job runs on the main
+    # thread; a heartbeat thread proves the process is still alive.
+    from core.engine import warm_up
+
+    send_lock = threading.Lock()
+
+    def send(*message):
+        with send_lock:
+            events.send(message)
+
+    resources = WorkerResources(send, encoders)
+    jobs = queue.Queue()
+    state_lock = threading.Lock()
+    # Job ids to stop, mapped to whether they are interrupted
+    state = {"job": None, "task": None, "cancelled": {}}
+    stopped = threading.Event()
+
+    def stop(task, interrupt):
+        if interrupt:
+            task.interrupt()
+        else:
+            task.cancel()
+
+    def listen():
+        while True:
+            try:
+                message = commands.recv()
+            except (EOFError, OSError):
+                message = (COMMAND_STOP,)
+
+            kind = message[0]
+            if kind in (COMMAND_CANCEL, COMMAND_INTERRUPT):
+                with state_lock:
+                    state["cancelled"][message[1]] = kind == COMMAND_INTERRUPT
+                    if state["job"] == message[1] and state["task"] is not None:
+                        stop(state["task"], kind == COMMAND_INTERRUPT)
+            elif kind == COMMAND_LIMITS:
+                resources.set_limits(*message[1:])
+            else:
+                jobs.put(message)
+                if kind == COMMAND_STOP:
+                    return
+
+    def heartbeat():
+        while not stopped.wait(HEARTBEAT_INTERVAL):
+            try:
+                send(EVENT_HEARTBEAT)
+            except (EOFError, OSError):
+                return
+
+    threading.Thread(target=listen, daemon=True).start()
+    threading.Thread(target=heartbeat, daemon=True).start()
+    warm_up()
+
+    while True:
+        message = jobs.get()
+        if message[0] == COMMAND_STOP:
+            break
+
+        _, job_id, spec = message
+        task = resources.task(spec, send)
+        with state_lock:
+            state["job"], state["task"] = job_id, task
+            if job_id in state["cancelled"]:
+                stop(task, state["cancelled"][job_id])
+
+        try:
+            result = task.run()
+        except Exception as e:
+            send(EVENT_LOG, f"Error: {e}", LOG_ERROR)
+            result = "Error"
+
+        with state_lock:
+            state["job"], state["task"] = None, None
+            state["cancelled"].pop(job_id, None)
+        send(EVENT_DONE, result)
+
+    stopped.set()
+    resources.close()
+
+
+# =====================================================
+# PARENT SIDE
+# =====================================================
+class Worker:
+    # Parent end of one worker process and its two pipes
+    def __init__(self, context, encoders):
+        command_reader, self._commands = context.Pipe(duplex=False)
+        self._events, event_writer = context.Pipe(duplex=False)
+        self.process = context.Process(
+            target=worker_main, args=(command_reader, event_writer, encoders),
+            name="download-worker", daemon=True,
+        )
+        self.process.start()
+
+        # Only the child keeps these, so its death shows up as EOF here
+        command_reader.close()
+        event_writer.close()
+        self._lock = threading.Lock()
+
+    def send(self, *message):
+        with self._lock:
+            self._commands.send(message)
+
+    def poll(self, timeout):
+        return self._events.poll(timeout)
+
+    def recv(self):
+        return self._events.recv()
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join(5)
+        self._commands.close()
+        self._events.close()
+
+    def stop(self):
+        try:
+            self.send(COMMAND_STOP)
+        except OSError:
+            pass
+        self.process.join(5)
+        if self.process.is_alive():
+            self.kill()
+
+
+class WorkerPool:
+    # Up to size worker processes, one job each at a time. Idle workers
+    # are kept for the next job, with their sessions and caches.
+    def __init__(self, size=None, encoders=None):
+        cpus = os.cpu_count() or 2
+        self.size = size or cpus
+        self.encoders = encoders or max(1, cpus // self.size)
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle = []
+        self._busy = set()
+        self._next_job = 1
+        self._lock = threading.Lock()
+
+    def prestart(self, count=1):
+        # Spawning and importing yt-dlp takes a moment, pay it up front
+        with self._lock:
+            missing = min(count, self.size) - len(self._idle) - len(self._busy)
+        workers = [Worker(self._context, self.encoders) for _ in range(max(0, missing))]
+        with self._lock:
+            self._idle.extend(workers)
+
+    def busy_count(self):
+        with self._lock:
+            return len(self._busy)
+
+    def acquire(self, cancelled):
+        # Blocks until a slot is free; None if cancelled while waiting
+        while not self._slots.acquire(timeout=POLL_INTERVAL):
+            if cancelled():
+                return None
+
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    break
+            else:
+                worker = None
+
+        if worker is None:
+            try:
+                worker = Worker(self._context, self.encoders)
+            except Exception:
+                self._slots.release()
+                raise
+
+        with self._lock:
+            self._busy.add(worker)
+            job_id = self._next_job
+            self._next_job += 1
+        return worker, job_id
+
+    def release(self, worker, reusable):
+        with self._lock:
+            self._busy.discard(worker)
+            if reusable and worker.alive():
+                self._idle.append(worker)
+                worker = None
+        if worker is not None:
+            worker.kill()
+        self._slots.release()
+
+    def shutdown(self):
+        with self._lock:
+            workers = self._idle + list(self._busy)
+            self._idle = []
+        for worker in workers:
+            worker.stop()
+
+
+class WorkerJob:
+    # Runs one job spec on a pooled worker with the same callbacks as
+    # DownloadTask. run() relays events until the worker reports the
+    # result, exits or hangs, and returns the final status text.
+    # bandwidth and connections are the parent's shared objects; their
+    # settings are copied to the worker whenever they change, with the
+    # total bandwidth split evenly between busy workers.
+    def __init__(self, pool, spec, on_progress=None, on_status=None, on_log=None,
+                 metrics=None, bandwidth=None, connections=None):
+        self.pool = pool
+        self.spec = spec
+        self.metrics = metrics
+        self.bandwidth = bandwidth
+        self.connections = connections
+        self._sent_limits = None
+        self.on_progress = on_progress or (lambda value: None)
+        self.on_status = on_status or (lambda text: None)
+        self.on_log = on_log or (lambda message, level: None)
+        self.result = None
+        self.interrupted = False
+        self._cancelled_at = None
+        self._worker = None
+        self._job_id = None
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        with self._lock:
+            if self._cancelled_at is None:
+                self._cancelled_at = time.monotonic()
+            worker, job_id = self._worker, self._job_id
+
+        if worker is not None:
+            try:
+                worker.send(self._stop_command(), job_id)
+            except OSError:
+                pass
+
+    def interrupt(self):
+        # Like DownloadTask.interrupt: the worker keeps the partial files
+        self.interrupted = True
+        self.cancel()
+
+    def _stop_command(self):
+        return COMMAND_INTERRUPT if self.interrupted else COMMAND_CANCEL
+
+    def run(self):
+        acquired = self.pool.acquire(lambda: self._cancelled_at is not None)
+        if acquired is None:
+            return self._finish("Cancelled")
+
+        worker, job_id = acquired
+        with self._lock:
+            self._worker, self._job_id = worker, job_id
+            cancelled = self._cancelled_at is not None
+
+        reusable = False
+        try:
+            self._send_limits(worker)
+            worker.send(COMMAND_JOB, job_id, self.spec)
+            if cancelled:
+                worker.send(self._stop_command(), job_id)
+
+            last_seen = time.monotonic()
+            while True:
+                self._send_limits(worker)
+                if worker.poll(POLL_INTERVAL):
+                    message = worker.recv()
+                    last_seen = time.monotonic()
+                    if message[0] == EVENT_DONE:
+                        reusable = True
+                        self.result = message[1]
+                        return self.result
+                    self._dispatch(message)
+                    continue
+
+                now = time.monotonic()
+                if self._cancelled_at is not None and now - self._cancelled_at > CANCEL_GRACE:
+                    self.on_log("Worker did not stop in time and was killed", LOG_WARNING)
+                    return self._finish("Cancelled")
+                if now - last_seen > HANG_TIMEOUT:
+                    self.on_log("Worker stopped responding and was killed", LOG_ERROR)
+                    return self._finish("Error")
+
+        except (EOFError, OSError):
+            worker.process.join(1)
+            self.on_log(
+                f"Worker exited unexpectedly (exit code {worker.process.exitcode})",
+                LOG_ERROR
+            )
+            return self._finish("Error")
+
+        finally:
+            with self._lock:
+                self._worker = None
+            self.pool.release(worker, reusable)
+
+    def _limits(self):
+        bandwidth = connections = None
+        if self.bandwidth is not None:
+            total = self.bandwidth.total_rate
+            if total:
+                total = max(1, total // max(1, self.pool.busy_count()))
+            bandwidth = (total, self.bandwidth.job_rate)
+        if self.connections is not None:
+            connections = (self.connections.connections, self.connections.segment_size)
+        return bandwidth, connections
+
+    def _send_limits(self, worker):
+        limits = self._limits()
+        if limits != self._sent_limits:
+            worker.send(COMMAND_LIMITS, *limits)
+            self._sent_limits = limits
+
+    def _finish(self, status):
+        # Used when the worker never reported a result itself
+        self.result = status
+        if self.metrics is not None:
+            self.metrics.finish_job(self.spec["url"], status, {})
+        self.on_status(status)
+        return status
+
+    def _dispatch(self, message):
+        kind = message[0]
+        if kind == EVENT_PROGRESS:
+            self.on_progress(message[1])
+        elif kind == EVENT_STATUS:
+            self.on_status(message[1])
+        elif kind == EVENT_LOG:
+            self.on_log(message[1], message[2])
+        elif kind == EVENT_METRIC and self.metrics is not None:
+            getattr(self.metrics, message[1])(*message[2])
@@ -1,10 +1,10 @@
-import sys
-import os
+import time
 
-from PySide6.QtWidgets import QApplication
-from PySide6.QtGui import QIcon, QFontDatabase, QFont
+STARTED = time.perf_counter()
 
-from ui.main_window import MainWindow
+import sys
+import os
+import json
 
 
 # 🔥 Funcție universală pentru PyInstaller
@@ -15,6 +15,8 @@ def resource_path(relative_path):
 
 
 def load_font(app):
+    from PySide6.QtGui import QFontDatabase, QFont
+
     font_path = resource_path("assets/SFPRODISPLAYREGULAR.OTF")
 
     font_id = QFontDatabase.addApplicationFont(font_path)
@@ -25,7 +27,18 @@ def load_font(app):
         app.setFont(font)
 
 
-if __name__ == "__main__":
+def run_gui(startup_report=False):
+    from core.startup import StartupTimer, MARK_IMPORTS
+
+    startup = StartupTimer(STARTED)
+
+    from PySide6.QtWidgets import QApplication
+    from PySide6.QtGui import QIcon
+
+    from ui.main_window import MainWindow
+
+    startup.mark(MARK_IMPORTS)
+
     app = QApplication(sys.argv)
 
     # 🔥 Icon compatibil exe
@@ -36,7 +49,32 @@ if __name__ == "__main__":
     if os.path.exists(icon_path):
         app.setWindowIcon(QIcon(icon_path))
 
-    window = MainWindow()
+    window = MainWindow(startup)
     window.show()
 
-    sys.exit(app.exec())
\ No newline at end of file
+    # Prints the timings as JSON and quits once downloads are possible
+    if startup_report:
+        def report():
+            print(json.dumps(startup.report()))
+            # The emitting thread has to be gone before Qt shuts down
+            window.warm_up_thread.join()
+            app.quit()
+
+        window.engine_ready.connect(report)
+
+    return app.exec()
+
+
+if __name__ == "__main__":
+    # Download worker processes start from this script, see core.workers
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    # Headless mode never touches Qt
+    if "--headless" in sys.argv[1:]:
+        from core.cli import main
+
+        argv = [arg for arg in sys.argv[1:] if arg != "--headless"]
+        sys.exit(main(argv))
+
+    sys.exit(run_gui("--startup-report" in sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,89 @@
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PySide6.QtCore import Qt
+from datetime import datetime
+
+
+class ArchiveDialog(QDialog):
+    def __init__(self, archive, parent=None):
+        super().__init__(parent)
+        self.archive = archive
+
+        self.setWindowTitle("Download Archive")
+        self.resize(900, 500)
+
+        layout = QVBoxLayout()
+        layout.setSpacing(15)
+        self.setLayout(layout)
+
+        self.summary_label = QLabel()
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(
+            ["Extractor", "ID", "Format", "File", "Completed"]
+        )
+        self.table.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        button_layout = QHBoxLayout()
+
+        self.remove_btn = QPushButton("Remove Selected")
+        self.verify_btn = QPushButton("Verify Files")
+        self.clear_btn = QPushButton("Clear All")
+        self.close_btn = QPushButton("Close")
+
+        for btn in [self.remove_btn, self.verify_btn, self.clear_btn]:
+            btn.setCursor(Qt.PointingHandCursor)
+            button_layout.addWidget(btn)
+        button_layout.addStretch()
+        button_layout.addWidget(self.close_btn)
+
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table)
+        layout.addLayout(button_layout)
+
+        self.remove_btn.clicked.connect(self.remove_selected)
+        self.verify_btn.clicked.connect(self.verify)
+        self.clear_btn.clicked.connect(self.clear)
+        self.close_btn.clicked.connect(self.accept)
+
+        self.refresh()
+
+    def refresh(self, message=None):
+        entries = self.archive.entries()
+        self.table.setRowCount(len(entries))
+
+        for row, entry in enumerate(entries):
+            completed = datetime.fromtimestamp(entry["completed_at"])
+            values = [
+                entry["extractor"], entry["video_id"], entry["format"],
+                entry["path"] or "", completed.strftime("%Y-%m-%d %H:%M"),
+            ]
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                item.setData(Qt.UserRole, entry)
+                self.table.setItem(row, column, item)
+
+        text = f"{len(entries)} entries in {self.archive.path}"
+        if message:
+            text += f" · {message}"
+        self.summary_label.setText(text)
+
+    def remove_selected(self):
+        rows = {index.row() for index in self.table.selectedIndexes()}
+        for row in rows:
+            entry = self.table.item(row, 0).data(Qt.UserRole)
+            self.archive.remove(entry["extractor"], entry["video_id"], entry["format"])
+        self.refresh(f"removed {len(rows)}")
+
+    def verify(self):
+        removed = self.archive.verify()
+        self.refresh(f"{removed} missing files removed")
+
+    def clear(self):
+        self.archive.clear()
+        self.refresh()
@@ -1,10 +1,23 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLineEdit,
-    QPushButton, QTextEdit, QHBoxLayout,
-    QProgressBar, QLabel
+    QPushButton, QHBoxLayout,
+    QProgressBar, QLabel, QTableWidget,
+    QTableWidgetItem, QHeaderView, QAbstractItemView
 )
 from PySide6.QtCore import Qt
-from datetime import datetime
+
+from core.logs import LOG_INFO
+from core.disk import format_bytes
+from core.progress import STAGE_DOWNLOADING
+from ui.log_view import LogView
+
+
+def format_eta(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
 
 
 class Dashboard(QWidget):
@@ -20,6 +33,11 @@ class Dashboard(QWidget):
         self.url_input = QLineEdit()
         self.url_input.setMinimumHeight(40)
 
+        # What the pasted URL points to, filled in by the prefetch
+        self.preview_label = QLabel()
+        self.preview_label.setStyleSheet("color: #94a3b8; font-size: 12px;")
+        self.preview_label.setWordWrap(True)
+
         # Buttons
         button_layout = QHBoxLayout()
         button_layout.setSpacing(15)
@@ -42,20 +60,165 @@ class Dashboard(QWidget):
         self.progress_bar = QProgressBar()
         self.progress_bar.setValue(0)
 
+        self.cache_label = QLabel()
+        self.cache_label.setStyleSheet("color: #64748b; font-size: 12px;")
+
+        # Queue
+        self.queue_label = QLabel("Queue:")
+
+        self.queue_table = QTableWidget(0, 4)
+        self.queue_table.setHorizontalHeaderLabels(
+            ["URL", "Format", "Status", "Progress"]
+        )
+        self.queue_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        self.queue_table.verticalHeader().setVisible(False)
+        self.queue_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.queue_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.queue_table.setMinimumHeight(160)
+
+        queue_button_layout = QHBoxLayout()
+        queue_button_layout.setSpacing(15)
+
+        self.move_up_btn = QPushButton("Move Up")
+        self.move_down_btn = QPushButton("Move Down")
+        self.cancel_job_btn = QPushButton("Cancel Selected")
+        self.clear_finished_btn = QPushButton("Clear Finished")
+
+        for btn in [self.move_up_btn, self.move_down_btn,
+                    self.cancel_job_btn, self.clear_finished_btn]:
+            btn.setCursor(Qt.PointingHandCursor)
+            queue_button_layout.addWidget(btn)
+
+        self.job_rows = {}
+
         self.console_label = QLabel("Console:")
-        self.console = QTextEdit()
-        self.console.setReadOnly(True)
+        self.console = LogView()
         self.console.setMinimumHeight(200)
 
         layout.addWidget(self.url_label)
         layout.addWidget(self.url_input)
+        layout.addWidget(self.preview_label)
         layout.addLayout(button_layout)
         layout.addWidget(self.status_label)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cache_label)
+        layout.addWidget(self.queue_label)
+        layout.addWidget(self.queue_table)
+        layout.addLayout(queue_button_layout)
         layout.addSpacing(20)
         layout.addWidget(self.console_label)
         layout.addWidget(self.console)
 
-    def add_log(self, message):
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        self.console.append(f"[{timestamp}] {message}")
\ No newline at end of file
+    def add_log(self, message, level=LOG_INFO, job_id=None):
+        self.console.append(message, level, job_id)
+
+    def set_preview_pending(self):
+        self.preview_label.setText("Looking up...")
+
+    def set_preview(self, preview):
+        # None clears it
+        if preview is None:
+            self.preview_label.setText("")
+            return
+        if preview.error:
+            self.preview_label.setText(f"Preview unavailable: {preview.error}")
+            return
+
+        parts = [preview.title or preview.url]
+        if preview.entries is not None:
+            more = "" if preview.complete else "+"
+            parts.append(f"playlist · {preview.entries}{more} entries")
+        else:
+            if preview.duration:
+                parts.append(format_eta(preview.duration))
+            if preview.formats:
+                text = f"{preview.formats} formats"
+                if preview.height:
+                    text += f", up to {preview.height}p"
+                parts.append(text)
+        self.preview_label.setText(" · ".join(parts))
+
+    # =====================================================
+    # QUEUE VIEW
+    # =====================================================
+    def add_job_row(self, job_id, url, format_type):
+        row = self.queue_table.rowCount()
+        self.queue_table.insertRow(row)
+
+        url_item = QTableWidgetItem(url)
+        url_item.setData(Qt.UserRole, job_id)
+
+        progress = QProgressBar()
+        progress.setValue(0)
+
+        self.queue_table.setItem(row, 0, url_item)
+        self.queue_table.setItem(row, 1, QTableWidgetItem(format_type))
+        self.queue_table.setItem(row, 2, QTableWidgetItem("Queued"))
+        self.queue_table.setCellWidget(row, 3, progress)
+
+        self.job_rows[job_id] = url_item
+        if self.console.job_filter.findData(job_id) == -1:
+            self.console.add_job(job_id)
+
+    def _row_of(self, job_id):
+        item = self.job_rows.get(job_id)
+        return item.row() if item is not None else -1
+
+    def set_job_status(self, job_id, text):
+        row = self._row_of(job_id)
+        if row != -1:
+            self.queue_table.item(row, 2).setText(text)
+
+    def set_job_progress(self, job_id, progress):
+        row = self._row_of(job_id)
+        if row == -1:
+            return
+
+        bar = self.queue_table.cellWidget(row, 3)
+        bar.setValue(progress.percent)
+
+        text = "%p%"
+        if progress.entries_total > 1:
+            text += f" · {progress.entries_done}/{progress.entries_total}"
+        if progress.encodes_total:
+            text += f" · encoded {progress.encodes_done}/{progress.encodes_total}"
+        if progress.stage == STAGE_DOWNLOADING and progress.speed:
+            text += f" · {format_bytes(progress.speed)}/s"
+            if progress.eta is not None:
+                text += f" · {format_eta(progress.eta)}"
+        elif progress.stage != STAGE_DOWNLOADING:
+            text += f" · {progress.stage}"
+        bar.setFormat(text)
+
+    def remove_job_row(self, job_id):
+        row = self._row_of(job_id)
+        if row != -1:
+            self.queue_table.removeRow(row)
+        self.job_rows.pop(job_id, None)
+
+    def reorder_job_rows(self, job_ids):
+        # Keep pending jobs in queue order, right after everything else
+        for job_id in job_ids:
+            row = self._row_of(job_id)
+            if row == -1:
+                continue
+            url = self.queue_table.item(row, 0).text()
+            format_type = self.queue_table.item(row, 1).text()
+            status = self.queue_table.item(row, 2).text()
+            self.remove_job_row(job_id)
+            self.add_job_row(job_id, url, format_type)
+            self.set_job_status(job_id, status)
+
+    def selected_job_ids(self):
+        rows = {index.row() for index in self.queue_table.selectedIndexes()}
+        return [
+            self.queue_table.item(row, 0).data(Qt.UserRole)
+            for row in sorted(rows)
+        ]
+
+    def select_job(self, job_id):
+        row = self._row_of(job_id)
+        if row != -1:
+            self.queue_table.selectRow(row)
@@ -0,0 +1,191 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListView, QComboBox, QAbstractItemView
+)
+from PySide6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QSortFilterProxyModel, QTimer
+)
+from PySide6.QtGui import QColor
+from collections import deque
+from datetime import datetime
+
+from core.logs import LOG_INFO, LOG_WARNING, LOG_ERROR, LOG_LEVELS
+
+
+MAX_LOG_ENTRIES = 5000
+FLUSH_INTERVAL_MS = 200
+
+LEVEL_ROLE = Qt.UserRole
+JOB_ROLE = Qt.UserRole + 1
+
+LEVEL_COLORS = {
+    LOG_WARNING: QColor("#f59e0b"),
+    LOG_ERROR: QColor("#ef4444"),
+}
+
+
+class LogModel(QAbstractListModel):
+    # Ring buffer of (timestamp, level, job_id, message). Appends are
+    # queued and flushed in one batch per timer tick.
+    def __init__(self, max_entries=MAX_LOG_ENTRIES, parent=None):
+        super().__init__(parent)
+        self.max_entries = max_entries
+        self.log_file = None
+        self._entries = deque()
+        self._pending = []
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(FLUSH_INTERVAL_MS)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def append(self, message, level=LOG_INFO, job_id=None):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self._pending.append((timestamp, level, job_id, message))
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        batch = self._pending[-self.max_entries:]
+        if self.log_file is not None:
+            for entry in self._pending:
+                self.log_file.write(*entry)
+        self._pending = []
+
+        overflow = len(self._entries) + len(batch) - self.max_entries
+        if overflow > 0:
+            overflow = min(overflow, len(self._entries))
+            self.beginRemoveRows(QModelIndex(), 0, overflow - 1)
+            for _ in range(overflow):
+                self._entries.popleft()
+            self.endRemoveRows()
+
+        start = len(self._entries)
+        self.beginInsertRows(QModelIndex(), start, start + len(batch) - 1)
+        self._entries.extend(batch)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self._entries.clear()
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._entries)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        timestamp, level, job_id, message = self._entries[index.row()]
+
+        if role == Qt.DisplayRole:
+            if job_id is not None:
+                return f"[{timestamp}] [#{job_id}] {message}"
+            return f"[{timestamp}] {message}"
+        if role == Qt.ForegroundRole:
+            return LEVEL_COLORS.get(level)
+        if role == LEVEL_ROLE:
+            return level
+        if role == JOB_ROLE:
+            return job_id
+        return None
+
+
+class LogFilterModel(QSortFilterProxyModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.min_level = LOG_INFO
+        self.job_id = None
+
+    def set_min_level(self, level):
+        self.min_level = level
+        self.invalidateFilter()
+
+    def set_job(self, job_id):
+        self.job_id = job_id
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, row, parent):
+        index = self.sourceModel().index(row, 0, parent)
+
+        level = index.data(LEVEL_ROLE)
+        if LOG_LEVELS.index(level) < LOG_LEVELS.index(self.min_level):
+            return False
+
+        if self.job_id is not None and index.data(JOB_ROLE) != self.job_id:
+            return False
+
+        return True
+
+
+class LogView(QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+        self.setLayout(layout)
+
+        self.model = LogModel(parent=self)
+        self.proxy = LogFilterModel(self)
+        self.proxy.setSourceModel(self.model)
+
+        filter_layout = QHBoxLayout()
+
+        self.level_filter = QComboBox()
+        self.level_filter.addItem("All", LOG_INFO)
+        self.level_filter.addItem("Warnings", LOG_WARNING)
+        self.level_filter.addItem("Errors", LOG_ERROR)
+        self.level_filter.currentIndexChanged.connect(
+            lambda: self.proxy.set_min_level(self.level_filter.currentData())
+        )
+
+        self.job_filter = QComboBox()
+        self.job_filter.addItem("All jobs", None)
+        self.job_filter.currentIndexChanged.connect(
+            lambda: self.proxy.set_job(self.job_filter.currentData())
+        )
+
+        filter_layout.addWidget(self.level_filter)
+        filter_layout.addWidget(self.job_filter)
+        filter_layout.addStretch()
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.list_view.setWordWrap(False)
+
+        # Follow new lines only while the view is scrolled to the bottom
+        self._follow = True
+        scrollbar = self.list_view.verticalScrollBar()
+        scrollbar.valueChanged.connect(
+            lambda value: setattr(self, "_follow", value == scrollbar.maximum())
+        )
+        scrollbar.rangeChanged.connect(self._on_range_changed)
+
+        layout.addLayout(filter_layout)
+        layout.addWidget(self.list_view)
+
+    def _on_range_changed(self, minimum, maximum):
+        if self._follow:
+            self.list_view.verticalScrollBar().setValue(maximum)
+
+    def append(self, message, level=LOG_INFO, job_id=None):
+        self.model.append(message, level, job_id)
+
+    def add_job(self, job_id):
+        self.job_filter.addItem(f"Job #{job_id}", job_id)
+
+    def remove_job(self, job_id):
+        index = self.job_filter.findData(job_id)
+        if index > 0:
+            self.job_filter.removeItem(index)
+
+    def set_log_file(self, log_file):
+        if self.model.log_file is not None:
+            self.model.log_file.close()
+        self.model.log_file = log_file
@@ -1,26 +1,65 @@
 from PySide6.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
+    QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QStackedWidget, QLabel, QComboBox,
-    QFileDialog, QFrame, QPushButton
+    QFileDialog, QFrame, QPushButton, QSpinBox, QCheckBox
 )
-from PySide6.QtCore import QSettings
+from PySide6.QtCore import QSettings, QTimer, Signal
 import os
+import threading
 
 from ui.sidebar import Sidebar
 from ui.dashboard import Dashboard
-from core.downloader import DownloadThread
+from core.manager import DownloadManager
+from core.service import MAX_CONCURRENT_LIMIT
+from core.logs import RotatingLogFile, LOG_WARNING
+from core.archive import DownloadArchive
+from core.cache import MetadataCache
+from core.transcode import EncodePool
+from core.session import SessionPool
+from core.bandwidth import BandwidthScheduler
+from core.connections import (
+    ConnectionTuner, AUTO_CONNECTIONS, DEFAULT_SEGMENT_SIZE, MAX_CONNECTIONS
+)
+from core.startup import (
+    StartupTimer, MARK_WINDOW, MARK_FIRST_PAINT, MARK_READY
+)
+from ui.archive_dialog import ArchiveDialog
+from ui.stats_panel import StatsPanel
+from core.metrics import Metrics
+from core.workers import WorkerPool
+from core.prefetch import Prefetch, can_prefetch
+from core.throttling import HostLimiter, MAX_HOST_LIMIT
+from core.journal import JobJournal
+from core.media_cache import MediaCache
+from core.disk import DiskSpace
+from core.engine import (
+    warm_up, DEFAULT_PLAYLIST_WORKERS, MAX_PLAYLIST_WORKERS, DEFAULT_SYNC_STOP,
+    FORMAT_MP3, FORMAT_MP4, FORMAT_AUDIO, OUTPUT_THUMBNAIL, join_outputs
+)
+
+# Upper bound of the playlist re-sync setting
+MAX_SYNC_STOP = 100
+
+
+# Stats page refresh, and metrics file rewrite when exporting
+STATS_INTERVAL_MS = 2000
+
+# Quiet time after the last edit of the URL field before it is prefetched
+PREFETCH_DELAY_MS = 500
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    engine_ready = Signal()
+    preview_ready = Signal(object)
+
+    def __init__(self, startup=None):
         super().__init__()
 
+        self.startup = startup or StartupTimer()
+
         self.setWindowTitle("ZenLoader")
         self.resize(1150, 680)
 
-        # ================= STATE =================
-        self.current_thread = None
-
         # ================= SETTINGS =================
         self.settings = QSettings("ZenLoader", "ZenLoaderApp")
 
@@ -33,6 +72,50 @@ class MainWindow(QMainWindow):
         if not self.settings.value("download_path"):
             self.settings.setValue("download_path", default_path)
 
+        # ================= STATE =================
+        self.archive = DownloadArchive()
+        self.journal = JobJournal()
+        self.journal.prune()
+        self.cache = MetadataCache()
+        self.media_cache = MediaCache()
+        self.disk = DiskSpace(self.settings.value("staging_path", ""))
+        self.encode_pool = EncodePool()
+        self.sessions = SessionPool(max_idle=MAX_CONCURRENT_LIMIT)
+        self.metrics = Metrics()
+        self.bandwidth = BandwidthScheduler(
+            int(self.settings.value("total_rate_kb", 0)) * 1024,
+            int(self.settings.value("job_rate_kb", 0)) * 1024
+        )
+        self.limiter = HostLimiter(int(self.settings.value("host_limit", MAX_HOST_LIMIT)))
+        self.connections = ConnectionTuner(
+            int(self.settings.value("connections", AUTO_CONNECTIONS)),
+            int(self.settings.value("segment_size_mb", DEFAULT_SEGMENT_SIZE // 1024 // 1024))
+            * 1024 * 1024
+        )
+
+        self.manager = DownloadManager(
+            int(self.settings.value("max_concurrent", 2)),
+            int(self.settings.value("playlist_workers", DEFAULT_PLAYLIST_WORKERS)),
+            self.archive if self.settings.value("use_archive", True, type=bool) else None,
+            self.cache,
+            self.encode_pool,
+            self.sessions,
+            self.bandwidth,
+            self.metrics,
+            self.connections,
+            sync_stop=int(self.settings.value("sync_stop", DEFAULT_SYNC_STOP)),
+            limiter=self.limiter,
+            journal=self.journal,
+            media_cache=self.media_cache,
+            disk=self.disk
+        )
+        QApplication.instance().aboutToQuit.connect(self.manager.shutdown)
+
+        # Worker processes are only spawned once the option is on
+        self.workers = None
+        if self.settings.value("use_workers", False, type=bool):
+            self.set_use_workers(True)
+
         # ================= CENTRAL LAYOUT =================
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -54,23 +137,90 @@ class MainWindow(QMainWindow):
 
         self.dashboard = Dashboard()
         self.settings_page = self.create_settings_page()
+        self.stats_panel = StatsPanel()
         self.about_page = self.create_about_page()
 
         self.stack.addWidget(self.dashboard)
         self.stack.addWidget(self.settings_page)
+        self.stack.addWidget(self.stats_panel)
         self.stack.addWidget(self.about_page)
 
         # NAVIGATION
         self.sidebar.dashboard_btn.clicked.connect(lambda: self.switch_tab(0))
         self.sidebar.settings_btn.clicked.connect(lambda: self.switch_tab(1))
-        self.sidebar.about_btn.clicked.connect(lambda: self.switch_tab(2))
+        self.sidebar.stats_btn.clicked.connect(lambda: self.switch_tab(2))
+        self.sidebar.about_btn.clicked.connect(lambda: self.switch_tab(3))
+
+        # STATS
+        self.stats_panel.export_btn.clicked.connect(self.choose_metrics_file)
+        self.stats_panel.stop_export_btn.clicked.connect(lambda: self.set_metrics_file(""))
+        self.stats_panel.set_export_path(self.settings.value("metrics_file", ""))
+
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats)
+        self.stats_timer.start(STATS_INTERVAL_MS)
+
+        # PREFETCH
+        self.prefetch = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(PREFETCH_DELAY_MS)
+        self.prefetch_timer.timeout.connect(self.start_prefetch)
+        self.dashboard.url_input.textChanged.connect(self.on_url_edited)
+        self.preview_ready.connect(self.on_preview)
 
         # DOWNLOAD
         self.dashboard.download_btn.clicked.connect(self.start_download)
         self.dashboard.cancel_btn.clicked.connect(self.cancel_download)
 
+        # QUEUE
+        self.dashboard.move_up_btn.clicked.connect(lambda: self.move_selected(-1))
+        self.dashboard.move_down_btn.clicked.connect(lambda: self.move_selected(1))
+        self.dashboard.cancel_job_btn.clicked.connect(self.cancel_selected)
+        self.dashboard.clear_finished_btn.clicked.connect(self.clear_finished)
+
+        self.manager.job_added.connect(self.on_job_added)
+        self.manager.job_progress.connect(self.on_job_progress)
+        self.manager.job_status.connect(self.dashboard.set_job_status)
+        self.manager.job_log.connect(self.on_job_log)
+        self.manager.queue_changed.connect(self.update_queue_status)
+        self.manager.job_finished.connect(self.update_cache_stats)
+
+        self.engine_ready.connect(self.on_engine_ready)
+
         self.apply_language(self.current_language)
         self.apply_theme(self.current_theme)
+        self.update_cache_stats()
+
+        # Downloads the last session did not finish (crash, power loss)
+        for job_id in self.manager.resume_jobs():
+            self.dashboard.add_log(f"Resumed: {self.manager.jobs[job_id].url}", job_id=job_id)
+
+        self.startup.mark(MARK_WINDOW)
+
+    # =====================================================
+    # STARTUP
+    # =====================================================
+    def paintEvent(self, event):
+        super().paintEvent(event)
+
+        # yt-dlp is loaded only once the window is on screen. Downloads
+        # queued before that simply wait for the import on their thread.
+        if MARK_FIRST_PAINT not in self.startup.marks:
+            self.startup.mark(MARK_FIRST_PAINT)
+            QTimer.singleShot(0, self.start_warm_up)
+
+    def start_warm_up(self):
+        def work():
+            warm_up()
+            self.engine_ready.emit()
+
+        self.warm_up_thread = threading.Thread(target=work, name="warm-up", daemon=True)
+        self.warm_up_thread.start()
+
+    def on_engine_ready(self):
+        self.startup.mark(MARK_READY)
+        self.dashboard.add_log(f"Startup: {self.startup.summary()}")
 
     # =====================================================
     # TAB SWITCH
@@ -79,62 +229,236 @@ class MainWindow(QMainWindow):
         self.stack.setCurrentIndex(index)
         self.sidebar.dashboard_btn.setChecked(index == 0)
         self.sidebar.settings_btn.setChecked(index == 1)
-        self.sidebar.about_btn.setChecked(index == 2)
+        self.sidebar.stats_btn.setChecked(index == 2)
+        self.sidebar.about_btn.setChecked(index == 3)
+
+        if index == 2:
+            self.update_stats()
+
+    # =====================================================
+    # PREFETCH
+    # =====================================================
+    def on_url_edited(self):
+        # Whatever was looked up for the old text is not needed anymore
+        if self.prefetch is not None:
+            self.prefetch.cancel()
+            self.prefetch = None
+        self.dashboard.set_preview(None)
+        self.prefetch_timer.start()
+
+    def start_prefetch(self):
+        url = self.dashboard.url_input.text().strip()
+        if not can_prefetch(url):
+            return
+
+        # Results land in the cache and session pool the job reads first
+        self.prefetch = Prefetch(url, self.cache, self.sessions, self.preview_ready.emit)
+        self.prefetch.start()
+        self.dashboard.set_preview_pending()
+
+    def on_preview(self, preview):
+        if self.prefetch is not None and preview.url == self.prefetch.url:
+            self.dashboard.set_preview(preview)
+            self.update_cache_stats()
 
     # =====================================================
     # DOWNLOAD START
     # =====================================================
     def start_download(self):
         url = self.dashboard.url_input.text().strip()
-        format_type = self.format_selector.currentText()
+        # Extra outputs are made from the same download
+        format_type = join_outputs(
+            [self.format_selector.currentText()] + self.extra_outputs()
+        )
         download_path = self.settings.value("download_path")
 
         if not url:
             self.dashboard.status_label.setText("Status: Missing URL")
             return
 
-        if self.current_thread and self.current_thread.isRunning():
-            return
-
-        self.lock_settings(True)
-
-        self.current_thread = DownloadThread(url, download_path, format_type)
+        # The lookup of this URL belongs to the job from now on, so
+        # clearing the field below does not cancel it
+        prefetch = None
+        if self.prefetch is not None and self.prefetch.url == url:
+            prefetch = self.prefetch
+            self.prefetch = None
 
-        self.current_thread.progress.connect(self.dashboard.progress_bar.setValue)
-        self.current_thread.status.connect(
-            lambda text: self.dashboard.status_label.setText(f"Status: {text}")
-        )
-        self.current_thread.log.connect(self.dashboard.add_log)
-        self.current_thread.finished_signal.connect(self.download_finished)
+        # Every job keeps the format and folder it was queued with,
+        # so settings no longer need to be locked while downloading
+        job_id = self.manager.add_job(url, download_path, format_type, prefetch=prefetch)
 
-        self.dashboard.progress_bar.setValue(0)
-        self.dashboard.add_log("Download started")
-        self.current_thread.start()
+        self.dashboard.add_log(f"Queued: {url}", job_id=job_id)
+        self.dashboard.url_input.clear()
 
     # =====================================================
     # CANCEL
     # =====================================================
     def cancel_download(self):
-        if self.current_thread and self.current_thread.isRunning():
-            self.current_thread.cancel()
-            self.dashboard.add_log("Cancelling download...")
+        if self.manager.active_count() or self.manager.pending_count():
+            self.manager.cancel_all()
+            self.dashboard.add_log("Cancelling all downloads...")
             self.dashboard.status_label.setText("Status: Cancelling...")
             self.dashboard.url_input.clear()
 
-    # =====================================================
-    # THREAD FINISHED RESET
-    # =====================================================
-    def download_finished(self):
-        self.lock_settings(False)
-        self.current_thread = None
-        self.dashboard.progress_bar.setValue(0)
+    def cancel_selected(self):
+        for job_id in self.dashboard.selected_job_ids():
+            self.manager.cancel_job(job_id)
 
     # =====================================================
-    # LOCK SETTINGS
+    # QUEUE
     # =====================================================
-    def lock_settings(self, state):
-        self.format_selector.setEnabled(not state)
-        self.folder_btn.setEnabled(not state)
+    def move_selected(self, offset):
+        selected = self.dashboard.selected_job_ids()
+        if len(selected) != 1:
+            return
+
+        self.manager.move_job(selected[0], offset)
+        self.dashboard.reorder_job_rows(
+            [job.id for job in self.manager.pending_jobs()]
+        )
+        self.dashboard.select_job(selected[0])
+
+    def clear_finished(self):
+        for job_id in self.manager.remove_finished():
+            self.dashboard.remove_job_row(job_id)
+            self.dashboard.console.remove_job(job_id)
+
+    def on_job_added(self, job_id):
+        job = self.manager.jobs[job_id]
+        self.dashboard.add_job_row(job.id, job.url, job.format_type)
+
+    def on_job_progress(self, job_id, progress):
+        self.dashboard.set_job_progress(job_id, progress)
+        self.update_overall_progress()
+
+    def on_job_log(self, job_id, message, level):
+        self.dashboard.add_log(message, level, job_id)
+
+    def update_queue_status(self):
+        active = self.manager.active_count()
+        pending = self.manager.pending_count()
+
+        if active or pending:
+            self.dashboard.status_label.setText(
+                f"Status: {active} active, {pending} queued"
+            )
+        else:
+            self.dashboard.status_label.setText("Status: Idle")
+
+        self.update_overall_progress()
+
+    def update_cache_stats(self):
+        stats = self.cache.stats()
+        media = self.media_cache.stats()
+        self.dashboard.cache_label.setText(
+            f"Metadata cache: {stats['hits']} hits · {stats['misses']} misses · "
+            f"{stats['entries']} entries  |  Media cache: {media['hits']} hits · "
+            f"{media['bytes'] / 1024 / 1024:.0f} MB"
+        )
+
+    def update_stats(self):
+        if self.stack.currentWidget() is self.stats_panel:
+            self.stats_panel.update_stats(self.metrics.snapshot(), self.limiter.stats())
+
+        path = self.settings.value("metrics_file", "")
+        if path:
+            try:
+                self.metrics.write(path)
+            except OSError as e:
+                self.dashboard.add_log(f"Metrics export failed: {e}", LOG_WARNING)
+                self.set_metrics_file("")
+
+    def choose_metrics_file(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Metrics", "zenloader.prom",
+            "Prometheus text (*.prom);;JSON (*.json)"
+        )
+        if path:
+            self.set_metrics_file(path)
+
+    def set_metrics_file(self, path):
+        self.settings.setValue("metrics_file", path)
+        self.stats_panel.set_export_path(path)
+
+    def update_overall_progress(self):
+        running = self.manager.running_jobs()
+        if running:
+            self.dashboard.progress_bar.setValue(
+                sum(job.progress for job in running) // len(running)
+            )
+        else:
+            self.dashboard.progress_bar.setValue(0)
+
+    def change_max_concurrent(self, value):
+        self.settings.setValue("max_concurrent", value)
+        self.manager.set_max_concurrent(value)
+
+    def extra_outputs(self):
+        return [
+            output for output, check in self.extra_output_checks.items()
+            if check.isChecked()
+        ]
+
+    def change_extra_outputs(self):
+        self.settings.setValue("extra_outputs", self.extra_outputs())
+
+    def change_use_archive(self, enabled):
+        self.settings.setValue("use_archive", enabled)
+        self.manager.set_archive(self.archive if enabled else None)
+
+    def change_use_workers(self, enabled):
+        self.settings.setValue("use_workers", enabled)
+        self.set_use_workers(enabled)
+
+    def set_use_workers(self, enabled):
+        # Running jobs finish where they started
+        if enabled and self.workers is None:
+            self.workers = WorkerPool()
+            threading.Thread(target=self.workers.prestart, daemon=True).start()
+        self.manager.set_workers(self.workers if enabled else None)
+
+    def show_archive(self):
+        ArchiveDialog(self.archive, self).exec()
+
+    def change_log_to_file(self, enabled):
+        self.settings.setValue("log_to_file", enabled)
+
+        if enabled:
+            # In the data folder, next to the archive and the journal
+            log_file = RotatingLogFile()
+            self.dashboard.console.set_log_file(log_file)
+            self.log_file_label.setText(log_file.path)
+        else:
+            self.dashboard.console.set_log_file(None)
+            self.log_file_label.setText("")
+
+    def change_playlist_workers(self, value):
+        self.settings.setValue("playlist_workers", value)
+        self.manager.set_playlist_workers(value)
+
+    def change_host_limit(self, value):
+        self.settings.setValue("host_limit", value)
+        self.limiter.set_max_limit(value)
+
+    def change_sync_stop(self, value):
+        self.settings.setValue("sync_stop", value)
+        self.manager.set_sync_stop(value)
+
+    def change_rate_limits(self):
+        # Running downloads pick up the new limits on their next chunk
+        total_kb = self.total_rate_spin.value()
+        job_kb = self.job_rate_spin.value()
+        self.settings.setValue("total_rate_kb", total_kb)
+        self.settings.setValue("job_rate_kb", job_kb)
+        self.bandwidth.set_limits(total_kb * 1024, job_kb * 1024)
+
+    def change_connections(self):
+        # Applies to transfers started from now on
+        connections = self.connections_spin.value()
+        segment_mb = self.segment_size_spin.value()
+        self.settings.setValue("connections", connections)
+        self.settings.setValue("segment_size_mb", segment_mb)
+        self.connections.set_limits(connections, segment_mb * 1024 * 1024)
 
     # =====================================================
     # SETTINGS PAGE
@@ -169,9 +493,143 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.format_label)
 
         self.format_selector = QComboBox()
-        self.format_selector.addItems(["MP3 (Audio Only)", "MP4 (Video)"])
+        self.format_selector.addItems([FORMAT_MP3, FORMAT_MP4, FORMAT_AUDIO])
         layout.addWidget(self.format_selector)
 
+        # Extra outputs
+        self.extra_outputs_label = QLabel()
+        layout.addWidget(self.extra_outputs_label)
+
+        extra_layout = QHBoxLayout()
+        saved = self.settings.value("extra_outputs", [], type=list)
+        self.extra_output_checks = {}
+        for output in (FORMAT_MP3, FORMAT_MP4, FORMAT_AUDIO, OUTPUT_THUMBNAIL):
+            check = QCheckBox(output)
+            check.setChecked(output in saved)
+            check.toggled.connect(self.change_extra_outputs)
+            self.extra_output_checks[output] = check
+            extra_layout.addWidget(check)
+        extra_layout.addStretch()
+        layout.addLayout(extra_layout)
+
+        # Concurrency
+        self.concurrency_label = QLabel()
+        layout.addWidget(self.concurrency_label)
+
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, MAX_CONCURRENT_LIMIT)
+        self.concurrency_spin.setValue(self.manager.max_concurrent)
+        self.concurrency_spin.valueChanged.connect(self.change_max_concurrent)
+        layout.addWidget(self.concurrency_spin)
+
+        self.playlist_workers_label = QLabel()
+        layout.addWidget(self.playlist_workers_label)
+
+        self.playlist_workers_spin = QSpinBox()
+        self.playlist_workers_spin.setRange(1, MAX_PLAYLIST_WORKERS)
+        self.playlist_workers_spin.setValue(self.manager.playlist_workers)
+        self.playlist_workers_spin.valueChanged.connect(self.change_playlist_workers)
+        layout.addWidget(self.playlist_workers_spin)
+
+        # Per host, lowered automatically while a host throttles
+        self.host_limit_label = QLabel()
+        layout.addWidget(self.host_limit_label)
+
+        self.host_limit_spin = QSpinBox()
+        self.host_limit_spin.setRange(1, MAX_HOST_LIMIT)
+        self.host_limit_spin.setValue(self.limiter.max_limit)
+        self.host_limit_spin.valueChanged.connect(self.change_host_limit)
+        layout.addWidget(self.host_limit_spin)
+
+        # Playlist re-sync, 0 lists every entry
+        self.sync_stop_label = QLabel()
+        layout.addWidget(self.sync_stop_label)
+
+        self.sync_stop_spin = QSpinBox()
+        self.sync_stop_spin.setRange(0, MAX_SYNC_STOP)
+        self.sync_stop_spin.setValue(self.manager.sync_stop)
+        self.sync_stop_spin.valueChanged.connect(self.change_sync_stop)
+        layout.addWidget(self.sync_stop_spin)
+
+        # Bandwidth, in KB/s with 0 meaning unlimited
+        rate_layout = QHBoxLayout()
+
+        self.total_rate_label = QLabel()
+        self.total_rate_spin = QSpinBox()
+        self.total_rate_spin.setRange(0, 1000000)
+        self.total_rate_spin.setSuffix(" KB/s")
+        self.total_rate_spin.setValue(self.bandwidth.total_rate // 1024)
+
+        self.job_rate_label = QLabel()
+        self.job_rate_spin = QSpinBox()
+        self.job_rate_spin.setRange(0, 1000000)
+        self.job_rate_spin.setSuffix(" KB/s")
+        self.job_rate_spin.setValue(self.bandwidth.job_rate // 1024)
+
+        self.total_rate_spin.valueChanged.connect(self.change_rate_limits)
+        self.job_rate_spin.valueChanged.connect(self.change_rate_limits)
+
+        rate_layout.addWidget(self.total_rate_label)
+        rate_layout.addWidget(self.total_rate_spin)
+        rate_layout.addWidget(self.job_rate_label)
+        rate_layout.addWidget(self.job_rate_spin)
+        layout.addLayout(rate_layout)
+
+        # Parallel range requests for large files, 0 tunes them per host
+        connections_layout = QHBoxLayout()
+
+        self.connections_label = QLabel()
+        self.connections_spin = QSpinBox()
+        self.connections_spin.setRange(AUTO_CONNECTIONS, MAX_CONNECTIONS)
+        self.connections_spin.setValue(self.connections.connections)
+
+        self.segment_size_label = QLabel()
+        self.segment_size_spin = QSpinBox()
+        self.segment_size_spin.setRange(1, 64)
+        self.segment_size_spin.setSuffix(" MB")
+        self.segment_size_spin.setValue(self.connections.segment_size // 1024 // 1024)
+
+        self.connections_spin.valueChanged.connect(self.change_connections)
+        self.segment_size_spin.valueChanged.connect(self.change_connections)
+
+        connections_layout.addWidget(self.connections_label)
+        connections_layout.addWidget(self.connections_spin)
+        connections_layout.addWidget(self.segment_size_label)
+        connections_layout.addWidget(self.segment_size_spin)
+        layout.addLayout(connections_layout)
+
+        # Archive
+        archive_layout = QHBoxLayout()
+
+        self.use_archive_check = QCheckBox()
+        self.use_archive_check.setChecked(self.manager.archive is not None)
+        self.use_archive_check.toggled.connect(self.change_use_archive)
+
+        self.archive_btn = QPushButton()
+        self.archive_btn.clicked.connect(self.show_archive)
+
+        archive_layout.addWidget(self.use_archive_check)
+        archive_layout.addWidget(self.archive_btn)
+        archive_layout.addStretch()
+        layout.addLayout(archive_layout)
+
+        # Worker processes
+        self.use_workers_check = QCheckBox()
+        self.use_workers_check.setChecked(self.manager.workers is not None)
+        self.use_workers_check.toggled.connect(self.change_use_workers)
+        layout.addWidget(self.use_workers_check)
+
+        # Log file
+        log_layout = QHBoxLayout()
+
+        self.log_to_file_check = QCheckBox()
+        self.log_file_label = QLabel()
+
+        log_layout.addWidget(self.log_to_file_check)
+        log_layout.addWidget(self.log_file_label)
+        log_layout.addStretch()
+        layout.addLayout(log_layout)
+
         # Folder
         self.folder_title = QLabel()
         layout.addWidget(self.folder_title)
@@ -187,8 +645,32 @@ class MainWindow(QMainWindow):
         folder_layout.addWidget(self.folder_label)
 
         layout.addLayout(folder_layout)
+
+        # Staging folder
+        self.staging_title = QLabel()
+        layout.addWidget(self.staging_title)
+
+        staging_layout = QHBoxLayout()
+
+        self.staging_btn = QPushButton()
+        self.staging_btn.clicked.connect(self.choose_staging_folder)
+        self.staging_clear_btn = QPushButton()
+        self.staging_clear_btn.clicked.connect(lambda: self.change_staging_folder(""))
+
+        self.staging_label = QLabel(self.disk.staging or "")
+
+        staging_layout.addWidget(self.staging_btn)
+        staging_layout.addWidget(self.staging_clear_btn)
+        staging_layout.addWidget(self.staging_label)
+
+        layout.addLayout(staging_layout)
         layout.addStretch()
 
+        self.log_to_file_check.toggled.connect(self.change_log_to_file)
+        self.log_to_file_check.setChecked(
+            self.settings.value("log_to_file", False, type=bool)
+        )
+
         self.theme_selector.currentTextChanged.connect(self.change_theme)
         self.language_selector.currentTextChanged.connect(self.change_language)
 
@@ -203,6 +685,17 @@ class MainWindow(QMainWindow):
             self.settings.setValue("download_path", folder)
             self.folder_label.setText(folder)
 
+    def choose_staging_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select Staging Folder")
+        if folder:
+            self.change_staging_folder(folder)
+
+    def change_staging_folder(self, folder):
+        # Jobs that already run keep the folder they started with
+        self.settings.setValue("staging_path", folder)
+        self.disk.set_staging(folder)
+        self.staging_label.setText(folder)
+
     # =====================================================
     # ABOUT PAGE
     # =====================================================
@@ -256,16 +749,40 @@ class MainWindow(QMainWindow):
             "EN": {
                 "dashboard": "Dashboard",
                 "settings": "Settings",
+                "stats": "Stats",
                 "about": "About",
                 "download": "Download",
                 "cancel": "Cancel",
                 "youtube": "YouTube Link:",
                 "console": "Console:",
+                "queue": "Queue:",
+                "move_up": "Move Up",
+                "move_down": "Move Down",
+                "cancel_job": "Cancel Selected",
+                "clear_finished": "Clear Finished",
+                "concurrency": "Simultaneous Downloads",
+                "playlist_workers": "Parallel Playlist Entries",
+                "sync_stop": "Stop Playlist Listing After Known Entries in a Row",
+                "host_limit": "Most Videos per Site at Once",
+                "off": "Off",
+                "total_rate": "Total Speed Limit",
+                "job_rate": "Per Download Limit",
+                "unlimited": "Unlimited",
+                "connections": "Connections per File",
+                "segment_size": "Segment Size",
+                "auto": "Auto",
+                "log_to_file": "Save full log to disk",
+                "use_archive": "Skip videos that were already downloaded",
+                "manage_archive": "Manage Archive",
+                "use_workers": "Run downloads in separate processes",
                 "theme": "Theme",
                 "language": "Language",
                 "format": "Default Format",
+                "extra_outputs": "Also Save From the Same Download",
                 "folder": "Default Download Folder",
-                "choose_folder": "Choose Folder"
+                "choose_folder": "Choose Folder",
+                "staging": "Staging Folder (fast local disk, optional)",
+                "no_staging": "Don't Stage"
             }
         }
 
@@ -274,18 +791,44 @@ class MainWindow(QMainWindow):
 
         self.sidebar.dashboard_btn.setText(t["dashboard"])
         self.sidebar.settings_btn.setText(t["settings"])
+        self.sidebar.stats_btn.setText(t["stats"])
         self.sidebar.about_btn.setText(t["about"])
 
         self.dashboard.url_label.setText(t["youtube"])
         self.dashboard.console_label.setText(t["console"])
         self.dashboard.download_btn.setText(t["download"])
         self.dashboard.cancel_btn.setText(t["cancel"])
+        self.dashboard.queue_label.setText(t["queue"])
+        self.dashboard.move_up_btn.setText(t["move_up"])
+        self.dashboard.move_down_btn.setText(t["move_down"])
+        self.dashboard.cancel_job_btn.setText(t["cancel_job"])
+        self.dashboard.clear_finished_btn.setText(t["clear_finished"])
 
         self.theme_label.setText(t["theme"])
         self.language_label.setText(t["language"])
         self.format_label.setText(t["format"])
+        self.extra_outputs_label.setText(t["extra_outputs"])
         self.folder_title.setText(t["folder"])
         self.folder_btn.setText(t["choose_folder"])
+        self.staging_title.setText(t["staging"])
+        self.staging_btn.setText(t["choose_folder"])
+        self.staging_clear_btn.setText(t["no_staging"])
+        self.concurrency_label.setText(t["concurrency"])
+        self.playlist_workers_label.setText(t["playlist_workers"])
+        self.sync_stop_label.setText(t["sync_stop"])
+        self.host_limit_label.setText(t["host_limit"])
+        self.sync_stop_spin.setSpecialValueText(t["off"])
+        self.total_rate_label.setText(t["total_rate"])
+        self.job_rate_label.setText(t["job_rate"])
+        self.total_rate_spin.setSpecialValueText(t["unlimited"])
+        self.job_rate_spin.setSpecialValueText(t["unlimited"])
+        self.connections_label.setText(t["connections"])
+        self.segment_size_label.setText(t["segment_size"])
+        self.connections_spin.setSpecialValueText(t["auto"])
+        self.log_to_file_check.setText(t["log_to_file"])
+        self.use_archive_check.setText(t["use_archive"])
+        self.archive_btn.setText(t["manage_archive"])
+        self.use_workers_check.setText(t["use_workers"])
 
     # =====================================================
     # DARK THEME
@@ -339,7 +882,7 @@ class MainWindow(QMainWindow):
             background-color: #dc2626;
         }
 
-        QLineEdit, QTextEdit {
+        QLineEdit, QListView, QTableWidget, QSpinBox {
             background-color: #1e293b;
             border: 1px solid #334155;
             border-radius: 10px;
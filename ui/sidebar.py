@@ -21,13 +21,15 @@ class Sidebar(QWidget):
 
         self.dashboard_btn = QPushButton("Dashboard")
         self.settings_btn = QPushButton("Settings")
+        self.stats_btn = QPushButton("Stats")
         self.about_btn = QPushButton("About")
 
         self.dashboard_btn.setIcon(QIcon(os.path.join(icon_path, "dashboard.png")))
         self.settings_btn.setIcon(QIcon(os.path.join(icon_path, "settings.png")))
+        self.stats_btn.setIcon(QIcon(os.path.join(icon_path, "stats.png")))
         self.about_btn.setIcon(QIcon(os.path.join(icon_path, "about.png")))
 
-        for btn in [self.dashboard_btn, self.settings_btn, self.about_btn]:
+        for btn in [self.dashboard_btn, self.settings_btn, self.stats_btn, self.about_btn]:
             btn.setCheckable(True)
             btn.setCursor(Qt.PointingHandCursor)
             btn.setMinimumHeight(45)
@@ -38,6 +40,7 @@ class Sidebar(QWidget):
 
         layout.addWidget(self.dashboard_btn)
         layout.addWidget(self.settings_btn)
+        layout.addWidget(self.stats_btn)
         layout.addWidget(self.about_btn)
 
         layout.addStretch()  # 🔥 împinge versiunea jos
@@ -0,0 +1,117 @@
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView
+)
+from PySide6.QtCore import Qt
+
+from core.metrics import (
+    STAGES, COUNTER_BYTES, COUNTER_BYTES_WRITTEN, COUNTER_JOBS, COUNTER_RETRIES,
+    COUNTER_ERRORS, COUNTER_THROTTLED, COUNTER_BACKOFFS, GAUGE_RUNNING, GAUGE_PENDING,
+    GAUGE_ENCODES
+)
+from ui.dashboard import format_bytes
+
+
+class StatsPanel(QWidget):
+    def __init__(self):
+        super().__init__()
+
+        layout = QVBoxLayout()
+        layout.setSpacing(20)
+        layout.setContentsMargins(50, 50, 50, 50)
+        self.setLayout(layout)
+
+        self.stages_label = QLabel("Time per stage:")
+
+        self.stage_table = QTableWidget(len(STAGES), 5)
+        self.stage_table.setHorizontalHeaderLabels(
+            ["Stage", "Count", "Average", "Max", "Total"]
+        )
+        self.stage_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.stage_table.verticalHeader().setVisible(False)
+        self.stage_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.stage_table.setSelectionMode(QAbstractItemView.NoSelection)
+
+        for row, stage in enumerate(STAGES):
+            self.stage_table.setItem(row, 0, QTableWidgetItem(stage.replace("_", " ")))
+
+        self.counters_label = QLabel()
+        self.gauges_label = QLabel()
+        self.hosts_label = QLabel()
+        self.hosts_label.setWordWrap(True)
+        for label in [self.counters_label, self.gauges_label, self.hosts_label]:
+            label.setStyleSheet("color: #64748b;")
+
+        export_layout = QHBoxLayout()
+
+        self.export_btn = QPushButton("Export to File...")
+        self.stop_export_btn = QPushButton("Stop Export")
+        for btn in [self.export_btn, self.stop_export_btn]:
+            btn.setCursor(Qt.PointingHandCursor)
+            export_layout.addWidget(btn)
+
+        self.export_label = QLabel()
+        self.export_label.setStyleSheet("color: #64748b; font-size: 12px;")
+        export_layout.addWidget(self.export_label, 1)
+
+        layout.addWidget(self.stages_label)
+        layout.addWidget(self.stage_table)
+        layout.addWidget(self.counters_label)
+        layout.addWidget(self.gauges_label)
+        layout.addWidget(self.hosts_label)
+        layout.addLayout(export_layout)
+
+    def update_stats(self, snapshot, hosts=None):
+        for row, stage in enumerate(STAGES):
+            summary = snapshot["stages"].get(stage)
+            if not summary or not summary["count"]:
+                values = ["0", "-", "-", "-"]
+            else:
+                values = [
+                    str(summary["count"]),
+                    f"{summary['avg_seconds']:.2f} s",
+                    f"{summary['max_seconds']:.2f} s",
+                    f"{summary['total_seconds']:.1f} s",
+                ]
+
+            for column, value in enumerate(values, start=1):
+                item = self.stage_table.item(row, column)
+                if item is None:
+                    self.stage_table.setItem(row, column, QTableWidgetItem(value))
+                else:
+                    item.setText(value)
+
+        counters = snapshot["counters"]
+        self.counters_label.setText(
+            f"Downloaded: {format_bytes(counters.get(COUNTER_BYTES, 0))} · "
+            f"Moved from staging: {format_bytes(counters.get(COUNTER_BYTES_WRITTEN, 0))} · "
+            f"Jobs: {counters.get(COUNTER_JOBS, 0)} · "
+            f"Retries: {counters.get(COUNTER_RETRIES, 0)} · "
+            f"Throttled: {counters.get(COUNTER_THROTTLED, 0)} · "
+            f"Backoffs: {counters.get(COUNTER_BACKOFFS, 0)} · "
+            f"Errors: {counters.get(COUNTER_ERRORS, 0)}"
+        )
+
+        gauges = snapshot["gauges"]
+        self.gauges_label.setText(
+            f"Running: {gauges.get(GAUGE_RUNNING, 0)} · "
+            f"Queued: {gauges.get(GAUGE_PENDING, 0)} · "
+            f"Encoding: {gauges.get(GAUGE_ENCODES, 0)}"
+        )
+
+        # Current per-host limits of core.throttling.HostLimiter
+        lines = []
+        for host, state in sorted((hosts or {}).items()):
+            line = (
+                f"{host}: limit {state['limit']} · {state['active']} active · "
+                f"{state['ok']} ok · {state['throttled']} throttled · "
+                f"{state['errors']} errors"
+            )
+            if state["paused_seconds"]:
+                line += f" · paused {state['paused_seconds']:.1f} s"
+            lines.append(line)
+        self.hosts_label.setText("\n".join(lines))
+
+    def set_export_path(self, path):
+        self.export_label.setText(path or "")
+        self.stop_export_btn.setEnabled(bool(path))